@@ -5,6 +5,7 @@ from catanatron import Game, Player, Color, Accumulator
 """
 
 from catanatron.game import Game, GameAccumulator
+from catanatron.rules import SimulationRules
 from catanatron.models.player import Player, Color, RandomPlayer
 from catanatron.models.enums import (
     Action,
@@ -0,0 +1,770 @@
+"""
+Lockstep batched engine: plays N random-player continuations of a game at
+once, with each game's state held as a row of NumPy arrays (hands, bank, dev
+cards, building and road owners, robber, turn and phase...).
+
+Every .step() advances all unfinished games by one decision. Dice, payouts,
+and counting every game's legal moves are vectorized across the batch; each
+game then picks uniformly among its legal moves, like a RandomPlayer would
+pick among state.playable_actions. Rare, branchy events (longest road,
+robber steals, discards) loop over just the games they happen in.
+
+Meant for playout-heavy bots that only need win rates (see
+players.playouts.run_batched_playouts), not for replays: no action log is
+kept and games aren't turned back into State objects. Requires numpy.
+
+Differences with Game.play(decide_fn=random):
+    - Domestic trades resolve at once: every other player that can accepts
+      with probability 1/2 and the offerer picks uniformly among cancelling
+      and confirming with each acceptee (as random players would).
+    - Discards happen as soon as a 7 is rolled, and a Road Building card
+      places its (up to 2) free roads at random right away.
+    - Dev cards follow apply_action's rule (playable only if owned at the
+      start of the turn), and BUY_DEVELOPMENT_CARD isn't offered on an empty
+      deck. dev_card_possibilities once had the check inverted (offering
+      only cards bought this turn), so win rates differ from Game.play runs
+      made before that was fixed.
+    - Longest road goes to nobody (instead of the longest one) when a cut
+      leaves every road shorter than 5.
+"""
+
+import numpy as np
+
+from catanatron.game import TURNS_LIMIT
+from catanatron.models.decks import (
+    CITY_COST_FREQDECK,
+    DEVELOPMENT_CARD_COST_FREQDECK,
+    RESOURCE_FREQDECK_INDEXES,
+    ROAD_COST_FREQDECK,
+    SETTLEMENT_COST_FREQDECK,
+)
+from catanatron.models.enums import (
+    DEVELOPMENT_CARDS,
+    KNIGHT,
+    RESOURCES,
+    SETTLEMENT,
+    VICTORY_POINT,
+    ActionPrompt,
+)
+from catanatron.models.longest_road import longest_road_length
+from catanatron.models.map import NUM_EDGES, NUM_NODES
+from catanatron.models.topology import EDGE_ID, EDGE_NODE_MASK, EDGES, iter_bits
+from catanatron.player_state import (
+    ACTUAL_VICTORY_POINTS,
+    CITIES_AVAILABLE,
+    DEV_CARD_IN_HAND,
+    DEV_CARD_OWNED_AT_START,
+    HAND_END,
+    HAS_ARMY,
+    HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN,
+    HAS_ROLLED,
+    LONGEST_ROAD_LENGTH,
+    NUM_PLAYER_FIELDS,
+    PLAYED_DEV_CARD,
+    ROADS_AVAILABLE,
+    SETTLEMENTS_AVAILABLE,
+    WOOD_IN_HAND,
+)
+
+# Phases (what the current player has to do next)
+INITIAL_SETTLEMENT, INITIAL_ROAD, ROLL, PLAY = range(4)
+
+NUM_RESOURCES = len(RESOURCES)
+KNIGHT_INDEX, YEAR_OF_PLENTY_INDEX, MONOPOLY_INDEX, ROAD_BUILDING_INDEX = range(4)
+VICTORY_POINT_INDEX = DEVELOPMENT_CARDS.index(VICTORY_POINT)
+PLAYABLE_DEV_CARDS = [card for card in DEVELOPMENT_CARDS if card != VICTORY_POINT]
+
+# PLAY phase move categories (columns of the counts matrix in _play)
+(
+    BUILD_CITY,
+    BUILD_SETTLEMENT,
+    BUILD_ROAD,
+    BUY_DEVELOPMENT_CARD,
+    PLAY_KNIGHT,
+    PLAY_YEAR_OF_PLENTY,
+    PLAY_MONOPOLY,
+    PLAY_ROAD_BUILDING,
+    MARITIME_TRADE,
+    OFFER_TRADE,
+    END_TURN,
+) = range(11)
+
+CITY_COST = np.array(CITY_COST_FREQDECK)
+SETTLEMENT_COST = np.array(SETTLEMENT_COST_FREQDECK)
+ROAD_COST = np.array(ROAD_COST_FREQDECK)
+DEVELOPMENT_CARD_COST = np.array(DEVELOPMENT_CARD_COST_FREQDECK)
+
+# EDGE_NODE[edge_id, node_id] => whether node_id is an end of edge_id
+EDGE_NODE = np.zeros((NUM_EDGES, NUM_NODES), dtype=np.float32)
+for _edge_id, (_a, _b) in enumerate(EDGES):
+    EDGE_NODE[_edge_id, _a] = EDGE_NODE[_edge_id, _b] = 1
+NODE_EDGE = np.ascontiguousarray(EDGE_NODE.T)
+NODE_NEIGHBOR = NODE_EDGE @ EDGE_NODE - np.diag(NODE_EDGE.sum(1))
+
+# Year of Plenty options: every pair (i <= j), then every single card.
+YEAR_OF_PLENTY_PAIRS = [
+    (i, j) for i in range(NUM_RESOURCES) for j in range(i, NUM_RESOURCES)
+]
+YEAR_OF_PLENTY_GAINS = np.zeros(
+    (len(YEAR_OF_PLENTY_PAIRS) + NUM_RESOURCES, NUM_RESOURCES), dtype=np.int16
+)
+# PAIR_HAS[pair, resource] => whether resource is one of pair's cards
+PAIR_HAS = np.zeros((len(YEAR_OF_PLENTY_PAIRS), NUM_RESOURCES), dtype=bool)
+for _index, (_i, _j) in enumerate(YEAR_OF_PLENTY_PAIRS):
+    YEAR_OF_PLENTY_GAINS[_index, _i] += 1
+    YEAR_OF_PLENTY_GAINS[_index, _j] += 1
+    PAIR_HAS[_index, [_i, _j]] = True
+for _i in range(NUM_RESOURCES):
+    YEAR_OF_PLENTY_GAINS[len(YEAR_OF_PLENTY_PAIRS) + _i, _i] = 1
+PAIR_FIRST = np.array([i for i, _ in YEAR_OF_PLENTY_PAIRS])
+PAIR_SECOND = np.array([j for _, j in YEAR_OF_PLENTY_PAIRS])
+
+# Trades as (give, ask) pairs, flattened as give * NUM_RESOURCES + ask
+NOT_SAME_RESOURCE = ~np.eye(NUM_RESOURCES, dtype=bool)
+
+
+def _bits_to_int(bits):
+    """Python int with bit i set if bits[i] (a bool array)"""
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _kth_true(mask, k):
+    """Index of the k-th (0-based) True of each row of mask"""
+    return (np.cumsum(mask, axis=1) <= k[:, None]).sum(1)
+
+
+class BatchedGames:
+    """num_games copies of game, played to the end by random players in
+    lockstep. See module docstring.
+
+    Args:
+        game (Game): Game to continue. Not modified.
+        num_games (int): Number of copies to play.
+        seed (int, optional): Seed of the batch's random generator.
+
+    Attributes:
+        colors (Tuple[Color, ...]): Seat colors (index into the arrays).
+        winners (np.ndarray): (num_games,) winning seat, -1 if none (yet).
+        victory_points (np.ndarray): (num_games, num_players) actual VPs.
+        num_turns (np.ndarray): (num_games,) turns played (as State.num_turns).
+    """
+
+    def __init__(self, game, num_games, seed=None):
+        state = game.state
+        board = state.board
+        self.rng = np.random.default_rng(seed)
+        self.colors = tuple(state.colors)
+        self.vps_to_win = game.vps_to_win
+        self.discard_limit = state.discard_limit
+        self.domestic_trade = state.rules.domestic_trade
+        self._init_map(board.map)
+
+        n, num_players = num_games, len(self.colors)
+        self.num_players = num_players
+        buffer = np.array(state.player_buffer, dtype=np.int16).reshape(
+            num_players, NUM_PLAYER_FIELDS
+        )
+
+        def per_game(values, dtype=np.int16):
+            values = np.asarray(values, dtype=dtype)
+            return np.repeat(values[None], n, axis=0)
+
+        self.hand = per_game(buffer[:, WOOD_IN_HAND:HAND_END])
+        self.bank = per_game(state.resource_freqdeck)
+        self.dev_hand = per_game(
+            [
+                [row[DEV_CARD_IN_HAND[card]] for card in DEVELOPMENT_CARDS]
+                for row in buffer
+            ]
+        )
+        self.owned_at_start = per_game(
+            [
+                [row[DEV_CARD_OWNED_AT_START[card]] for card in PLAYABLE_DEV_CARDS]
+                for row in buffer
+            ],
+            bool,
+        )
+        self.knights = per_game(buffer[:, PLAYED_DEV_CARD[KNIGHT]])
+        self.victory_points = per_game(buffer[:, ACTUAL_VICTORY_POINTS])
+        self.road_lengths = per_game(buffer[:, LONGEST_ROAD_LENGTH])
+        self.roads_available = per_game(buffer[:, ROADS_AVAILABLE])
+        self.settlements_available = per_game(buffer[:, SETTLEMENTS_AVAILABLE])
+        self.cities_available = per_game(buffer[:, CITIES_AVAILABLE])
+
+        deck = [DEVELOPMENT_CARDS.index(card) for card in state.development_listdeck]
+        self.deck = per_game(deck, np.int8).reshape(n, len(deck))
+        self.deck_size = np.full(n, len(deck))
+
+        seat = {color: i for i, color in enumerate(self.colors)}
+        owner = np.full(NUM_NODES, -1, dtype=np.int8)
+        level = np.zeros(NUM_NODES, dtype=np.int8)
+        for node_id, (color, building_type) in board.buildings.items():
+            owner[node_id] = seat[color]
+            level[node_id] = 1 if building_type == SETTLEMENT else 2
+        road_owner = np.full(NUM_EDGES, -1, dtype=np.int8)
+        for edge, color in board.roads.items():
+            road_owner[EDGE_ID[edge]] = seat[color]
+        self.owner = per_game(owner, np.int8)
+        self.level = per_game(level, np.int8)
+        self.road_owner = per_game(road_owner, np.int8)
+        self.robber = np.full(n, self.tile_coordinates.index(board.robber_coordinate))
+
+        road_holder = -1 if board.road_color is None else seat[board.road_color]
+        army_holder = -1
+        for i in range(num_players):
+            if buffer[i, HAS_ARMY]:
+                army_holder = i
+        self.road_holder = np.full(n, road_holder)
+        self.army_holder = np.full(n, army_holder)
+
+        if state.is_initial_build_phase:
+            current = state.current_player_index
+        else:
+            current = state.current_turn_index
+        self.current = np.full(n, current)
+        self.num_turns = np.full(n, state.num_turns)
+        self.played_dev_card = np.full(
+            n, bool(buffer[current, HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN])
+        )
+        last_settlement = -1
+        settlements = state.buildings_by_color[self.colors[current]][SETTLEMENT]
+        if settlements:
+            last_settlement = settlements[-1]
+        self.last_settlement = np.full(n, last_settlement)
+
+        self.winners = np.full(n, -1)
+        self.done = np.zeros(n, dtype=bool)
+
+        prompt = state.current_prompt
+        everyone = np.arange(n)
+        if prompt == ActionPrompt.BUILD_INITIAL_SETTLEMENT:
+            self.phase = np.full(n, INITIAL_SETTLEMENT)
+        elif prompt == ActionPrompt.BUILD_INITIAL_ROAD:
+            self.phase = np.full(n, INITIAL_ROAD)
+        elif prompt == ActionPrompt.PLAY_TURN and not buffer[current, HAS_ROLLED]:
+            self.phase = np.full(n, ROLL)
+        else:  # mid-turn. Trades being decided are cancelled.
+            self.phase = np.full(n, PLAY)
+            if prompt == ActionPrompt.DISCARD:
+                self._discard(everyone)
+            if prompt in (ActionPrompt.DISCARD, ActionPrompt.MOVE_ROBBER):
+                self._move_robber(everyone)
+            if state.is_road_building:
+                for _ in range(state.free_roads_available):
+                    self._build_free_road(everyone)
+        self._check_winners(everyone)
+
+    def _init_map(self, catan_map):
+        tiles = list(catan_map.land_tiles.values())
+        self.tile_coordinates = list(catan_map.land_tiles.keys())
+        self.tile_nodes = np.array([list(tile.nodes.values()) for tile in tiles])
+        # Tile => resource index, or -1 for the desert.
+        self.tile_resource = np.array(
+            [RESOURCE_FREQDECK_INDEXES.get(tile.resource, -1) for tile in tiles]
+        )
+        self.land_nodes = np.zeros(NUM_NODES, dtype=bool)
+        self.land_nodes[list(catan_map.land_nodes)] = True
+        self.land_edges = self.land_nodes[[a for a, _ in EDGES]] & self.land_nodes[
+            [b for _, b in EDGES]
+        ]
+
+        # Dice number => (tile, node, resource) entries it pays for (padded
+        # with invalid entries to the same length).
+        entries = {number: [] for number in range(2, 13)}
+        for t, tile in enumerate(tiles):
+            if tile.number is not None:
+                for node_id in tile.nodes.values():
+                    entries[tile.number].append((t, node_id, self.tile_resource[t]))
+        width = max(len(e) for e in entries.values())
+        self.payout_tiles = np.full((13, width), -1)
+        self.payout_nodes = np.zeros((13, width), dtype=np.intp)
+        self.payout_resources = np.zeros((13, width), dtype=np.intp)
+        for number, number_entries in entries.items():
+            for i, (t, node_id, resource) in enumerate(number_entries):
+                self.payout_tiles[number, i] = t
+                self.payout_nodes[number, i] = node_id
+                self.payout_resources[number, i] = resource
+
+        # Node => resources yielded by its adjacent tiles (2nd settlement)
+        self.node_yields = np.zeros((NUM_NODES, NUM_RESOURCES), dtype=np.int16)
+        for node_id, adjacent in catan_map.adjacent_tiles.items():
+            for tile in adjacent:
+                if tile.resource is not None:
+                    self.node_yields[
+                        node_id, RESOURCE_FREQDECK_INDEXES[tile.resource]
+                    ] += 1
+
+        # PORTS[i, node_id]: RESOURCES[i] 2:1 ports, then the 3:1 ports
+        self.ports = np.zeros((NUM_RESOURCES + 1, NUM_NODES), dtype=np.float32)
+        for resource, node_ids in catan_map.port_nodes.items():
+            row = (
+                NUM_RESOURCES
+                if resource is None
+                else RESOURCE_FREQDECK_INDEXES[resource]
+            )
+            self.ports[row, list(node_ids)] = 1
+
+    # ===== Driving
+    def run(self, max_turns=TURNS_LIMIT):
+        """Steps until every game is over (won or at max_turns).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: winners (seat index, -1 if the
+            game hit max_turns) and victory_points (actual VPs per seat).
+        """
+        while self.step(max_turns):
+            pass
+        return self.winners, self.victory_points
+
+    def step(self, max_turns=TURNS_LIMIT):
+        """Advances every unfinished game by one decision. Returns how many
+        games are still going."""
+        self.done |= self.num_turns >= max_turns
+        phase = np.where(self.done, -1, self.phase)
+        groups = [(fn, np.flatnonzero(phase == p)) for p, fn in self._phases()]
+        for fn, games in groups:
+            if len(games):
+                fn(games)
+        playing = np.flatnonzero(~self.done)
+        self._check_winners(playing)
+        return len(playing) - int(self.done[playing].sum())
+
+    def _phases(self):
+        return (
+            (INITIAL_SETTLEMENT, self._initial_settlement),
+            (INITIAL_ROAD, self._initial_road),
+            (ROLL, self._roll),
+            (PLAY, self._play),
+        )
+
+    def _check_winners(self, games):
+        won = self.victory_points[games] >= self.vps_to_win
+        games = games[won.any(1)]
+        self.winners[games] = np.argmax(self.victory_points[games], axis=1)
+        self.done[games] = True
+
+    def _choose(self, counts):
+        """Picks uniformly among the sum(counts) options of each row. Returns
+        the column each pick falls in, and its index within that column."""
+        cumulative = counts.cumsum(1)
+        k = (self.rng.random(len(counts)) * cumulative[:, -1]).astype(np.intp)
+        column = (cumulative <= k[:, None]).sum(1)
+        rows = np.arange(len(counts))
+        return column, k - cumulative[rows, column] + counts[rows, column]
+
+    def _choose_true(self, mask):
+        """Uniformly random True index of each row of mask (all must have one)"""
+        k = (self.rng.random(len(mask)) * mask.sum(1)).astype(np.intp)
+        return _kth_true(mask, k)
+
+    # ===== Initial build phase
+    def _initial_settlement(self, games):
+        player = self.current[games]
+        buildable = self._distance_rule_nodes(games)
+        node_ids = self._choose_true(buildable)
+        self._place_settlement(games, player, node_ids)
+
+        second = self.settlements_available[games, player] == 3
+        yielding, nodes = games[second], node_ids[second]
+        yields = np.minimum(self.node_yields[nodes], self.bank[yielding])
+        self.hand[yielding, player[second]] += yields
+        self.bank[yielding] -= yields
+
+        self.last_settlement[games] = node_ids
+        self.phase[games] = INITIAL_ROAD
+
+    def _initial_road(self, games):
+        player = self.current[games]
+        candidates = (
+            (NODE_EDGE[self.last_settlement[games]] > 0)
+            & (self.road_owner[games] < 0)
+            & self.land_edges
+        )
+        edge_ids = self._choose_true(candidates)
+        self.road_owner[games, edge_ids] = player
+        self.roads_available[games, player] -= 1
+
+        num_buildings = (self.owner[games] >= 0).sum(1)
+        num_players = self.num_players
+        direction = np.select(
+            [num_buildings < num_players, num_buildings == num_players],
+            [1, 0],
+            np.where(num_buildings == 2 * num_players, 0, -1),
+        )
+        self.current[games] = (player + direction) % num_players
+        self.num_turns[games] += direction != 0
+        self.phase[games] = np.where(
+            num_buildings == 2 * num_players, ROLL, INITIAL_SETTLEMENT
+        )
+
+    # ===== Turn
+    def _roll(self, games):
+        self.phase[games] = PLAY
+        number = self.rng.integers(1, 7, len(games)) + self.rng.integers(
+            1, 7, len(games)
+        )
+        sevens = games[number == 7]
+        self._discard(sevens)
+        self._move_robber(sevens)
+
+        producing = number != 7
+        games, number = games[producing], number[producing]
+        tiles = self.payout_tiles[number]
+        nodes = self.payout_nodes[number]
+        rows = games[:, None]
+        amounts = self.level[rows, nodes] * (
+            (tiles >= 0) & (tiles != self.robber[rows])
+        )
+        owners = self.owner[rows, nodes]
+        paid = amounts > 0
+        slot = np.arange(len(games))[:, None] * self.num_players + owners
+        keys = slot[paid] * NUM_RESOURCES + self.payout_resources[number][paid]
+        payout = np.bincount(
+            keys,
+            weights=amounts[paid],
+            minlength=len(games) * self.num_players * NUM_RESOURCES,
+        ).reshape(len(games), self.num_players, NUM_RESOURCES)
+        total = payout.sum(1)
+        # Resources the bank can't fully pay out aren't paid to anyone.
+        enough = total <= self.bank[games]
+        self.hand[games] += (payout * enough[:, None, :]).astype(np.int16)
+        self.bank[games] -= (total * enough).astype(np.int16)
+
+    def _discard(self, games):
+        for g in games:
+            for player in range(self.num_players):
+                hand = self.hand[g, player]
+                num_cards = int(hand.sum())
+                if num_cards > self.discard_limit:
+                    discarded = self.rng.multivariate_hypergeometric(
+                        hand.astype(np.int64), num_cards // 2
+                    )
+                    self.hand[g, player] -= discarded.astype(np.int16)
+                    self.bank[g] += discarded.astype(np.int16)
+
+    def _move_robber(self, games):
+        """Moves the robber (and steals) as a random MOVE_ROBBER action"""
+        if not len(games):
+            return
+        player = self.current[games]
+        tile_owners = self.owner[games][:, self.tile_nodes]  # (n, tiles, 6)
+        has_cards = self.hand[games].sum(2) > 0
+        victims = np.stack(
+            [
+                (tile_owners == q).any(2)
+                & ((q != player) & has_cards[:, q])[:, None]
+                for q in range(self.num_players)
+            ],
+            axis=2,
+        )  # (n, tiles, players)
+        counts = np.maximum(victims.sum(2), 1)
+        counts[np.arange(len(games)), self.robber[games]] = 0
+        tiles, within = self._choose(counts)
+        self.robber[games] = tiles
+
+        tile_victims = victims[np.arange(len(games)), tiles]
+        stealing = tile_victims.any(1)
+        games, player = games[stealing], player[stealing]
+        victim = _kth_true(tile_victims[stealing], within[stealing])
+        resource = self._choose(self.hand[games, victim])[0]
+        self.hand[games, victim, resource] -= 1
+        self.hand[games, player, resource] += 1
+
+    def _play(self, games):
+        player = self.current[games]
+        hand = self.hand[games, player]
+        bank = self.bank[games]
+        mine, reachable = self._reachable_nodes(games, player)
+        counts = np.zeros((len(games), END_TURN + 1), dtype=np.intp)
+
+        can_city = (hand >= CITY_COST).all(1) & (
+            self.cities_available[games, player] > 0
+        )
+        counts[:, BUILD_CITY] = can_city * (mine & (self.level[games] == 1)).sum(1)
+
+        can_settle = (hand >= SETTLEMENT_COST).all(1) & (
+            self.settlements_available[games, player] > 0
+        )
+        settlement_nodes = (
+            reachable & self._distance_rule_nodes(games) & can_settle[:, None]
+        )
+        counts[:, BUILD_SETTLEMENT] = settlement_nodes.sum(1)
+
+        can_road = (hand >= ROAD_COST).all(1)
+        road_edges = self._buildable_edges(games, player, reachable) & can_road[:, None]
+        counts[:, BUILD_ROAD] = road_edges.sum(1)
+
+        counts[:, BUY_DEVELOPMENT_CARD] = (hand >= DEVELOPMENT_CARD_COST).all(1) & (
+            self.deck_size[games] > 0
+        )
+
+        playable = (
+            self.owned_at_start[games, player]
+            & (self.dev_hand[games, player, :VICTORY_POINT_INDEX] > 0)
+            & ~self.played_dev_card[games, None]
+        )
+        year_of_plenty = (
+            self._year_of_plenty_options(bank)
+            & playable[:, [YEAR_OF_PLENTY_INDEX]]
+        )
+        counts[:, PLAY_KNIGHT] = playable[:, KNIGHT_INDEX]
+        counts[:, PLAY_YEAR_OF_PLENTY] = year_of_plenty.sum(1)
+        counts[:, PLAY_MONOPOLY] = playable[:, MONOPOLY_INDEX] * NUM_RESOURCES
+        counts[:, PLAY_ROAD_BUILDING] = playable[:, ROAD_BUILDING_INDEX]
+
+        rates = self._maritime_rates(mine)
+        maritime = (
+            (hand >= rates)[:, :, None] & (bank > 0)[:, None, :] & NOT_SAME_RESOURCE
+        ).reshape(len(games), -1)
+        counts[:, MARITIME_TRADE] = maritime.sum(1)
+
+        offers = np.stack([hand >= 1, hand >= 2], axis=1)  # (n, count, give)
+        offers = (offers[:, :, :, None] & NOT_SAME_RESOURCE).reshape(len(games), -1)
+        counts[:, OFFER_TRADE] = offers.sum(1) * self.domestic_trade
+        counts[:, END_TURN] = 1
+
+        category, within = self._choose(counts)
+        for column, fn, options in (
+            (BUILD_CITY, self._play_city, mine & (self.level[games] == 1)),
+            (BUILD_SETTLEMENT, self._play_settlement, settlement_nodes),
+            (BUILD_ROAD, self._play_road, road_edges),
+            (BUY_DEVELOPMENT_CARD, self._play_buy_development_card, None),
+            (PLAY_KNIGHT, self._play_knight, None),
+            (PLAY_YEAR_OF_PLENTY, self._play_year_of_plenty, year_of_plenty),
+            (PLAY_MONOPOLY, self._play_monopoly, None),
+            (PLAY_ROAD_BUILDING, self._play_road_building, None),
+            (MARITIME_TRADE, self._play_maritime_trade, maritime),
+            (OFFER_TRADE, self._play_offer_trade, offers),
+            (END_TURN, self._end_turn, None),
+        ):
+            chosen = category == column
+            if not chosen.any():
+                continue
+            if options is None:
+                fn(games[chosen], player[chosen], within[chosen])
+            else:
+                option = _kth_true(options[chosen], within[chosen])
+                fn(games[chosen], player[chosen], option, rates[chosen])
+
+    # ===== Move generation helpers
+    def _distance_rule_nodes(self, games):
+        occupied = self.owner[games] >= 0
+        near = (occupied.astype(np.float32) @ NODE_NEIGHBOR) > 0
+        return self.land_nodes & ~occupied & ~near
+
+    def _reachable_nodes(self, games, player):
+        """Player's building nodes, and nodes its road network can build on"""
+        owner = self.owner[games]
+        mine = owner == player[:, None]
+        roads = (self.road_owner[games] == player[:, None]).astype(np.float32)
+        road_nodes = (roads @ EDGE_NODE) > 0
+        return mine, mine | (road_nodes & (owner < 0))
+
+    def _buildable_edges(self, games, player, reachable):
+        touching = (reachable.astype(np.float32) @ NODE_EDGE) > 0
+        has_roads = self.roads_available[games, player] > 0
+        return (
+            touching
+            & (self.road_owner[games] < 0)
+            & self.land_edges
+            & has_roads[:, None]
+        )
+
+    def _maritime_rates(self, mine):
+        ports = (mine.astype(np.float32) @ self.ports.T) > 0
+        rates = np.where(ports[:, [NUM_RESOURCES]], 3, 4)
+        return np.where(ports[:, :NUM_RESOURCES], 2, rates)
+
+    @staticmethod
+    def _year_of_plenty_options(bank):
+        """Mask over YEAR_OF_PLENTY_GAINS rows, as year_of_plenty_possibilities"""
+        first, second = bank[:, PAIR_FIRST], bank[:, PAIR_SECOND]
+        pairs = np.where(
+            PAIR_FIRST == PAIR_SECOND, first >= 2, (first > 0) & (second > 0)
+        )
+        in_short_pair = ((~pairs)[:, :, None] & PAIR_HAS).any(1)
+        return np.concatenate([pairs, in_short_pair & (bank > 0)], axis=1)
+
+    # ===== PLAY phase moves. Each takes (games, player, option[, rates]).
+    def _pay(self, games, player, cost):
+        self.hand[games, player] -= cost
+        self.bank[games] += cost
+
+    def _play_city(self, games, player, node_ids, _):
+        self._pay(games, player, CITY_COST)
+        self.level[games, node_ids] = 2
+        self.cities_available[games, player] -= 1
+        self.settlements_available[games, player] += 1
+        self.victory_points[games, player] += 1
+
+    def _play_settlement(self, games, player, node_ids, _):
+        self._pay(games, player, SETTLEMENT_COST)
+        self._place_settlement(games, player, node_ids)
+        self._maintain_cut_roads(games, player, node_ids)
+
+    def _play_road(self, games, player, edge_ids, _):
+        self._pay(games, player, ROAD_COST)
+        self._place_road(games, player, edge_ids)
+
+    def _play_buy_development_card(self, games, player, _):
+        self._pay(games, player, DEVELOPMENT_CARD_COST)
+        self.deck_size[games] -= 1
+        card = self.deck[games, self.deck_size[games]]
+        self.dev_hand[games, player, card] += 1
+        self.victory_points[games, player] += card == VICTORY_POINT_INDEX
+
+    def _play_dev_card(self, games, player, card_index):
+        self.dev_hand[games, player, card_index] -= 1
+        self.played_dev_card[games] = True
+
+    def _play_knight(self, games, player, _):
+        self._play_dev_card(games, player, KNIGHT_INDEX)
+        self.knights[games, player] += 1
+        self._maintain_largest_army(games, player)
+        self._move_robber(games)
+
+    def _play_year_of_plenty(self, games, player, options, _):
+        self._play_dev_card(games, player, YEAR_OF_PLENTY_INDEX)
+        gains = YEAR_OF_PLENTY_GAINS[options]
+        self.hand[games, player] += gains
+        self.bank[games] -= gains
+
+    def _play_monopoly(self, games, player, resource):
+        self._play_dev_card(games, player, MONOPOLY_INDEX)
+        total = self.hand[games, :, resource].sum(1)
+        self.hand[games, :, resource] = 0
+        self.hand[games, player, resource] = total
+
+    def _play_road_building(self, games, player, _):
+        self._play_dev_card(games, player, ROAD_BUILDING_INDEX)
+        for _ in range(2):
+            self._build_free_road(games)
+
+    def _play_maritime_trade(self, games, player, options, rates):
+        give, ask = np.divmod(options, NUM_RESOURCES)
+        rate = rates[np.arange(len(games)), give]
+        self.hand[games, player, give] -= rate
+        self.bank[games, give] += rate
+        self.hand[games, player, ask] += 1
+        self.bank[games, ask] -= 1
+
+    def _play_offer_trade(self, games, player, options, _):
+        count, give_ask = np.divmod(options, NUM_RESOURCES * NUM_RESOURCES)
+        give, ask = np.divmod(give_ask, NUM_RESOURCES)
+        count += 1
+        # Others that can accept do so half of the time; then the offerer
+        # cancels or confirms with one of them (uniformly).
+        can_accept = self.hand[games, :, ask] >= 1
+        accepts = (
+            can_accept
+            & (self.rng.random(can_accept.shape) < 0.5)
+            & (np.arange(self.num_players) != player[:, None])
+        )
+        counts = np.stack([np.ones(len(games), dtype=np.intp), accepts.sum(1)], 1)
+        confirmed, within = self._choose(counts)
+        trading = confirmed == 1
+        games, player = games[trading], player[trading]
+        count, give, ask = count[trading], give[trading], ask[trading]
+        other = _kth_true(accepts[trading], within[trading])
+        self.hand[games, player, give] -= count
+        self.hand[games, other, give] += count
+        self.hand[games, other, ask] -= 1
+        self.hand[games, player, ask] += 1
+
+    def _end_turn(self, games, player, _):
+        self.owned_at_start[games, player] = (
+            self.dev_hand[games, player, :VICTORY_POINT_INDEX] > 0
+        )
+        self.played_dev_card[games] = False
+        self.current[games] = (player + 1) % self.num_players
+        self.num_turns[games] += 1
+        self.phase[games] = ROLL
+
+    # ===== Board mutations
+    def _place_settlement(self, games, player, node_ids):
+        self.owner[games, node_ids] = player
+        self.level[games, node_ids] = 1
+        self.settlements_available[games, player] -= 1
+        self.victory_points[games, player] += 1
+
+    def _place_road(self, games, player, edge_ids):
+        self.road_owner[games, edge_ids] = player
+        self.roads_available[games, player] -= 1
+        # Only the holder's length is kept up to date: others just need to
+        # know whether they beat it, which takes more roads than it has.
+        holder = self.road_holder[games]
+        to_beat = np.where(
+            holder == -1, 4, self.road_lengths[games, np.maximum(holder, 0)]
+        )
+        num_roads = 15 - self.roads_available[games, player]
+        searching = (holder == player) | (num_roads > to_beat)
+        for g, p in zip(games[searching], player[searching]):
+            length = self._longest_road(g, p)
+            self.road_lengths[g, p] = length
+            holder = self.road_holder[g]
+            if holder == p or length < 5:
+                continue
+            if holder == -1 or length > self.road_lengths[g, holder]:
+                self._set_road_holder(g, p)
+
+    def _build_free_road(self, games):
+        """Builds a random (free) road for each game's current player, if
+        they have somewhere to build it"""
+        player = self.current[games]
+        _, reachable = self._reachable_nodes(games, player)
+        edges = self._buildable_edges(games, player, reachable)
+        building = edges.any(1)
+        games, player = games[building], player[building]
+        self._place_road(games, player, self._choose_true(edges[building]))
+
+    def _maintain_cut_roads(self, games, player, node_ids):
+        """Recomputes the longest road of players whose road a new
+        settlement went through (it had 2 of their roads)"""
+        incident = NODE_EDGE[node_ids] > 0  # (n, edges)
+        road_owner = self.road_owner[games]
+        for q in range(self.num_players):
+            cut = ((road_owner == q) & incident).sum(1) == 2
+            cut &= player != q
+            for g in games[cut]:
+                self.road_lengths[g, q] = self._longest_road(g, q)
+                if self.road_holder[g] == q:
+                    for other in range(self.num_players):
+                        if other != q:
+                            self.road_lengths[g, other] = self._longest_road(g, other)
+                    lengths = self.road_lengths[g]
+                    best = int(np.argmax(lengths))
+                    self._set_road_holder(g, best if lengths[best] >= 5 else -1)
+
+    def _set_road_holder(self, g, p):
+        holder = self.road_holder[g]
+        if holder == p:
+            return
+        if holder != -1:
+            self.victory_points[g, holder] -= 2
+        if p != -1:
+            self.victory_points[g, p] += 2
+        self.road_holder[g] = p
+
+    def _longest_road(self, g, p):
+        road_edges = _bits_to_int(self.road_owner[g] == p)
+        owner = self.owner[g]
+        enemy_nodes = _bits_to_int((owner >= 0) & (owner != p))
+        touched = 0
+        for edge_id in iter_bits(road_edges):
+            touched |= EDGE_NODE_MASK[edge_id]
+        return longest_road_length(
+            road_edges, enemy_nodes & touched, touched & ~enemy_nodes
+        )
+
+    def _maintain_largest_army(self, games, player):
+        knights = self.knights[games, player]
+        holder = self.army_holder[games]
+        holder_knights = self.knights[games, np.maximum(holder, 0)]
+        wins = (knights >= 3) & (
+            (holder == -1) | ((holder != player) & (knights > holder_knights))
+        )
+        games, player, holder = games[wins], player[wins], holder[wins]
+        self.victory_points[games, player] += 2
+        losing = holder != -1
+        self.victory_points[games[losing], holder[losing]] -= 2
+        self.army_holder[games] = player
@@ -16,6 +16,7 @@ from rich.text import Text
 from catanatron.game import Game
 from catanatron.models.player import Color
 from catanatron.models.map import build_map
+from catanatron.rules import SimulationRules
 from catanatron.state_functions import get_actual_victory_points
 
 # try to suppress TF output before any potentially tf-importing modules
@@ -116,6 +117,17 @@ class CustomTimeRemainingColumn(TimeRemainingColumn):
     type=click.Choice(["BASE", "MINI", "TOURNAMENT"], case_sensitive=False),
     help="Sets Map to use. MINI is a 7-tile smaller version. TOURNAMENT uses a fixed balanced map.",
 )
+@click.option(
+    "--config-map-pool",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Play on the maps of a pool file (see MapPool.generate) of --config-map's type, in order. Requires numpy.",
+)
+@click.option(
+    "--config-domestic-trade/--config-no-domestic-trade",
+    default=True,
+    help="Whether players can offer trades to each other. Turning it off speeds up simulations of bots that never trade.",
+)
 @click.option(
     "--quiet",
     default=False,
@@ -140,6 +152,8 @@ def simulate(
     config_discard_limit,
     config_vps_to_win,
     config_map,
+    config_map_pool,
+    config_domestic_trade,
     quiet,
     help_players,
 ):
@@ -179,8 +193,19 @@ def simulate(
                 players.append(player)
                 break
 
+    if config_map_pool is not None and config_map.upper() == "TOURNAMENT":
+        raise click.BadParameter(
+            "pools only have BASE or MINI maps", param_hint="--config-map"
+        )
+
     output_options = OutputOptions(output, output_format, include_board_tensor, db)
-    game_config = GameConfigOptions(config_discard_limit, config_vps_to_win, config_map)
+    game_config = GameConfigOptions(
+        config_discard_limit,
+        config_vps_to_win,
+        config_map,
+        config_domestic_trade,
+        config_map_pool,
+    )
     play_batch(
         num,
         players,
@@ -205,6 +230,8 @@ class GameConfigOptions:
     discard_limit: int = 7
     vps_to_win: int = 10
     catan_map: Literal["BASE", "TOURNAMENT", "MINI"] = "BASE"
+    domestic_trade: bool = True
+    map_pool: Union[str, None] = None  # path to a MapPool file of catan_map type
 
 
 COLOR_TO_RICH_STYLE = {
@@ -232,15 +259,23 @@ def play_batch_core(num_games, players, game_config, accumulators=[]):
         if isinstance(accumulator, SimulationAccumulator):
             accumulator.before_all()
 
-    for _ in range(num_games):
+    map_pool = None
+    if game_config.map_pool is not None:
+        from catanatron.models.map_pool import MapPool  # requires numpy
+
+        map_pool = MapPool(game_config.map_pool, game_config.catan_map)
+
+    for i in range(num_games):
         for player in players:
             player.reset_state()
-        catan_map = build_map(game_config.catan_map)
+        map_index = i % len(map_pool) if map_pool is not None else None
+        catan_map = build_map(game_config.catan_map, map_pool, map_index)
         game = Game(
             players,
             discard_limit=game_config.discard_limit,
             vps_to_win=game_config.vps_to_win,
             catan_map=catan_map,
+            rules=SimulationRules(domestic_trade=game_config.domestic_trade),
         )
         game.play(accumulators)
         yield game
@@ -1,7 +1,6 @@
 from typing import Any, List, Literal, Tuple
 import functools
 from collections import Counter
-import networkx as nx
 
 from catanatron.models.decks import freqdeck_count
 from catanatron.state_functions import (
@@ -10,8 +9,9 @@ from catanatron.state_functions import (
     player_num_dev_cards,
     player_num_resource_cards,
 )
-from catanatron.models.board import STATIC_GRAPH, get_edges, get_node_distances
+from catanatron.models.board import get_edges, get_node_distances
 from catanatron.models.map import NUM_TILES, CatanMap, build_map, number_probability
+from catanatron.models.topology import EDGE_NODES, NEIGHBORS, NODE_EDGES
 from catanatron.models.player import Player, Color, SimplePlayer
 from catanatron.models.enums import (
     DEVELOPMENT_CARDS,
@@ -266,7 +266,7 @@ REACHABLE_FEATURES_MAX = 2  # inclusive
 
 def get_zero_nodes(game, color):
     zero_nodes = set()
-    for component in game.state.board.connected_components[color]:
+    for component in game.state.board.find_connected_components(color):
         for node_id in component:
             zero_nodes.add(node_id)
     return zero_nodes
@@ -301,7 +301,7 @@ def iter_level_nodes(enemy_nodes, enemy_roads, num_roads, zero_nodes):
 
             # here we can assume node is empty or owned
             expandable = []
-            for neighbor_id in STATIC_GRAPH.neighbors(node_id):
+            for neighbor_id in NEIGHBORS[node_id]:
                 edge = (node_id, neighbor_id)
                 can_follow_edge = edge not in enemy_roads
                 if can_follow_edge:
@@ -378,67 +378,56 @@ def expansion_features(game: Game, p0_color: Color):
     MAX_EXPANSION_DISTANCE = 3  # exclusive
 
     features = {}
+    board = game.state.board
 
-    # For each connected component node, bfs_edges (skipping enemy edges and nodes nodes)
-    empty_edges = set(get_edges(game.state.board.map.land_nodes))
-    for i, color in iter_players(game.state.colors, p0_color):
-        empty_edges.difference_update(get_player_buildings(game.state, color, ROAD))
-    searchable_subgraph = STATIC_GRAPH.edge_subgraph(empty_edges)
-
-    board_buildable_node_ids = game.state.board.buildable_node_ids(
-        p0_color, True
-    )  # this should be the same for all players. TODO: Can maintain internally (instead of re-compute).
+    # For each connected component node, bfs (skipping enemy edges and nodes nodes)
+    empty_edges = board.land_edge_mask & ~board.occupied_edge_mask
+    # this should be the same for all players.
+    board_buildable_nodes = board.buildable_node_mask
 
     for i, color in iter_players(game.state.colors, p0_color):
         expandable_node_ids = get_player_expandable_nodes(game, color)
+        enemy_nodes = board.enemy_node_mask(color)
 
-        def skip_blocked_by_enemy(neighbor_ids):
-            for node_id in neighbor_ids:
-                node_color = game.state.board.get_node_color(node_id)
-                if node_color is None or node_color == color:
-                    yield node_id  # not owned by enemy, can explore
-
-        # owned_edges = get_player_buildings(state, color, ROAD)
         dis_res_prod = {
             distance: {k: 0.0 for k in RESOURCES}
             for distance in range(MAX_EXPANSION_DISTANCE)
         }
         for node_id in expandable_node_ids:
-            if node_id in board_buildable_node_ids:  # node itself is buildable
+            if (board_buildable_nodes >> node_id) & 1:  # node itself is buildable
                 for resource in RESOURCES:
-                    production = get_node_production(
-                        game.state.board.map, node_id, resource
-                    )
+                    production = get_node_production(board.map, node_id, resource)
                     dis_res_prod[0][resource] = max(
                         production, dis_res_prod[0][resource]
                     )
 
-            if node_id not in searchable_subgraph.nodes():
-                continue  # must be internal node, no need to explore
-
-            bfs_iteration = nx.bfs_edges(
-                searchable_subgraph,
-                node_id,
-                depth_limit=MAX_EXPANSION_DISTANCE - 1,
-                sort_neighbors=skip_blocked_by_enemy,
-            )
-
-            paths = {node_id: []}
-            for edge in bfs_iteration:
-                a, b = edge
-                path_until_now = paths[a]
-                distance = len(path_until_now) + 1
-                paths[b] = paths[a] + [b]
-
-                if b not in board_buildable_node_ids:
-                    continue
-
-                # means we can get to node b, at distance=d, starting from path[0]
-                for resource in RESOURCES:
-                    production = get_node_production(game.state.board.map, b, resource)
-                    dis_res_prod[distance][resource] = max(
-                        production, dis_res_prod[distance][resource]
-                    )
+            # BFS over empty edges, not going through enemy nodes.
+            visited = {node_id}
+            frontier = [node_id]
+            for distance in range(1, MAX_EXPANSION_DISTANCE):
+                next_frontier = []
+                for a in frontier:
+                    for edge_id in NODE_EDGES[a]:
+                        b = EDGE_NODES[edge_id] ^ a
+                        if (
+                            not (empty_edges >> edge_id) & 1
+                            or (enemy_nodes >> b) & 1
+                            or b in visited
+                        ):
+                            continue
+                        visited.add(b)
+                        next_frontier.append(b)
+
+                        if not (board_buildable_nodes >> b) & 1:
+                            continue
+
+                        # means we can get to node b, at distance=d
+                        for resource in RESOURCES:
+                            production = get_node_production(board.map, b, resource)
+                            dis_res_prod[distance][resource] = max(
+                                production, dis_res_prod[distance][resource]
+                            )
+                frontier = next_frontier
 
         for distance, res_prod in dis_res_prod.items():
             for resource, prod in res_prod.items():
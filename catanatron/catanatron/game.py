@@ -9,9 +9,10 @@ from typing import Sequence, Union, Optional
 
 from catanatron.models.enums import Action, ActionPrompt, ActionType
 from catanatron.state import State, apply_action
-from catanatron.state_functions import player_key, player_has_rolled
+from catanatron.state_functions import get_actual_victory_points, player_has_rolled
 from catanatron.models.map import CatanMap
 from catanatron.models.player import Color, Player
+from catanatron.rules import SimulationRules
 
 # To timeout RandomRobots from getting stuck...
 TURNS_LIMIT = 1000
@@ -22,7 +23,8 @@ def is_valid_action(state, action):
     if its in playable_actions or if its a OFFER_TRADE in the right time."""
     if action.action_type == ActionType.OFFER_TRADE:
         return (
-            state.current_color() == action.color
+            state.rules.domestic_trade
+            and state.current_color() == action.color
             and state.current_prompt == ActionPrompt.PLAY_TURN
             and player_has_rolled(state, action.color)
             and is_valid_trade(action.value)
@@ -86,6 +88,8 @@ class Game:
     completion or just by one decision by a player respectively).
     """
 
+    __slots__ = ("seed", "id", "vps_to_win", "state")
+
     def __init__(
         self,
         players: Sequence[Player],
@@ -94,6 +98,7 @@ class Game:
         vps_to_win: int = 10,
         catan_map: Optional[CatanMap] = None,
         initialize: bool = True,
+        rules: Optional[SimulationRules] = None,
     ):
         """Creates a game (doesn't run it).
 
@@ -104,6 +109,8 @@ class Game:
             vps_to_win (int, optional): Victory Points needed to win. Defaults to 10.
             catan_map (CatanMap, optional): Map to use. Defaults to None.
             initialize (bool, optional): Whether to initialize. Defaults to True.
+            rules (SimulationRules, optional): Optional rules (e.g. no
+                domestic trade). Defaults to SimulationRules().
         """
         if initialize:
             self.seed = seed if seed is not None else random.randrange(sys.maxsize)
@@ -111,7 +118,9 @@ class Game:
 
             self.id = str(uuid.uuid4())
             self.vps_to_win = vps_to_win
-            self.state = State(players, catan_map, discard_limit=discard_limit)
+            self.state = State(
+                players, catan_map, discard_limit=discard_limit, rules=rules
+            )
 
     def play(self, accumulators=[], decide_fn=None):
         """Executes game until a player wins or exceeded TURNS_LIMIT.
@@ -175,11 +184,7 @@ class Game:
         """
         result = None
         for color in self.state.colors:
-            key = player_key(self.state, color)
-            if (
-                self.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
-                >= self.vps_to_win
-            ):
+            if get_actual_victory_points(self.state, color) >= self.vps_to_win:
                 result = color
 
         return result
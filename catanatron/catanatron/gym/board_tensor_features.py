@@ -1,4 +1,3 @@
-import networkx as nx
 import numpy as np
 
 from catanatron.state_functions import get_player_buildings
@@ -11,7 +10,7 @@ from catanatron.models.enums import (
     ROAD,
 )
 from catanatron.models.coordinate_system import offset_to_cube
-from catanatron.models.board import STATIC_GRAPH
+from catanatron.models.topology import static_graph
 from catanatron.models.map import number_probability
 from catanatron.features import get_feature_ordering, iter_players
 
@@ -76,7 +75,9 @@ def init_board_tensor_map():
         (73, 59),
         (72, 60),
     ]
-    paths = [nx.shortest_path(STATIC_GRAPH, a, b) for (a, b) in pairs]
+    import networkx as nx  # type: ignore
+
+    paths = [nx.shortest_path(static_graph(), a, b) for (a, b) in pairs]
 
     node_map = {}
     edge_map = {}
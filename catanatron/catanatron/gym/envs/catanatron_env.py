@@ -8,6 +8,7 @@ from catanatron.models.player import Color, Player, RandomPlayer
 from catanatron.models.map import BASE_MAP_TEMPLATE, NUM_NODES, LandTile, build_map
 from catanatron.models.enums import RESOURCES, Action, ActionType
 from catanatron.models.board import get_edges
+from catanatron.rules import SimulationRules
 from catanatron.features import (
     create_sample,
     get_feature_ordering,
@@ -63,6 +64,7 @@ ACTIONS_ARRAY = [
     (ActionType.END_TURN, None),
 ]
 ACTION_SPACE_SIZE = len(ACTIONS_ARRAY)
+ACTIONS_INDEX = {action: i for i, action in enumerate(ACTIONS_ARRAY)}
 ACTION_TYPES = [i for i in ActionType]
 
 
@@ -88,7 +90,7 @@ def normalize_action(action):
 def to_action_space(action):
     """maps action to space_action equivalent integer"""
     normalized = normalize_action(action)
-    return ACTIONS_ARRAY.index((normalized.action_type, normalized.value))
+    return ACTIONS_INDEX[(normalized.action_type, normalized.value)]
 
 
 def from_action_space(action_int, playable_actions):
@@ -135,10 +137,20 @@ class CatanatronEnv(gym.Env):
         self.config = config or dict()
         self.invalid_action_reward = self.config.get("invalid_action_reward", -1)
         self.reward_function = self.config.get("reward_function", simple_reward)
-        self.map_type = self.config.get("map_type", "BASE")
+        # A MapPool to draw maps from (by index, with reset's seed or
+        #   options["map_index"]) instead of generating a new one per reset.
+        self.map_pool = self.config.get("map_pool")
+        self.map_type = (
+            self.map_pool.map_type
+            if self.map_pool is not None
+            else self.config.get("map_type", "BASE")
+        )
         self.vps_to_win = self.config.get("vps_to_win", 10)
         self.enemies = self.config.get("enemies", [RandomPlayer(Color.RED)])
         self.representation = self.config.get("representation", "vector")
+        # The action space has no trades between players; so by default,
+        # enemies can't offer any either.
+        self.rules = self.config.get("rules", SimulationRules(domestic_trade=False))
 
         assert all(p.color != Color.BLUE for p in self.enemies)
         assert self.representation in ["mixed", "vector"]
@@ -226,7 +238,10 @@ class CatanatronEnv(gym.Env):
     ):
         super().reset(seed=seed)
 
-        catan_map = build_map(self.map_type)
+        map_index = (options or {}).get("map_index")
+        if self.map_pool is not None and map_index is None:
+            map_index = int(self.np_random.integers(len(self.map_pool)))
+        catan_map = build_map(self.map_type, self.map_pool, map_index)
         for player in self.players:
             player.reset_state()
         self.game = Game(
@@ -234,6 +249,7 @@ class CatanatronEnv(gym.Env):
             seed=seed,
             catan_map=catan_map,
             vps_to_win=self.vps_to_win,
+            rules=self.rules,
         )
         self.invalid_actions_count = 0
 
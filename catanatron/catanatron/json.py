@@ -113,7 +113,7 @@ class GameEncoder(json.JSONEncoder):
                 "nodes": nodes,
                 "edges": list(edges.values()),
                 "actions": [self.default(a) for a in obj.state.actions],
-                "player_state": obj.state.player_state,
+                "player_state": dict(obj.state.player_state),
                 "colors": obj.state.colors,
                 "bot_colors": list(
                     map(
@@ -0,0 +1,193 @@
+"""
+Compact integer codes for actions, and interned Action objects.
+
+An action's code packs its type, color and the index of its value in a
+per-type payload table:
+
+    code = payload_index << PAYLOAD_SHIFT | color_index << TYPE_BITS | type_index
+
+Payload tables start with every value that can be enumerated up front (edges,
+node ids, dice, robber moves, maritime trades, dev card plays...), so codes
+for those are stable across processes. Other values (e.g. trades being
+responded to) are appended to the table the first time they're seen, so
+their codes are only stable within a process.
+
+Every code maps to a single shared Action object (see decode and intern),
+so move generation doesn't allocate new tuples for every action, and
+comparing against playable actions usually short-circuits on identity.
+"""
+
+from typing import Dict, List, Tuple
+
+from catanatron.models.enums import (
+    DEVELOPMENT_CARDS,
+    RESOURCES,
+    Action,
+    ActionType,
+)
+from catanatron.models.map import BASE_MAP_TEMPLATE, NUM_NODES, LandTile
+from catanatron.models.player import Color
+from catanatron.models.topology import EDGES
+
+ACTION_TYPES: Tuple[ActionType, ...] = tuple(ActionType)
+TYPE_INDEX = {action_type: i for i, action_type in enumerate(ACTION_TYPES)}
+COLORS: Tuple[Color, ...] = tuple(Color)
+COLOR_INDEX = {color: i for i, color in enumerate(COLORS)}
+
+TYPE_BITS = (len(ACTION_TYPES) - 1).bit_length()
+COLOR_BITS = (len(COLORS) - 1).bit_length()
+PAYLOAD_SHIFT = TYPE_BITS + COLOR_BITS
+TYPE_MASK = (1 << TYPE_BITS) - 1
+COLOR_MASK = (1 << COLOR_BITS) - 1
+
+TILE_COORDINATES = [
+    coordinate
+    for coordinate, tile_type in BASE_MAP_TEMPLATE.topology.items()
+    if tile_type == LandTile
+]
+
+
+# Offers generated by move generation: `count` of one resource for 1 of another
+DOMESTIC_OFFER_COUNTS = (1, 2)
+
+
+def domestic_offer(give, ask, count):
+    """OFFER_TRADE value giving `count` of RESOURCES[give] for 1 RESOURCES[ask]"""
+    offer = [0] * 10
+    offer[give] = count
+    offer[5 + ask] = 1
+    return tuple(offer)
+
+
+def _static_payloads():
+    maritime_trades = [
+        tuple(rate * [i] + (4 - rate) * [None] + [j])
+        for rate in (4, 3, 2)
+        for i in RESOURCES
+        for j in RESOURCES
+        if i != j
+    ]
+    year_of_plenty = [
+        (first_card, RESOURCES[j])
+        for i, first_card in enumerate(RESOURCES)
+        for j in range(i, len(RESOURCES))
+    ] + [(card,) for card in RESOURCES]
+    return {
+        ActionType.ROLL: [None]
+        + [(a, b) for a in range(1, 7) for b in range(1, 7)],
+        ActionType.MOVE_ROBBER: [
+            (coordinate, victim, resource)
+            for coordinate in TILE_COORDINATES
+            for victim in (None, *COLORS)
+            for resource in (None, *RESOURCES)
+        ],
+        ActionType.DISCARD: [None],
+        # Index of canonical (n1 < n2) orientation is the edge id
+        ActionType.BUILD_ROAD: list(EDGES) + [(b, a) for a, b in EDGES],
+        ActionType.BUILD_SETTLEMENT: list(range(NUM_NODES)),
+        ActionType.BUILD_CITY: list(range(NUM_NODES)),
+        ActionType.BUY_DEVELOPMENT_CARD: [None] + DEVELOPMENT_CARDS,
+        ActionType.PLAY_KNIGHT_CARD: [None],
+        ActionType.PLAY_YEAR_OF_PLENTY: year_of_plenty,
+        ActionType.PLAY_MONOPOLY: list(RESOURCES),
+        ActionType.PLAY_ROAD_BUILDING: [None],
+        ActionType.MARITIME_TRADE: maritime_trades,
+        ActionType.OFFER_TRADE: [
+            domestic_offer(give, ask, count)
+            for count in DOMESTIC_OFFER_COUNTS
+            for give in range(len(RESOURCES))
+            for ask in range(len(RESOURCES))
+            if give != ask
+        ],
+        ActionType.CANCEL_TRADE: [None],
+        ActionType.END_TURN: [None],
+    }
+
+
+# PAYLOADS[type_index][payload_index] => value
+PAYLOADS: List[List] = [[] for _ in ACTION_TYPES]
+# PAYLOAD_INDEX[type_index][value] => payload_index
+PAYLOAD_INDEX: List[Dict] = [{} for _ in ACTION_TYPES]
+# ACTIONS[type_index][color_index][payload_index] => interned Action
+ACTIONS: List[List[List[Action]]] = [[[] for _ in COLORS] for _ in ACTION_TYPES]
+# VALUE_ACTIONS[type_index][color_index][value] => interned Action
+VALUE_ACTIONS: List[List[Dict]] = [[{} for _ in COLORS] for _ in ACTION_TYPES]
+
+
+def _add_payload(type_index, value):
+    payload_index = len(PAYLOADS[type_index])
+    PAYLOADS[type_index].append(value)
+    PAYLOAD_INDEX[type_index][value] = payload_index
+    action_type = ACTION_TYPES[type_index]
+    for color_index, color in enumerate(COLORS):
+        action = Action(color, action_type, value)
+        ACTIONS[type_index][color_index].append(action)
+        VALUE_ACTIONS[type_index][color_index][value] = action
+    return payload_index
+
+
+for _action_type, _values in _static_payloads().items():
+    for _value in _values:
+        _add_payload(TYPE_INDEX[_action_type], _value)
+
+
+def _hashable(value):
+    # DISCARD values are logged as lists of resources
+    return tuple(value) if isinstance(value, list) else value
+
+
+def payload_index(action_type, value):
+    """Index of value in action_type's payload table (adding it if new)"""
+    type_index = TYPE_INDEX[action_type]
+    value = _hashable(value)
+    index = PAYLOAD_INDEX[type_index].get(value)
+    if index is None:
+        index = _add_payload(type_index, value)
+    return index
+
+
+def encode(action) -> int:
+    """Integer code of action. List values are encoded as tuples."""
+    type_index = TYPE_INDEX[action.action_type]
+    return (
+        payload_index(action.action_type, action.value) << PAYLOAD_SHIFT
+        | COLOR_INDEX[action.color] << TYPE_BITS
+        | type_index
+    )
+
+
+def decode(code) -> Action:
+    """Interned Action of a code (as returned by encode)"""
+    return ACTIONS[code & TYPE_MASK][(code >> TYPE_BITS) & COLOR_MASK][
+        code >> PAYLOAD_SHIFT
+    ]
+
+
+def get_action(color, action_type, value=None) -> Action:
+    """Interned Action(color, action_type, value). List values are turned
+    into tuples."""
+    actions = VALUE_ACTIONS[TYPE_INDEX[action_type]][COLOR_INDEX[color]]
+    try:
+        return actions[value]
+    except (KeyError, TypeError):  # new or unhashable (list) value
+        return ACTIONS[TYPE_INDEX[action_type]][COLOR_INDEX[color]][
+            payload_index(action_type, value)
+        ]
+
+
+def intern(action) -> Action:
+    """Shared Action equal to action (for tuple and scalar values)"""
+    return get_action(action.color, action.action_type, action.value)
+
+
+def actions_table(color, action_type) -> List[Action]:
+    """Interned actions of color and action_type, by payload index. So e.g.
+    actions_table(color, ActionType.BUILD_ROAD)[edge_id] and
+    actions_table(color, ActionType.BUILD_SETTLEMENT)[node_id]."""
+    return ACTIONS[TYPE_INDEX[action_type]][COLOR_INDEX[color]]
+
+
+def actions_by_value(color, action_type) -> Dict:
+    """Interned actions of color and action_type, by value. Only has values
+    seen so far (see get_action for values that may be new)."""
+    return VALUE_ACTIONS[TYPE_INDEX[action_type]][COLOR_INDEX[color]]
@@ -0,0 +1,86 @@
+"""
+Append-only log of the actions taken in a game (State.actions).
+
+Stored as a tuple of full chunks (tuples of CHUNK_SIZE actions) plus a tuple
+tail with the rest. Both are immutable, so copies share the whole history
+and State.copy is O(1) no matter how long the game has been going. Appending
+rebuilds the tail (at most CHUNK_SIZE entries), and once per CHUNK_SIZE
+appends the (short) tuple of chunks.
+"""
+
+from collections.abc import Sequence
+from itertools import chain
+
+CHUNK_SIZE = 64
+
+
+class ActionLog(Sequence):
+    """List-like log of actions: supports len, iteration, indexing (and
+    slicing, which returns a list), append and comparison with lists."""
+
+    __slots__ = ("chunks", "tail")
+
+    def __init__(self, actions=()):
+        actions = tuple(actions)
+        split = len(actions) - len(actions) % CHUNK_SIZE
+        self.chunks = tuple(
+            actions[i : i + CHUNK_SIZE] for i in range(0, split, CHUNK_SIZE)
+        )
+        self.tail = actions[split:]
+
+    def copy(self):
+        log = ActionLog.__new__(ActionLog)
+        log.chunks = self.chunks
+        log.tail = self.tail
+        return log
+
+    def append(self, action):
+        tail = self.tail + (action,)
+        if len(tail) == CHUNK_SIZE:
+            self.chunks += (tail,)
+            tail = ()
+        self.tail = tail
+
+    def truncate(self, length):
+        """Drops actions past the first length (like del log[length:])"""
+        if length >= len(self):
+            return
+        chunk_index, offset = divmod(length, CHUNK_SIZE)
+        if chunk_index < len(self.chunks):
+            self.tail = self.chunks[chunk_index][:offset]
+            self.chunks = self.chunks[:chunk_index]
+        else:
+            self.tail = self.tail[:offset]
+
+    def __len__(self):
+        return len(self.chunks) * CHUNK_SIZE + len(self.tail)
+
+    def __iter__(self):
+        return chain(chain.from_iterable(self.chunks), self.tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("action log index out of range")
+        chunk_index, offset = divmod(index, CHUNK_SIZE)
+        if chunk_index == len(self.chunks):
+            return self.tail[offset]
+        return self.chunks[chunk_index][offset]
+
+    def __eq__(self, other):
+        if isinstance(other, ActionLog):
+            return self.chunks == other.chunks and self.tail == other.tail
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    __hash__ = None  # mutable
+
+    def __repr__(self):
+        return f"ActionLog({list(self)!r})"
@@ -3,10 +3,19 @@ Move-generation functions (these return a list of actions that can be taken
 by current player). Main function is generate_playable_actions.
 """
 
+import functools
 import operator as op
 from functools import reduce
 from typing import Any, Dict, List, Set, Tuple, Union
 
+from catanatron.models.action_codes import (
+    DOMESTIC_OFFER_COUNTS,
+    actions_by_value,
+    actions_table,
+    domestic_offer,
+    get_action,
+    payload_index,
+)
 from catanatron.models.decks import (
     CITY_COST_FREQDECK,
     ROAD_COST_FREQDECK,
@@ -35,16 +44,59 @@ from catanatron.state_functions import (
     player_can_afford_dev_card,
     player_can_play_dev,
     player_has_rolled,
-    player_key,
     player_num_resource_cards,
+    player_offset,
     player_resource_freqdeck_contains,
 )
+from catanatron.models.topology import EDGE_ID
+from catanatron.player_state import (
+    CITIES_AVAILABLE,
+    DEV_CARD_IN_HAND,
+    DEV_CARD_OWNED_AT_START,
+    HAND_END,
+    HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN,
+    ROADS_AVAILABLE,
+    SETTLEMENTS_AVAILABLE,
+    WOOD_IN_HAND,
+)
 
 
-def generate_playable_actions(state):
-    """生成所有可用行動"""
-    actions = []
-    
+# DOMESTIC_OFFER_INDICES[count][give] => OFFER_TRADE payload indices of
+#   offers of `count` RESOURCES[give] for 1 of each other resource.
+DOMESTIC_OFFER_INDICES = {
+    count: [
+        [
+            payload_index(ActionType.OFFER_TRADE, domestic_offer(give, ask, count))
+            for ask in range(len(RESOURCES))
+            if ask != give
+        ]
+        for give in range(len(RESOURCES))
+    ]
+    for count in DOMESTIC_OFFER_COUNTS
+}
+
+# Rolled PLAY_TURN actions are generated by category (in this order), so
+# that categories unaffected by an action can be reused. See
+# play_turn_possibilities and State.playable_actions.
+CITIES = "CITIES"
+SETTLEMENTS = "SETTLEMENTS"
+ROADS = "ROADS"
+BUY_DEVELOPMENT_CARD = "BUY_DEVELOPMENT_CARD"
+PLAY_DEVELOPMENT_CARDS = "PLAY_DEVELOPMENT_CARDS"
+MARITIME_TRADES = "MARITIME_TRADES"
+DOMESTIC_TRADES = "DOMESTIC_TRADES"
+END_TURN = "END_TURN"
+
+
+def generate_playable_actions(state, play_turn_cache=None):
+    """生成所有可用行動
+
+    Args:
+        state (State): State to generate actions for.
+        play_turn_cache (Dict[str, List[Action]], optional): Category => actions
+            for the current (rolled) PLAY_TURN. Categories in it are reused,
+            and missing ones are computed and added to it.
+    """
     color = state.current_color()
     action_prompt = state.current_prompt
 
@@ -55,52 +107,18 @@ def generate_playable_actions(state):
     elif action_prompt == ActionPrompt.MOVE_ROBBER:
         return robber_possibilities(state, color)
     elif action_prompt == ActionPrompt.PLAY_TURN:
-        actions = []
-
         if not player_has_rolled(state, color):
-            actions.append(Action(color, ActionType.ROLL, None))
-            return actions  # must roll first
-
-        # Build city (over existing settlement)
-        settlements = get_player_buildings(state, color, SETTLEMENT)
-        for node_id in settlements:
-            if player_can_afford_city(state, color):
-                actions.append(Action(color, ActionType.BUILD_CITY, node_id))
-
-        # Build settlement
-        if player_can_afford_settlement(state, color):
-            actions.extend(settlement_possibilities(state, color))
-
-        # Build road
-        if player_can_afford_road(state, color):
-            actions.extend(road_possibilities(state, color))
-
-        # Buy dev card
-        if player_can_afford_dev_card(state, color):
-            actions.append(Action(color, ActionType.BUY_DEVELOPMENT_CARD, None))
-
-        # Play dev cards (if played has_rolled and hasn't played one this turn)
-        if player_has_rolled(state, color) and can_play_dev(state, color):
-            actions.extend(dev_card_possibilities(state, color))
-
-        # Trade
-        actions.extend(maritime_trade_possibilities(state, color))
-        
-        # 🔥 這裡是關鍵：添加玩家間交易！
-        if player_has_rolled(state, color) and not getattr(state, 'is_resolving_trade', False):
-            actions.extend(domestic_trade_possibilities(state, color))
-
-        # End turn (should be available for current player, if rolled)
-        if player_has_rolled(state, color):
-            actions.append(Action(color, ActionType.END_TURN, None))
+            return [get_action(color, ActionType.ROLL)]  # must roll first
 
-        return actions
+        return play_turn_possibilities(
+            state, color, {} if play_turn_cache is None else play_turn_cache
+        )
     elif action_prompt == ActionPrompt.DISCARD:
         return discard_possibilities(color)
     elif action_prompt == ActionPrompt.DECIDE_TRADE:
         # REJECT_TRADE 也應該使用 10-tuple
         trade_value = state.current_trade[:10]  # 只取前10個元素
-        actions = [Action(color, ActionType.REJECT_TRADE, trade_value)]
+        actions = [get_action(color, ActionType.REJECT_TRADE, trade_value)]
 
         # can only accept if have enough cards
         freqdeck = get_player_freqdeck(state, color)
@@ -108,17 +126,17 @@ def generate_playable_actions(state):
         if freqdeck_contains(freqdeck, asked):
                 # ACCEPT_TRADE 應該使用 10-tuple (不包含發起玩家索引)
             trade_value = state.current_trade[:10]  # 只取前10個元素
-            actions.append(Action(color, ActionType.ACCEPT_TRADE, trade_value))
+            actions.append(get_action(color, ActionType.ACCEPT_TRADE, trade_value))
 
         return actions
     elif action_prompt == ActionPrompt.DECIDE_ACCEPTEES:
         # you should be able to accept for each of the "accepting players"
-        actions = [Action(color, ActionType.CANCEL_TRADE, None)]
+        actions = [get_action(color, ActionType.CANCEL_TRADE)]
 
         for other_color, accepted in zip(state.colors, state.acceptees):
             if accepted is True:  # 明確檢查 True
                 actions.append(
-                    Action(
+                    get_action(
                         color,
                         ActionType.CONFIRM_TRADE,
                         (*state.current_trade[:10], other_color),
@@ -129,8 +147,67 @@ def generate_playable_actions(state):
         raise RuntimeError("Unknown ActionPrompt: " + str(action_prompt))
 
 
+def play_turn_possibilities(state, color, play_turn_cache) -> List[Action]:
+    """Actions of a PLAY_TURN after rolling, reusing (and filling) the
+    category => actions lists in play_turn_cache."""
+    actions = []
+    for category, possibilities_fn in PLAY_TURN_POSSIBILITIES:
+        category_actions = play_turn_cache.get(category)
+        if category_actions is None:
+            category_actions = possibilities_fn(state, color)
+            play_turn_cache[category] = category_actions
+        actions.extend(category_actions)
+    return actions
+
+
+def _build_city_possibilities(state, color) -> List[Action]:
+    # Build city (over existing settlement)
+    if not player_can_afford_city(state, color):
+        return []
+    table = actions_table(color, ActionType.BUILD_CITY)
+    settlements = get_player_buildings(state, color, SETTLEMENT)
+    return [table[node_id] for node_id in settlements]
+
+
+def _build_settlement_possibilities(state, color) -> List[Action]:
+    if player_can_afford_settlement(state, color):
+        return settlement_possibilities(state, color)
+    return []
+
+
+def _build_road_possibilities(state, color) -> List[Action]:
+    if player_can_afford_road(state, color):
+        return road_possibilities(state, color)
+    return []
+
+
+def _buy_development_card_possibilities(state, color) -> List[Action]:
+    if state.development_listdeck and player_can_afford_dev_card(state, color):
+        return [get_action(color, ActionType.BUY_DEVELOPMENT_CARD)]
+    return []
+
+
+def _play_development_card_possibilities(state, color) -> List[Action]:
+    # Play dev cards (if played has_rolled and hasn't played one this turn)
+    if can_play_dev(state, color):
+        return dev_card_possibilities(state, color)
+    return []
+
+
+def _domestic_trade_possibilities(state, color) -> List[Action]:
+    # 🔥 這裡是關鍵：添加玩家間交易！
+    if state.rules.domestic_trade and not state.is_resolving_trade:
+        return domestic_trade_possibilities(state, color)
+    return []
+
+
+def _end_turn_possibilities(state, color) -> List[Action]:
+    # End turn (should be available for current player, if rolled)
+    return [get_action(color, ActionType.END_TURN)]
+
+
 def monopoly_possibilities(color) -> List[Action]:
-    return [Action(color, ActionType.PLAY_MONOPOLY, card) for card in RESOURCES]
+    return list(actions_table(color, ActionType.PLAY_MONOPOLY)[: len(RESOURCES)])
 
 
 def year_of_plenty_possibilities(color, freqdeck: List[int]) -> List[Action]:
@@ -148,19 +225,18 @@ def year_of_plenty_possibilities(color, freqdeck: List[int]) -> List[Action]:
                 if freqdeck_can_draw(freqdeck, 1, second_card):
                     options.add((second_card,))
 
-    return list(
-        map(
-            lambda cards: Action(color, ActionType.PLAY_YEAR_OF_PLENTY, tuple(cards)),
-            options,
-        )
-    )
+    lookup = actions_by_value(color, ActionType.PLAY_YEAR_OF_PLENTY)
+    return [
+        lookup.get(cards) or get_action(color, ActionType.PLAY_YEAR_OF_PLENTY, cards)
+        for cards in options
+    ]
 
 
 def road_building_possibilities(state, color, check_money=True) -> List[Action]:
-    key = player_key(state, color)
+    base = player_offset(state, color)
 
     # Check if can't build any more roads.
-    has_roads_available = state.player_state[f"{key}_ROADS_AVAILABLE"] > 0
+    has_roads_available = state.player_buffer[base + ROADS_AVAILABLE] > 0
     if not has_roads_available:
         return []
 
@@ -169,8 +245,8 @@ def road_building_possibilities(state, color, check_money=True) -> List[Action]:
     if check_money and not has_money:
         return []
 
-    buildable_edges = state.board.buildable_edges(color)
-    return [Action(color, ActionType.BUILD_ROAD, edge) for edge in buildable_edges]
+    table = actions_table(color, ActionType.BUILD_ROAD)
+    return [table[EDGE_ID[edge]] for edge in state.board.buildable_edges(color)]
 
 
 def settlement_possibilities(state, color, initial_build_phase=False) -> List[Action]:
@@ -178,47 +254,43 @@ def settlement_possibilities(state, color, initial_build_phase=False) -> List[Ac
         buildable_node_ids = state.board.buildable_node_ids(
             color, initial_build_phase=True
         )
-        return [
-            Action(color, ActionType.BUILD_SETTLEMENT, node_id)
-            for node_id in buildable_node_ids
-        ]
+        table = actions_table(color, ActionType.BUILD_SETTLEMENT)
+        return [table[node_id] for node_id in buildable_node_ids]
     else:
-        key = player_key(state, color)
+        base = player_offset(state, color)
         has_money = player_resource_freqdeck_contains(
             state, color, SETTLEMENT_COST_FREQDECK
         )
         has_settlements_available = (
-            state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] > 0
+            state.player_buffer[base + SETTLEMENTS_AVAILABLE] > 0
         )
         if has_money and has_settlements_available:
             buildable_node_ids = state.board.buildable_node_ids(color)
-            return [
-                Action(color, ActionType.BUILD_SETTLEMENT, node_id)
-                for node_id in buildable_node_ids
-            ]
+            table = actions_table(color, ActionType.BUILD_SETTLEMENT)
+            return [table[node_id] for node_id in buildable_node_ids]
         else:
             return []
 
 
 def city_possibilities(state, color) -> List[Action]:
-    key = player_key(state, color)
+    base = player_offset(state, color)
 
     can_buy_city = player_resource_freqdeck_contains(state, color, CITY_COST_FREQDECK)
     if not can_buy_city:
         return []
 
-    has_cities_available = state.player_state[f"{key}_CITIES_AVAILABLE"] > 0
+    has_cities_available = state.player_buffer[base + CITIES_AVAILABLE] > 0
     if not has_cities_available:
         return []
 
-    return [
-        Action(color, ActionType.BUILD_CITY, node_id)
-        for node_id in get_player_buildings(state, color, SETTLEMENT)
-    ]
+    table = actions_table(color, ActionType.BUILD_CITY)
+    settlements = get_player_buildings(state, color, SETTLEMENT)
+    return [table[node_id] for node_id in settlements]
 
 
 def robber_possibilities(state, color) -> List[Action]:
     actions = []
+    lookup = actions_by_value(color, ActionType.MOVE_ROBBER)
     for coordinate, tile in state.board.map.land_tiles.items():
         if coordinate == state.board.robber_coordinate:
             continue  # ignore. must move robber.
@@ -237,15 +309,16 @@ def robber_possibilities(state, color) -> List[Action]:
                     to_steal_from.add(candidate_color)
 
         if len(to_steal_from) == 0:
+            value = (coordinate, None, None)
             actions.append(
-                Action(color, ActionType.MOVE_ROBBER, (coordinate, None, None))
+                lookup.get(value) or get_action(color, ActionType.MOVE_ROBBER, value)
             )
         else:
             for enemy_color in to_steal_from:
+                value = (coordinate, enemy_color, None)
                 actions.append(
-                    Action(
-                        color, ActionType.MOVE_ROBBER, (coordinate, enemy_color, None)
-                    )
+                    lookup.get(value)
+                    or get_action(color, ActionType.MOVE_ROBBER, value)
                 )
 
     return actions
@@ -259,11 +332,12 @@ def initial_road_possibilities(state, color) -> List[Action]:
         lambda edge: last_settlement_node_id in edge,
         state.board.buildable_edges(color),
     )
-    return [Action(color, ActionType.BUILD_ROAD, edge) for edge in buildable_edges]
+    table = actions_table(color, ActionType.BUILD_ROAD)
+    return [table[EDGE_ID[edge]] for edge in buildable_edges]
 
 
 def discard_possibilities(color) -> List[Action]:
-    return [Action(color, ActionType.DISCARD, None)]
+    return [get_action(color, ActionType.DISCARD)]
     # TODO: Be robust to high dimensionality of DISCARD
     # hand = player.resource_deck.to_array()
     # num_cards = player.resource_deck.num_cards()
@@ -291,22 +365,42 @@ def ncr(n, r):
 
 
 def maritime_trade_possibilities(state, color) -> List[Action]:
-    hand_freqdeck = [
-        player_num_resource_cards(state, color, resource) for resource in RESOURCES
-    ]
-    port_resources = state.board.get_player_port_resources(color)
-    trade_offers = inner_maritime_trade_possibilities(
-        hand_freqdeck, state.resource_freqdeck, port_resources
+    base = player_offset(state, color)
+    hand = state.player_buffer[base + WOOD_IN_HAND : base + HAND_END]
+    if max(hand) < 2:  # best rate is 2:1
+        return []
+    return list(
+        _maritime_trades(
+            color,
+            tuple(map(min, hand, MARITIME_MAX_RATES)),
+            tuple(map(bool, state.resource_freqdeck)),
+            state.board.get_player_port_resources(color),
+        )
     )
 
-    return list(
-        map(lambda t: Action(color, ActionType.MARITIME_TRADE, t), trade_offers)
+
+# Amounts past the 4:1 rate don't change maritime trades (see _maritime_trades)
+MARITIME_MAX_RATES = (4,) * len(RESOURCES)
+
+
+@functools.lru_cache(maxsize=2**16)
+def _maritime_trades(color, clipped_hand, bank_mask, port_resources):
+    """Interned MARITIME_TRADE actions of color. A pure function of the hand
+    (clipped at 4), which bank resources are left and the (frozen) set of
+    port resources, so it is memoized."""
+    trade_offers = inner_maritime_trade_possibilities(
+        clipped_hand, bank_mask, port_resources
+    )
+    return tuple(
+        get_action(color, ActionType.MARITIME_TRADE, trade_offer)
+        for trade_offer in trade_offers
     )
 
 
 def inner_maritime_trade_possibilities(hand_freqdeck, bank_freqdeck, port_resources):
-    """This inner function is to make this logic more shareable"""
-    trade_offers = set()
+    """This inner function is to make this logic more shareable. Trade offers
+    are listed by resource given, then by resource asked (RESOURCES order)."""
+    trade_offers = []
 
     # Get lowest rate per resource
     rates: Dict[FastResource, int] = {WOOD: 4, BRICK: 4, SHEEP: 4, WHEAT: 4, ORE: 4}
@@ -327,8 +421,7 @@ def inner_maritime_trade_possibilities(hand_freqdeck, bank_freqdeck, port_resour
                     resource != j_resource
                     and freqdeck_count(bank_freqdeck, j_resource) > 0
                 ):
-                    trade_offer = tuple(resource_out + [j_resource])
-                    trade_offers.add(trade_offer)
+                    trade_offers.append(tuple(resource_out + [j_resource]))
 
     return trade_offers
 
@@ -338,14 +431,7 @@ def domestic_trade_possibilities(state, color) -> List[Action]:
     actions = []
     
     # 獲取玩家資源
-    key = player_key(state, color)
-    player_resources = [
-        state.player_state.get(f'{key}_WOOD_IN_HAND', 0),
-        state.player_state.get(f'{key}_BRICK_IN_HAND', 0), 
-        state.player_state.get(f'{key}_SHEEP_IN_HAND', 0),
-        state.player_state.get(f'{key}_WHEAT_IN_HAND', 0),
-        state.player_state.get(f'{key}_ORE_IN_HAND', 0),
-    ]
+    player_resources = get_player_freqdeck(state, color)
     
     total_resources = sum(player_resources)
     
@@ -353,30 +439,14 @@ def domestic_trade_possibilities(state, color) -> List[Action]:
     if total_resources < 1:
         return actions
     
-    # 生成 1:1 交易提案
-    for give_resource_idx, give_count in enumerate(player_resources):
-        if give_count > 0:  # 有這種資源可以給出
-            for ask_resource_idx in range(5):
-                if give_resource_idx != ask_resource_idx:  # 不同資源
-                    # 創建交易格式：[give_wood, give_brick, give_sheep, give_wheat, give_ore, ask_wood, ask_brick, ask_sheep, ask_wheat, ask_ore]
-                    trade_offer = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-                    trade_offer[give_resource_idx] = 1  # 給出 1 個資源
-                    trade_offer[5 + ask_resource_idx] = 1  # 要求 1 個資源
-                    
-                    actions.append(Action(color, ActionType.OFFER_TRADE, tuple(trade_offer)))
-    
-    # 如果有多個資源，也生成 2:1 交易
-    for give_resource_idx, give_count in enumerate(player_resources):
-        if give_count >= 2:  # 有 2+ 個資源
-            for ask_resource_idx in range(5):
-                if give_resource_idx != ask_resource_idx:
-                    # 2:1 交易
-                    trade_offer = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-                    trade_offer[give_resource_idx] = 2
-                    trade_offer[5 + ask_resource_idx] = 1
-                    
-                    actions.append(Action(color, ActionType.OFFER_TRADE, tuple(trade_offer)))
-    
+    # 生成 1:1 交易提案, 然後 2:1 (如果有多個資源)
+    table = actions_table(color, ActionType.OFFER_TRADE)
+    for count in DOMESTIC_OFFER_COUNTS:
+        for give_resource_idx, give_count in enumerate(player_resources):
+            if give_count >= count:
+                for index in DOMESTIC_OFFER_INDICES[count][give_resource_idx]:
+                    actions.append(table[index])
+
     return actions
 
 
@@ -398,18 +468,18 @@ def player_can_afford_road(state, color):
 def can_play_dev(state, color):
     """檢查玩家是否可以玩發展卡"""
     # 檢查玩家是否可以玩任何發展卡
-    from catanatron.state_functions import player_key
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     
     # 檢查是否已經在本回合玩過發展卡
-    if state.player_state.get(f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN", False):
+    if buffer[base + HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN]:
         return False
     
     # 檢查是否有任何可以玩的發展卡
     dev_cards = ["KNIGHT", "YEAR_OF_PLENTY", "MONOPOLY", "ROAD_BUILDING"]
     for dev_card in dev_cards:
-        if (state.player_state.get(f"{key}_{dev_card}_IN_HAND", 0) >= 1 and
-            state.player_state.get(f"{key}_{dev_card}_OWNED_AT_START", False)):
+        if (buffer[base + DEV_CARD_IN_HAND[dev_card]] >= 1 and
+            buffer[base + DEV_CARD_OWNED_AT_START[dev_card]]):
             return True
     
     return False
@@ -422,31 +492,43 @@ def dev_card_possibilities(state, color):
     """生成發展卡遊玩可能性"""
     actions = []
     
-    from catanatron.state_functions import player_key
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     
     # 檢查是否已經在本回合玩過發展卡
-    if state.player_state.get(f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN", False):
+    if buffer[base + HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN]:
         return actions
     
     # Knight card
-    if (state.player_state.get(f"{key}_KNIGHT_IN_HAND", 0) >= 1 and
-        not state.player_state.get(f"{key}_KNIGHT_OWNED_AT_START", True)):
-        actions.append(Action(color, ActionType.PLAY_KNIGHT_CARD, None))
+    if (buffer[base + DEV_CARD_IN_HAND["KNIGHT"]] >= 1 and
+        buffer[base + DEV_CARD_OWNED_AT_START["KNIGHT"]]):
+        actions.append(get_action(color, ActionType.PLAY_KNIGHT_CARD))
     
     # Year of Plenty
-    if (state.player_state.get(f"{key}_YEAR_OF_PLENTY_IN_HAND", 0) >= 1 and
-        not state.player_state.get(f"{key}_YEAR_OF_PLENTY_OWNED_AT_START", True)):
+    if (buffer[base + DEV_CARD_IN_HAND["YEAR_OF_PLENTY"]] >= 1 and
+        buffer[base + DEV_CARD_OWNED_AT_START["YEAR_OF_PLENTY"]]):
         actions.extend(year_of_plenty_possibilities(color, state.resource_freqdeck))
     
     # Monopoly
-    if (state.player_state.get(f"{key}_MONOPOLY_IN_HAND", 0) >= 1 and
-        not state.player_state.get(f"{key}_MONOPOLY_OWNED_AT_START", True)):
+    if (buffer[base + DEV_CARD_IN_HAND["MONOPOLY"]] >= 1 and
+        buffer[base + DEV_CARD_OWNED_AT_START["MONOPOLY"]]):
         actions.extend(monopoly_possibilities(color))
     
     # Road Building
-    if (state.player_state.get(f"{key}_ROAD_BUILDING_IN_HAND", 0) >= 1 and
-        not state.player_state.get(f"{key}_ROAD_BUILDING_OWNED_AT_START", True)):
-        actions.append(Action(color, ActionType.PLAY_ROAD_BUILDING, None))
+    if (buffer[base + DEV_CARD_IN_HAND["ROAD_BUILDING"]] >= 1 and
+        buffer[base + DEV_CARD_OWNED_AT_START["ROAD_BUILDING"]]):
+        actions.append(get_action(color, ActionType.PLAY_ROAD_BUILDING))
     
     return actions
+
+
+PLAY_TURN_POSSIBILITIES = (
+    (CITIES, _build_city_possibilities),
+    (SETTLEMENTS, _build_settlement_possibilities),
+    (ROADS, _build_road_possibilities),
+    (BUY_DEVELOPMENT_CARD, _buy_development_card_possibilities),
+    (PLAY_DEVELOPMENT_CARDS, _play_development_card_possibilities),
+    (MARITIME_TRADES, maritime_trade_possibilities),
+    (DOMESTIC_TRADES, _domestic_trade_possibilities),
+    (END_TURN, _end_turn_possibilities),
+)
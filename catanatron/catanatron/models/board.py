@@ -1,39 +1,51 @@
-import pickle
-import copy
 from collections import defaultdict
 from typing import Any, Set, Dict, Tuple, List
 import functools
 
-import networkx as nx  # type: ignore
-
 from catanatron.models.player import Color
 from catanatron.models.map import (
     BASE_MAP_TEMPLATE,
-    MINI_MAP_TEMPLATE,
-    NUM_NODES,
     CatanMap,
     NodeId,
 )
+from catanatron.models.decks import RESOURCE_FREQDECK_INDEXES
 from catanatron.models.enums import FastBuildingType, SETTLEMENT, CITY
+from catanatron.models.longest_road import component_longest_road
+from catanatron.models.topology import (
+    EDGE_ID,
+    EDGE_NODES,
+    EDGES,
+    NODE_EDGE_MASK,
+    NODE_EDGES,
+    NODE_NEIGHBOR_MASK,
+    edges_of,
+    edges_of_nodes_mask,
+    get_edges,
+    iter_bits,
+    land_edges_mask,
+    node_ids_of,
+    nodes_mask,
+    static_graph,
+)
+from catanatron.zobrist import building_key, road_key, robber_key
 
+# (tile id, node id, color, resource freqdeck index, amount). See Board.payouts
+Payout = Tuple[int, NodeId, Color, int, int]
 
-# Used to find relationships between nodes and edges
-base_map = CatanMap.from_template(BASE_MAP_TEMPLATE)
-mini_map = CatanMap.from_template(MINI_MAP_TEMPLATE)
-STATIC_GRAPH = nx.Graph()
-for tile in base_map.tiles.values():
-    STATIC_GRAPH.add_nodes_from(tile.nodes.values())
-    STATIC_GRAPH.add_edges_from(tile.edges.values())
+
+def __getattr__(name):
+    # STATIC_GRAPH (a networkx Graph) is only built if someone asks for it.
+    # Relationships between nodes and edges are in catanatron.models.topology.
+    if name == "STATIC_GRAPH":
+        return static_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @functools.lru_cache(1)
 def get_node_distances():
-    return nx.floyd_warshall(STATIC_GRAPH)
-
+    import networkx as nx  # type: ignore
 
-@functools.lru_cache(3)  # None, range(54), range(24)
-def get_edges(land_nodes=None):
-    return list(STATIC_GRAPH.subgraph(land_nodes or range(NUM_NODES)).edges())
+    return nx.floyd_warshall(static_graph())
 
 
 class Board:
@@ -45,17 +57,63 @@ class Board:
         roads (Dict[EdgeId, Color]): Mapping from edge
             to Color (if there is a road there). Contains inverted
             edges as well for ease of querying.
-        connected_components (Dict[Color, List[Set[NodeId]]]): Cache
-            datastructure to speed up maintaining longest road computation.
-            To be queried by Color. Value is a list of node sets.
-        board_buildable_ids (Set[NodeId]): Cache of buildable node ids in board.
+        component_masks (Dict[Color, Tuple[int, ...]]): Cache datastructure to
+            speed up maintaining longest road computation. To be queried by
+            Color. Value is a tuple of node masks, one per connected component.
+            connected_components gives the same as lists of node sets.
+        board_buildable_ids (Set[NodeId]): Buildable node ids in board (per the
+            distance rule). Derived from buildable_node_mask.
         road_color (Color): Color of player with longest road.
         road_length (int): Number of roads of longest road
-        robber_coordinate (Coordinate): Coordinate where robber is.
+        robber_coordinate (Coordinate): Coordinate where robber is. Use
+            .move_robber to change it.
+        zobrist (int): Zobrist hash of buildings, roads and robber. Maintained
+            incrementally. See catanatron.zobrist.
+        payouts (Dict[int, Tuple[Payout, ...]]): Dice number => what the
+            number pays out, as (tile id, node id, color, resource freqdeck
+            index, amount) entries. Tiles under the robber are left out.
+
+    Bitboards (Python ints; bit i is node i or edge i, see models.topology):
+        settlement_mask, city_mask (Dict[Color, int]): Nodes with color's
+            settlements and cities.
+        road_mask (Dict[Color, int]): Edges with color's roads.
+        occupied_node_mask (int): Nodes with any building.
+        occupied_edge_mask (int): Edges with any road.
+        buildable_node_mask (int): Land nodes that satisfy the distance rule.
+        component_node_mask (Dict[Color, int]): Union of color's
+            component_masks.
+        land_edge_mask (int): Edges of this map's land. Static.
+
+    Containers are treated as persistent: mutators replace a container (or
+    the touched part of it) with an updated copy instead of modifying it in
+    place. This lets .copy() share all of them with the original board, so
+    copies only pay for what they later change.
     """
 
+    __slots__ = (
+        "map",
+        "buildings",
+        "roads",
+        "component_masks",
+        "road_lengths",
+        "road_color",
+        "road_length",
+        "robber_coordinate",
+        "zobrist",
+        "payouts",
+        "settlement_mask",
+        "city_mask",
+        "road_mask",
+        "occupied_node_mask",
+        "occupied_edge_mask",
+        "buildable_node_mask",
+        "component_node_mask",
+        "land_edge_mask",
+        "buildable_edges_cache",
+        "player_port_resources_cache",
+    )
+
     def __init__(self, catan_map=None, initialize=True):
-        self.buildable_subgraph: Any = None
         self.buildable_edges_cache = {}
         self.player_port_resources_cache = {}
         if initialize:
@@ -66,11 +124,10 @@ class Board:
             self.buildings: Dict[NodeId, Tuple[Color, FastBuildingType]] = dict()
             self.roads = dict()  # (node_id, node_id) => color
 
-            # color => int{}[] (list of node_id sets) one per component
-            #   nodes in sets are incidental (might not be owned by player)
-            self.connected_components: Any = defaultdict(list)
-            self.board_buildable_ids = set(self.map.land_nodes)
-            self.road_lengths = defaultdict(int)
+            # color => (node mask, ...) one per component
+            #   nodes in components are incidental (might not be owned by player)
+            self.component_masks: Dict[Color, Tuple[int, ...]] = dict()
+            self.road_lengths: Dict[Color, int] = dict()
             self.road_color = None
             self.road_length = 0
 
@@ -79,9 +136,31 @@ class Board:
                 lambda coordinate: self.map.land_tiles[coordinate].resource is None,
                 self.map.land_tiles.keys(),
             ).__next__()
-
-            # Cache buildable subgraph
-            self.buildable_subgraph = STATIC_GRAPH.subgraph(self.map.land_nodes)
+            self.zobrist = robber_key(self.robber_coordinate)
+            self.payouts: Dict[int, Tuple[Payout, ...]] = dict()
+
+            self.settlement_mask: Dict[Color, int] = dict()
+            self.city_mask: Dict[Color, int] = dict()
+            self.road_mask: Dict[Color, int] = dict()
+            self.occupied_node_mask = 0
+            self.occupied_edge_mask = 0
+            self.buildable_node_mask = nodes_mask(self.map.land_nodes)
+            self.component_node_mask: Dict[Color, int] = dict()
+            self.land_edge_mask = land_edges_mask(self.buildable_node_mask)
+
+    @property
+    def board_buildable_ids(self) -> Set[NodeId]:
+        return set(iter_bits(self.buildable_node_mask))
+
+    @property
+    def connected_components(self) -> Dict[Color, List[Set[NodeId]]]:
+        return defaultdict(
+            list,
+            {
+                color: [set(iter_bits(mask)) for mask in masks]
+                for color, masks in self.component_masks.items()
+            },
+        )
 
     def build_settlement(self, color, node_id, initial_build_phase=False):
         """Adds a settlement, and ensures is a valid place to build.
@@ -93,60 +172,73 @@ class Board:
                 Whether this is part of initial building phase, so as to skip
                 connectedness validation. Defaults to True.
         """
-        buildable = self.buildable_node_ids(
-            color, initial_build_phase=initial_build_phase
-        )
-        if node_id not in buildable:
+        buildable = self.buildable_node_mask
+        if not initial_build_phase:
+            buildable &= self.component_node_mask.get(color, 0)
+        if not (buildable >> node_id) & 1:
             raise ValueError(
                 "Invalid Settlement Placement: not connected and not initial-placement"
             )
 
-        if node_id in self.buildings:
+        node_bit = 1 << node_id
+        if self.occupied_node_mask & node_bit:
             raise ValueError("Invalid Settlement Placement: a building exists there")
 
-        self.buildings[node_id] = (color, SETTLEMENT)
+        self.buildings = {**self.buildings, node_id: (color, SETTLEMENT)}
+        self.zobrist ^= building_key(node_id, color, SETTLEMENT)
+        self._set_node_payouts(node_id, color, 1)
+        self.settlement_mask = {
+            **self.settlement_mask,
+            color: self.settlement_mask.get(color, 0) | node_bit,
+        }
+        self.occupied_node_mask |= node_bit
 
         previous_road_color = self.road_color
         if initial_build_phase:
-            self.connected_components[color].append({node_id})
+            self._set_components(
+                color, self.component_masks.get(color, ()) + (node_bit,)
+            )
         else:
             # Maybe cut connected components.
-            edges_by_color = defaultdict(list)
-            for edge in STATIC_GRAPH.edges(node_id):
-                edges_by_color[self.roads.get(edge, None)].append(edge)
-
-            for edge_color, edges in edges_by_color.items():
-                if edge_color == color or edge_color is None:
+            incident_edges = NODE_EDGE_MASK[node_id]
+            for edge_color, road_mask in self.road_mask.items():
+                if edge_color == color:
                     continue  # ignore
-                if len(edges) == 2:  # rip, edge_color has been plowed
+                plowed_edges = road_mask & incident_edges
+                if plowed_edges.bit_count() == 2:  # rip, edge_color has been plowed
                     # consider cut was at b=node_id for edges (a, b) and (b, c)
+                    edges = edges_of(plowed_edges)
                     a = [n for n in edges[0] if n != node_id].pop()
                     c = [n for n in edges[1] if n != node_id].pop()
 
                     # do dfs from a adding all encountered nodes
-                    a_nodeset = self.dfs_walk(a, edge_color)
-                    c_nodeset = self.dfs_walk(c, edge_color)
+                    a_nodes = self._walk_mask(a, edge_color)
+                    c_nodes = self._walk_mask(c, edge_color)
 
                     # split this components on here.
                     b_index = self._get_connected_component_index(node_id, edge_color)
-                    del self.connected_components[edge_color][b_index]
-                    self.connected_components[edge_color].append(a_nodeset)
-                    self.connected_components[edge_color].append(c_nodeset)
-
-                    # Update longest road by plowed player. Compare again with all
-                    self.road_lengths[edge_color] = max(
-                        *[
-                            len(longest_acyclic_path(self, component, edge_color))
-                            for component in self.connected_components[edge_color]
-                        ]
+                    components = self.component_masks[edge_color]
+                    components = (
+                        components[:b_index]
+                        + components[b_index + 1 :]
+                        + (a_nodes, c_nodes)
                     )
+                    self._set_components(edge_color, components)
+
+                    # Update longest road by plowed player. Compare again with
+                    # all (only the two new components aren't memoized).
+                    self.road_lengths = {
+                        **self.road_lengths,
+                        edge_color: max(
+                            self._longest_road(component, edge_color)
+                            for component in components
+                        ),
+                    }
                     self.road_color, self.road_length = max(
                         self.road_lengths.items(), key=lambda e: e[1]
                     )
 
-        self.board_buildable_ids.discard(node_id)
-        for n in STATIC_GRAPH.neighbors(node_id):
-            self.board_buildable_ids.discard(n)
+        self.buildable_node_mask &= ~(NODE_NEIGHBOR_MASK[node_id] | node_bit)
 
         self.buildable_edges_cache = {}  # Reset buildable_edges
         self.player_port_resources_cache = {}  # Reset port resources
@@ -163,35 +255,62 @@ class Board:
             Set[int]: Nodes that are "connected" to this one
                 by roads of the color player.
         """
+        return set(iter_bits(self._walk_mask(node_id, color)))
+
+    def _walk_mask(self, node_id, color):
+        """Like dfs_walk, but returns a node mask"""
         agenda = [node_id]  # assuming node_id is owned.
-        visited = set()
+        visited = 0
+        enemy_nodes = self.enemy_node_mask(color)
+        road_mask = self.road_mask.get(color, 0)
 
         while len(agenda) != 0:
             n = agenda.pop()
-            visited.add(n)
+            visited |= 1 << n
 
-            if self.is_enemy_node(n, color):
+            if (enemy_nodes >> n) & 1:
                 continue  # end of the road
 
-            neighbors = [v for v in STATIC_GRAPH.neighbors(n) if v not in visited]
-            expandable = [v for v in neighbors if self.roads.get((n, v), None) == color]
-            agenda.extend(expandable)
+            for edge_id in NODE_EDGES[n]:
+                v = EDGE_NODES[edge_id] ^ n
+                if not (visited >> v) & 1 and (road_mask >> edge_id) & 1:
+                    agenda.append(v)
 
         return visited
 
     def _get_connected_component_index(self, node_id, color):
-        for i, component in enumerate(self.connected_components[color]):
-            if node_id in component:
+        for i, component in enumerate(self.component_masks.get(color, ())):
+            if (component >> node_id) & 1:
                 return i
 
+    def _set_components(self, color, components):
+        """Replaces color's components (without mutating the shared dict)"""
+        self.component_masks = {**self.component_masks, color: components}
+
+        component_nodes = 0
+        for component in components:
+            component_nodes |= component
+        self.component_node_mask = {**self.component_node_mask, color: component_nodes}
+
+    def _longest_road(self, component, color):
+        return component_longest_road(
+            component, self.road_mask.get(color, 0), self.enemy_node_mask(color)
+        )
+
     def build_road(self, color, edge):
-        buildable = self.buildable_edges(color)
-        inverted_edge = (edge[1], edge[0])
-        if edge not in buildable and inverted_edge not in buildable:
+        edge_id = EDGE_ID.get(edge)
+        if edge_id is None or not (self.buildable_edge_mask(color) >> edge_id) & 1:
             raise ValueError("Invalid Road Placement")
 
-        self.roads[edge] = color
-        self.roads[inverted_edge] = color
+        inverted_edge = (edge[1], edge[0])
+        self.roads = {**self.roads, edge: color, inverted_edge: color}
+        self.zobrist ^= road_key(edge, color)
+        edge_bit = 1 << edge_id
+        self.road_mask = {
+            **self.road_mask,
+            color: self.road_mask.get(color, 0) | edge_bit,
+        }
+        self.occupied_edge_mask |= edge_bit
 
         # Find connected components corresponding to edge nodes (buildings).
         a, b = edge
@@ -199,30 +318,34 @@ class Board:
         b_index = self._get_connected_component_index(b, color)
 
         # Extend or merge components
+        components = list(self.component_masks.get(color, ()))
         if a_index is None and not self.is_enemy_node(a, color):
-            component = self.connected_components[color][b_index]
-            component.add(a)
+            component = components[b_index] | (1 << a)
+            components[b_index] = component
+            self._set_components(color, tuple(components))
         elif b_index is None and not self.is_enemy_node(b, color):
-            component = self.connected_components[color][a_index]
-            component.add(b)
+            component = components[a_index] | (1 << b)
+            components[a_index] = component
+            self._set_components(color, tuple(components))
         elif a_index is not None and b_index is not None and a_index != b_index:
             # Merge both components into one and delete the other.
-            component = set.union(
-                self.connected_components[color][a_index],
-                self.connected_components[color][b_index],
-            )
-            self.connected_components[color][a_index] = component
-            del self.connected_components[color][b_index]
+            component = components[a_index] | components[b_index]
+            components[a_index] = component
+            del components[b_index]
+            self._set_components(color, tuple(components))
         else:
             # In this case, a_index == b_index, which means that the edge
             # is already part of one component. No actions needed.
             chosen_index = a_index if a_index is not None else b_index
-            component = self.connected_components[color][chosen_index]
+            component = components[chosen_index]
 
         # find longest path on component under question
         previous_road_color = self.road_color
-        candidate_length = len(longest_acyclic_path(self, component, color))
-        self.road_lengths[color] = max(self.road_lengths[color], candidate_length)
+        candidate_length = self._longest_road(component, color)
+        self.road_lengths = {
+            **self.road_lengths,
+            color: max(self.road_lengths.get(color, 0), candidate_length),
+        }
         if candidate_length >= 5 and candidate_length > self.road_length:
             self.road_color = color
             self.road_length = candidate_length
@@ -235,47 +358,92 @@ class Board:
         if building is None or building[0] != color or building[1] != SETTLEMENT:
             raise ValueError("Invalid City Placement: no player settlement there")
 
-        self.buildings[node_id] = (color, CITY)
+        self.buildings = {**self.buildings, node_id: (color, CITY)}
+        self.zobrist ^= building_key(node_id, color, SETTLEMENT)
+        self.zobrist ^= building_key(node_id, color, CITY)
+        self._set_node_payouts(node_id, color, 2)
+        node_bit = 1 << node_id
+        self.settlement_mask = {
+            **self.settlement_mask,
+            color: self.settlement_mask[color] & ~node_bit,
+        }
+        self.city_mask = {
+            **self.city_mask,
+            color: self.city_mask.get(color, 0) | node_bit,
+        }
+
+    def move_robber(self, coordinate):
+        self.zobrist ^= robber_key(self.robber_coordinate)
+        self._set_tile_payouts(self.map.land_tiles[self.robber_coordinate], True)
+        self.robber_coordinate = coordinate
+        self.zobrist ^= robber_key(coordinate)
+        self._set_tile_payouts(self.map.land_tiles[coordinate], False)
+
+    def _set_node_payouts(self, node_id, color, amount):
+        """Sets the payouts of (a building of amount at) node_id"""
+        robber_tile = self.map.land_tiles[self.robber_coordinate]
+        payouts = self.payouts
+        for tile in self.map.adjacent_tiles[node_id]:
+            if tile.number is None or tile is robber_tile:
+                continue
+            entries = tuple(
+                entry
+                for entry in payouts.get(tile.number, ())
+                if entry[1] != node_id or entry[0] != tile.id
+            )
+            resource_index = RESOURCE_FREQDECK_INDEXES[tile.resource]
+            entry = (tile.id, node_id, color, resource_index, amount)
+            payouts = {**payouts, tile.number: entries + (entry,)}
+        self.payouts = payouts
+
+    def _set_tile_payouts(self, tile, producing):
+        """Adds (or removes, if not producing) the payouts of tile"""
+        if tile.number is None:
+            return
+        entries = tuple(
+            entry for entry in self.payouts.get(tile.number, ()) if entry[0] != tile.id
+        )
+        if producing:
+            resource_index = RESOURCE_FREQDECK_INDEXES[tile.resource]
+            for node_id in tile.nodes.values():
+                building = self.buildings.get(node_id, None)
+                if building is not None:
+                    amount = 1 if building[1] == SETTLEMENT else 2
+                    entries += ((tile.id, node_id, building[0], resource_index, amount),)
+        self.payouts = {**self.payouts, tile.number: entries}
 
     def buildable_node_ids(self, color: Color, initial_build_phase=False):
+        """Sorted list of node ids where color can build a settlement"""
         if initial_build_phase:
-            return sorted(list(self.board_buildable_ids))
+            return node_ids_of(self.buildable_node_mask)
 
-        subgraphs = self.find_connected_components(color)
-        nodes = set().union(*subgraphs)
-        return sorted(list(nodes.intersection(self.board_buildable_ids)))
+        reachable = self.component_node_mask.get(color, 0)
+        return node_ids_of(reachable & self.buildable_node_mask)
+
+    def buildable_edge_mask(self, color: Color):
+        """Mask of free land edges touching color's connected components"""
+        reachable = self.component_node_mask.get(color, 0)
+        candidate_edges = edges_of_nodes_mask(reachable) & self.land_edge_mask
+        return candidate_edges & ~self.occupied_edge_mask
 
     def buildable_edges(self, color: Color):
-        """List of (n1,n2) tuples. Edges are in n1 < n2 order."""
+        """Sorted list of (n1,n2) tuples. Edges are in n1 < n2 order."""
         if color in self.buildable_edges_cache:
             return self.buildable_edges_cache[color]
 
-        expandable = set()
-
-        # All nodes for this color.
-        # TODO(tonypr): Explore caching for 'expandable_nodes'?
-        # The 'expandable_nodes' set should only increase in size monotonically I think.
-        # We can take advantage of that.
-        expandable_nodes = set()
-        expandable_nodes = expandable_nodes.union(*self.connected_components[color])
-
-        candidate_edges = self.buildable_subgraph.edges(expandable_nodes)
-        for edge in candidate_edges:
-            if self.get_edge_color(edge) is None:
-                expandable.add(tuple(sorted(edge)))
-
-        self.buildable_edges_cache[color] = list(expandable)
+        self.buildable_edges_cache[color] = edges_of(self.buildable_edge_mask(color))
         return self.buildable_edges_cache[color]
 
     def get_player_port_resources(self, color):
-        """Yields resources (None for 3:1) of ports owned by color"""
+        """Frozenset of resources (None for 3:1) of ports owned by color"""
         if color in self.player_port_resources_cache:
             return self.player_port_resources_cache[color]
 
-        resources = set()
-        for resource, node_ids in self.map.port_nodes.items():
-            if any(self.is_friendly_node(node_id, color) for node_id in node_ids):
-                resources.add(resource)
+        resources = frozenset(
+            resource
+            for resource, node_ids in self.map.port_nodes.items()
+            if any(self.is_friendly_node(node_id, color) for node_id in node_ids)
+        )
 
         self.player_port_resources_cache[color] = resources
         return resources
@@ -283,11 +451,11 @@ class Board:
     def find_connected_components(self, color: Color):
         """
         Returns:
-            nx.Graph[]: connected subgraphs. subgraphs
+            Set[NodeId][]: connected subgraphs. subgraphs
                 might include nodes that color doesnt own (on the way and on ends),
                 just to make it is "closed" and easier for buildable_nodes to operate.
         """
-        return self.connected_components[color]
+        return [set(iter_bits(mask)) for mask in self.component_masks.get(color, ())]
 
     def continuous_roads_by_player(self, color: Color):
         paths = []
@@ -297,24 +465,33 @@ class Board:
         return paths
 
     def copy(self):
+        """Structurally shared copy. Containers are never mutated in place
+        (see class docstring), so both boards can safely reference them."""
         board = Board(self.map, initialize=False)
         board.map = self.map  # reuse since its immutable
-        board.buildings = self.buildings.copy()
-        board.roads = self.roads.copy()
-        board.connected_components = pickle.loads(
-            pickle.dumps(self.connected_components)
-        )
-        board.board_buildable_ids = self.board_buildable_ids.copy()
-        board.road_lengths = self.road_lengths.copy()
+        board.buildings = self.buildings
+        board.roads = self.roads
+        board.component_masks = self.component_masks
+        board.road_lengths = self.road_lengths
         board.road_color = self.road_color
         board.road_length = self.road_length
 
         board.robber_coordinate = self.robber_coordinate
-        board.buildable_subgraph = self.buildable_subgraph
-        board.buildable_edges_cache = copy.deepcopy(self.buildable_edges_cache)
-        board.player_port_resources_cache = copy.deepcopy(
-            self.player_port_resources_cache
-        )
+        board.zobrist = self.zobrist
+        board.payouts = self.payouts
+
+        board.settlement_mask = self.settlement_mask
+        board.city_mask = self.city_mask
+        board.road_mask = self.road_mask
+        board.occupied_node_mask = self.occupied_node_mask
+        board.occupied_edge_mask = self.occupied_edge_mask
+        board.buildable_node_mask = self.buildable_node_mask
+        board.component_node_mask = self.component_node_mask
+        board.land_edge_mask = self.land_edge_mask
+        # Caches describe the (identical) current board and get replaced,
+        # not cleared, whenever either board changes.
+        board.buildable_edges_cache = self.buildable_edges_cache
+        board.player_port_resources_cache = self.player_port_resources_cache
         return board
 
     # ===== Helper functions
@@ -332,9 +509,13 @@ class Board:
         except KeyError:
             return None
 
+    def enemy_node_mask(self, color):
+        """Mask of nodes with buildings of colors other than color"""
+        own = self.settlement_mask.get(color, 0) | self.city_mask.get(color, 0)
+        return self.occupied_node_mask & ~own
+
     def is_enemy_node(self, node_id, color):
-        node_color = self.get_node_color(node_id)
-        return node_color is not None and node_color != color
+        return bool((self.enemy_node_mask(color) >> node_id) & 1)
 
     def is_enemy_road(self, edge, color):
         edge_color = self.get_edge_color(edge)
@@ -348,6 +529,8 @@ class Board:
 
 
 def longest_acyclic_path(board: Board, node_set: Set[int], color: Color):
+    enemy_nodes = board.enemy_node_mask(color)
+    road_mask = board.road_mask.get(color, 0)
     paths = []
     for start_node in node_set:
         # do DFS when reach leaf node, stop and add to paths
@@ -357,15 +540,15 @@ def longest_acyclic_path(board: Board, node_set: Set[int], color: Color):
             node, path_thus_far = agenda.pop()
 
             able_to_navigate = False
-            for neighbor_node in STATIC_GRAPH.neighbors(node):
-                edge = tuple(sorted((node, neighbor_node)))
-
+            for edge_id in NODE_EDGES[node]:
                 # Must travel on a friendly road.
-                if not board.is_friendly_road(edge, color):
+                if not (road_mask >> edge_id) & 1:
                     continue
+                neighbor_node = EDGE_NODES[edge_id] ^ node
+                edge = EDGES[edge_id]
 
                 # Can't expand past an enemy node.
-                if board.is_enemy_node(neighbor_node, color):
+                if (enemy_nodes >> neighbor_node) & 1:
                     continue
 
                 if edge not in path_thus_far:
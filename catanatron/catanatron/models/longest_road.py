@@ -0,0 +1,65 @@
+"""
+Longest road computation over bitmasks.
+
+A player's road network is kept by Board as a tuple of connected components,
+each a mask of node ids (see Board.component_masks). The longest road of a
+component is a longest trail (no edge repeated) over the player's roads
+starting at any of its nodes, that doesn't go through enemy buildings.
+
+longest_road_length is a pure function of the few masks that can affect the
+answer and is memoized, so components untouched by a move (e.g. the other
+components of a player whose road got cut, or positions revisited in
+search) are looked up instead of recomputed.
+"""
+
+import functools
+
+from catanatron.models.topology import (
+    EDGE_NODE_MASK,
+    EDGE_NODES,
+    NODE_EDGES,
+    edges_of_nodes_mask,
+    iter_bits,
+)
+
+
+def component_longest_road(component_mask, road_mask, enemy_node_mask):
+    """Length of the longest road within a component.
+
+    Args:
+        component_mask (int): Nodes in the component.
+        road_mask (int): Edges with roads of the component's color.
+        enemy_node_mask (int): Nodes with buildings of other colors.
+    """
+    road_edges = edges_of_nodes_mask(component_mask) & road_mask
+    touched_nodes = 0
+    for edge_id in iter_bits(road_edges):
+        touched_nodes |= EDGE_NODE_MASK[edge_id]
+    return longest_road_length(
+        road_edges, enemy_node_mask & touched_nodes, component_mask
+    )
+
+
+@functools.lru_cache(maxsize=2**16)
+def longest_road_length(road_edges, blocked_nodes, start_nodes):
+    """Longest trail over road_edges starting at any of start_nodes, never
+    entering a node in blocked_nodes (starting at one is fine)."""
+    best = 0
+    total = road_edges.bit_count()
+    for start in iter_bits(start_nodes):
+        agenda = [(start, 0, 0)]  # node, used edges, length
+        while agenda:
+            node, used_edges, length = agenda.pop()
+            if length > best:
+                best = length
+                if best == total:
+                    return best
+            for edge_id in NODE_EDGES[node]:
+                edge_bit = 1 << edge_id
+                if not road_edges & edge_bit or used_edges & edge_bit:
+                    continue
+                neighbor = EDGE_NODES[edge_id] ^ node
+                if (blocked_nodes >> neighbor) & 1:
+                    continue
+                agenda.append((neighbor, used_edges | edge_bit, length + 1))
+    return best
@@ -2,7 +2,20 @@ import typing
 from dataclasses import dataclass
 import random
 from collections import Counter, defaultdict
-from typing import Dict, FrozenSet, List, Literal, Mapping, Set, Tuple, Type, Union
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    List,
+    TYPE_CHECKING,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 from catanatron.models.coordinate_system import Direction, add, UNIT_VECTORS
 from catanatron.models.enums import (
@@ -16,6 +29,9 @@ from catanatron.models.enums import (
     NodeRef,
 )
 
+if TYPE_CHECKING:
+    from catanatron.models.map_pool import MapPool  # requires numpy
+
 NUM_NODES = 54
 NUM_EDGES = 72
 NUM_TILES = 19
@@ -192,6 +208,70 @@ BASE_MAP_TEMPLATE = MapTemplate(
 )
 
 
+@dataclass(frozen=True)
+class MapTopology:
+    """Node and edge ids of a MapTemplate's topology. These don't depend on
+    the (shuffled) resources, numbers and ports, so they are computed once per
+    template (see get_map_topology) and shared by all maps built from it.
+
+    Attributes:
+        entries: (coordinate, tile type, nodes, edges) per topology entry, in
+            template order. The nodes and edges dicts are shared by the tiles
+            of all maps, so they must not be modified.
+        land_nodes: Node ids of land tiles.
+        node_tile_ids: Node id => ids of its adjacent land tiles.
+        port_node_ids: Port id => the two node ids that enable its trades.
+    """
+
+    entries: Tuple[
+        Tuple[Coordinate, Any, Dict[NodeRef, NodeId], Dict[EdgeRef, EdgeId]], ...
+    ]
+    land_nodes: FrozenSet[NodeId]
+    node_tile_ids: Dict[NodeId, Tuple[int, ...]]
+    port_node_ids: Tuple[Tuple[NodeId, NodeId], ...]
+
+
+# id(map_template) => (map_template, topology). Templates hold lists, so they
+#   aren't hashable; keeping them alive here keeps their ids unique.
+_MAP_TOPOLOGIES: Dict[int, Tuple[MapTemplate, MapTopology]] = {}
+
+
+def get_map_topology(map_template: MapTemplate) -> MapTopology:
+    """The (memoized) MapTopology of map_template"""
+    cached = _MAP_TOPOLOGIES.get(id(map_template))
+    if cached is not None:
+        return cached[1]
+
+    entries = []
+    placed: Dict[Coordinate, Water] = {}  # only .nodes and .edges are read
+    node_autoinc = 0
+    tile_autoinc = 0
+    node_tile_ids: Dict[NodeId, List[int]] = {}
+    port_node_ids = []
+    for coordinate, tile_type in map_template.topology.items():
+        nodes, edges, node_autoinc = get_nodes_and_edges(
+            placed, coordinate, node_autoinc
+        )
+        placed[coordinate] = Water(nodes, edges)
+        entries.append((coordinate, tile_type, nodes, edges))
+        if isinstance(tile_type, tuple):  # is port
+            (a_noderef, b_noderef) = PORT_DIRECTION_TO_NODEREFS[tile_type[1]]
+            port_node_ids.append((nodes[a_noderef], nodes[b_noderef]))
+        elif tile_type == LandTile:
+            for node_id in nodes.values():
+                node_tile_ids.setdefault(node_id, []).append(tile_autoinc)
+            tile_autoinc += 1
+
+    topology = MapTopology(
+        tuple(entries),
+        frozenset(node_tile_ids),
+        {node_id: tuple(ids) for node_id, ids in node_tile_ids.items()},
+        tuple(port_node_ids),
+    )
+    _MAP_TOPOLOGIES[id(map_template)] = (map_template, topology)
+    return topology
+
+
 class CatanMap:
     """Represents a randomly initialized map."""
 
@@ -219,30 +299,47 @@ class CatanMap:
     def from_template(map_template: MapTemplate):
         tiles = initialize_tiles(map_template)
 
-        return CatanMap.from_tiles(tiles)
+        return CatanMap.from_tiles(tiles, get_map_topology(map_template))
 
     @staticmethod
-    def from_tiles(tiles: Dict[Coordinate, Tile]):
+    def from_tiles(
+        tiles: Dict[Coordinate, Tile], topology: Optional[MapTopology] = None
+    ):
+        """Builds the map (and its lookups) from initialized tiles. If tiles
+        were initialized from a template, passing its topology skips
+        re-deriving the node-based lookups."""
         self = CatanMap()
         self.tiles = tiles
 
         self.land_tiles = {
             k: v for k, v in self.tiles.items() if isinstance(v, LandTile)
         }
+        self.tiles_by_id = {t.id: t for t in self.land_tiles.values()}
+        self.ports_by_id = {p.id: p for p in self.tiles.values() if isinstance(p, Port)}
 
-        # initialize auxiliary data structures for fast-lookups
-        self.port_nodes = init_port_nodes_cache(self.tiles)
+        if topology is None:
+            # initialize auxiliary data structures for fast-lookups
+            self.port_nodes = init_port_nodes_cache(self.tiles)
 
-        land_nodes_list = map(lambda t: set(t.nodes.values()), self.land_tiles.values())
-        self.land_nodes = frozenset().union(*land_nodes_list)
+            land_nodes_list = map(
+                lambda t: set(t.nodes.values()), self.land_tiles.values()
+            )
+            self.land_nodes = frozenset().union(*land_nodes_list)
 
-        # TODO: Rename to self.node_to_tiles
-        self.adjacent_tiles = init_adjacent_tiles(self.land_tiles)
+            # TODO: Rename to self.node_to_tiles
+            self.adjacent_tiles = init_adjacent_tiles(self.land_tiles)
+        else:
+            self.port_nodes = defaultdict(set)
+            for port in self.ports_by_id.values():
+                self.port_nodes[port.resource].update(
+                    topology.port_node_ids[port.id]
+                )
+            self.land_nodes = topology.land_nodes
+            tiles_by_id = self.tiles_by_id
+            self.adjacent_tiles = defaultdict(list)
+            for node_id, tile_ids in topology.node_tile_ids.items():
+                self.adjacent_tiles[node_id] = [tiles_by_id[i] for i in tile_ids]
         self.node_production = init_node_production(self.adjacent_tiles)
-        self.tiles_by_id = {
-            t.id: t for t in self.tiles.values() if isinstance(t, LandTile)
-        }
-        self.ports_by_id = {p.id: p for p in self.tiles.values() if isinstance(p, Port)}
 
         return self
 
@@ -293,12 +390,11 @@ def init_node_production(
 def get_node_counter_production(
     adjacent_tiles: Dict[int, List[LandTile]], node_id: NodeId
 ):
-    tiles = adjacent_tiles[node_id]
-    production = defaultdict(float)
-    for tile in tiles:
+    production = Counter()
+    for tile in adjacent_tiles[node_id]:
         if tile.resource is not None:
-            production[tile.resource] += number_probability(tile.number)
-    return Counter(production)
+            production[tile.resource] += DICE_PROBAS[tile.number]
+    return production
 
 
 def build_dice_probas():
@@ -325,8 +421,8 @@ def initialize_tiles(
     """Initializes a new random board, based on the MapTemplate.
 
     It first shuffles tiles, ports, and numbers. Then goes satisfying the
-    topology (i.e. placing tiles on coordinates); ensuring to "attach" these to
-    neighbor tiles (so as to not repeat nodes or edges objects).
+    topology (i.e. placing tiles on coordinates), reusing the template's
+    node and edge ids (see get_map_topology).
 
     Args:
         map_template (MapTemplate): Template to initialize.
@@ -347,16 +443,13 @@ def initialize_tiles(
         map_template.numbers, len(map_template.numbers)
     )
 
-    # for each topology entry, place a tile. keep track of nodes and edges
+    # for each topology entry, place a tile (nodes and edges are precomputed)
     all_tiles: Dict[Coordinate, Tile] = {}
-    node_autoinc = 0
     tile_autoinc = 0
     port_autoinc = 0
-    for coordinate, tile_type in map_template.topology.items():
-        nodes, edges, node_autoinc = get_nodes_and_edges(
-            all_tiles, coordinate, node_autoinc
-        )
-
+    for coordinate, tile_type, nodes, edges in get_map_topology(
+        map_template
+    ).entries:
         # create and save tile
         if isinstance(tile_type, tuple):  # is port
             (_, direction) = tile_type
@@ -516,7 +609,23 @@ TOURNAMENT_MAP_TILES = initialize_tiles(
 TOURNAMENT_MAP = CatanMap.from_tiles(TOURNAMENT_MAP_TILES)
 
 
-def build_map(map_type: Literal["BASE", "TOURNAMENT", "MINI"]):
+def build_map(
+    map_type: Literal["BASE", "TOURNAMENT", "MINI"],
+    map_pool: Optional["MapPool"] = None,
+    map_index: Optional[int] = None,
+):
+    """Map of map_type: a new random one, or if map_pool is given, the pool's
+    map at map_index (a random index if None). Pool maps are of the pool's
+    map type (BASE or MINI, which has to be map_type), and shared, like
+    TOURNAMENT_MAP."""
+    if map_pool is not None:
+        if map_pool.map_type != map_type:
+            raise ValueError(
+                f"Map pool has {map_pool.map_type} maps, not {map_type} ones"
+            )
+        if map_index is None:
+            map_index = random.randrange(len(map_pool))
+        return map_pool[map_index]
     if map_type == "TOURNAMENT":
         return TOURNAMENT_MAP  # this assumes map is read-only data struct
     elif map_type == "MINI":
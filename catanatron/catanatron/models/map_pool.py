@@ -0,0 +1,192 @@
+"""
+Pools of pre-generated maps, stored in a memory-mapped .npy file.
+
+MapPool.generate writes random maps of a template to a file: the resource,
+number and port of each tile, plus derived tables (node production, port node
+masks) for vectorized consumers. MapPool(path) memory-maps the file, so
+opening a pool of millions of maps reads nothing but the header, and
+pool[index] (or build_map(map_type, map_pool, index)) returns that map. The
+same (file, index) always gives the same map, so experiments can be
+reproduced, and split among workers by index. Pools pickle as just their path,
+so each worker process maps the file itself.
+
+Requires numpy.
+"""
+
+import functools
+import random
+from typing import Literal
+
+import numpy as np
+
+from catanatron.models.enums import RESOURCES
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    DICE_PROBAS,
+    MINI_MAP_TEMPLATE,
+    CatanMap,
+    MapTemplate,
+    get_map_topology,
+    initialize_tiles,
+)
+
+MAP_TEMPLATES = {"BASE": BASE_MAP_TEMPLATE, "MINI": MINI_MAP_TEMPLATE}
+THREE_TO_ONE = len(RESOURCES)  # port_node_masks index of 3:1 ports
+GENERATE_CHUNK_SIZE = 4096
+
+
+def map_dtype(map_template: MapTemplate) -> np.dtype:
+    """Record of a map of map_template. Tiles and ports are by id.
+
+    Fields:
+        tile_resources: RESOURCES index (-1 for the desert) per land tile.
+        tile_numbers: Number per land tile (0 for the desert).
+        port_resources: RESOURCES index (-1 for 3:1) per port.
+        node_production: Node id => expected cards per roll, per resource.
+        port_node_masks: Mask of node ids that trade at each resource's 2:1
+            port (by RESOURCES index), and at 3:1 ports (last).
+    """
+    topology = get_map_topology(map_template)
+    num_tiles = len(map_template.tile_resources)
+    return np.dtype(
+        [
+            ("tile_resources", np.int8, (num_tiles,)),
+            ("tile_numbers", np.int8, (num_tiles,)),
+            ("port_resources", np.int8, (len(topology.port_node_ids),)),
+            ("node_production", np.float32, (len(topology.land_nodes), 5)),
+            ("port_node_masks", np.int64, (len(RESOURCES) + 1,)),
+        ]
+    )
+
+
+def _map_template(map_type):
+    if map_type not in MAP_TEMPLATES:
+        raise ValueError(
+            f"Map pools are of {' or '.join(MAP_TEMPLATES)} maps, not {map_type}"
+        )
+    return MAP_TEMPLATES[map_type]
+
+
+class MapPool:
+    """Memory-mapped pool of maps of one map type (see module docstring).
+
+    Args:
+        path (str): File written by MapPool.generate.
+        map_type (str, optional): Map type the pool was generated with.
+            Defaults to "BASE".
+        cache_size (int, optional): Number of recently used maps kept built
+            (maps are read-only, so games can share them). Defaults to 256.
+    """
+
+    def __init__(
+        self,
+        path,
+        map_type: Literal["BASE", "MINI"] = "BASE",
+        cache_size: int = 256,
+    ):
+        self.path = path
+        self.map_type = map_type
+        self.cache_size = cache_size
+        self.map_template = _map_template(map_type)
+        self.tables = np.load(path, mmap_mode="r")
+        if self.tables.dtype != map_dtype(self.map_template):
+            raise ValueError(f"{path} is not a pool of {map_type} maps")
+        self._get_map = functools.lru_cache(maxsize=cache_size)(self._build_map)
+
+    @staticmethod
+    def generate(
+        path,
+        num_maps: int,
+        map_type: Literal["BASE", "MINI"] = "BASE",
+        seed=None,
+    ) -> "MapPool":
+        """Writes num_maps random maps of map_type to path, and opens it"""
+        map_template = _map_template(map_type)
+        topology = get_map_topology(map_template)
+        dtype = map_dtype(map_template)
+        rng = random.Random(seed)
+        resource_indices = [
+            -1 if resource is None else RESOURCES.index(resource)
+            for resource in map_template.tile_resources
+        ]
+        port_indices = [
+            THREE_TO_ONE if resource is None else RESOURCES.index(resource)
+            for resource in map_template.port_resources
+        ]
+        port_masks = np.array(
+            [(1 << a) | (1 << b) for a, b in topology.port_node_ids], dtype=np.int64
+        )
+        # node_tiles[node_id, tile_id] => whether tile is adjacent to node
+        node_tiles = np.zeros((len(topology.land_nodes), len(resource_indices)))
+        for node_id, tile_ids in topology.node_tile_ids.items():
+            node_tiles[node_id, list(tile_ids)] = 1
+        probas = np.array([DICE_PROBAS.get(number, 0.0) for number in range(13)])
+
+        tables = np.lib.format.open_memmap(
+            path, mode="w+", dtype=dtype, shape=(num_maps,)
+        )
+        for start in range(0, num_maps, GENERATE_CHUNK_SIZE):
+            chunk = tables[start : start + GENERATE_CHUNK_SIZE]
+            resources = np.array(
+                [
+                    rng.sample(resource_indices, len(resource_indices))
+                    for _ in range(len(chunk))
+                ],
+                dtype=np.int8,
+            ).reshape(len(chunk), len(resource_indices))
+            numbers = np.zeros(resources.shape, dtype=np.int8)
+            for row, desert in zip(numbers, resources == -1):
+                row[~desert] = rng.sample(map_template.numbers, (~desert).sum())
+            ports = np.array(
+                [
+                    rng.sample(port_indices, len(port_indices))
+                    for _ in range(len(chunk))
+                ],
+                dtype=np.int8,
+            ).reshape(len(chunk), len(port_indices))
+
+            chunk["tile_resources"] = resources
+            chunk["tile_numbers"] = numbers
+            chunk["port_resources"] = np.where(ports == THREE_TO_ONE, -1, ports)
+            tile_probas = probas[numbers]
+            for index in range(len(RESOURCES)):
+                chunk["node_production"][:, :, index] = (
+                    tile_probas * (resources == index)
+                ) @ node_tiles.T
+            for index in range(len(RESOURCES) + 1):
+                chunk["port_node_masks"][:, index] = np.bitwise_or.reduce(
+                    np.where(ports == index, port_masks, 0), axis=1
+                )
+        tables.flush()
+        del tables
+        return MapPool(path, map_type)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __getitem__(self, index) -> CatanMap:
+        return self._get_map(index)
+
+    def _build_map(self, index) -> CatanMap:
+        record = self.tables[index]
+        resources = [
+            None if i < 0 else RESOURCES[i] for i in record["tile_resources"].tolist()
+        ]
+        numbers = [number for number in record["tile_numbers"].tolist() if number]
+        ports = [
+            None if i < 0 else RESOURCES[i] for i in record["port_resources"].tolist()
+        ]
+        # initialize_tiles pops (assigns from the end), and tables are by id
+        tiles = initialize_tiles(
+            self.map_template, numbers[::-1], ports[::-1], resources[::-1]
+        )
+        return CatanMap.from_tiles(tiles, get_map_topology(self.map_template))
+
+    def __getstate__(self):
+        return (self.path, self.map_type, self.cache_size)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __repr__(self):
+        return f"MapPool({self.path!r}, {self.map_type!r}) with {len(self)} maps"
@@ -0,0 +1,144 @@
+"""
+Static topology of the (base) board: nodes, edges and their adjacencies as
+integer-indexed tables and bitmasks. Hot paths use these instead of a
+networkx graph; static_graph() builds the networkx equivalent (lazily) for
+the rare utilities that need it (e.g. all-pairs distances).
+
+Land node ids are 0..NUM_NODES-1 (as in CatanMap). Land edges get a canonical
+id 0..NUM_EDGES-1, in sorted (n1 < n2) order, so that masks over nodes and
+edges fit in a Python int (see Board's *_mask attributes). Only NEIGHBORS
+includes the water nodes around the land (which can't hold buildings or roads).
+"""
+
+import functools
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    NUM_EDGES,
+    NUM_NODES,
+    CatanMap,
+    EdgeId,
+)
+
+_base_map = CatanMap.from_template(BASE_MAP_TEMPLATE)
+
+
+def _neighbors():
+    # Same order networkx's Graph.add_edges_from gives (adjacency lists keep
+    # the first insertion), so iteration orders match the old STATIC_GRAPH.
+    adjacency: Dict[int, List[int]] = {}
+    for tile in _base_map.tiles.values():
+        for node_id in tile.nodes.values():
+            adjacency.setdefault(node_id, [])
+        for a, b in tile.edges.values():
+            if b not in adjacency[a]:
+                adjacency[a].append(b)
+                adjacency[b].append(a)
+    return tuple(tuple(adjacency[node_id]) for node_id in range(len(adjacency)))
+
+
+# NEIGHBORS[node_id] => adjacent node ids (land and water nodes)
+NEIGHBORS: Tuple[Tuple[int, ...], ...] = _neighbors()
+
+# EDGES[edge_id] => (n1, n2) with n1 < n2. Land edges only.
+EDGES: Tuple[EdgeId, ...] = tuple(
+    sorted(
+        (a, b)
+        for a in range(NUM_NODES)
+        for b in NEIGHBORS[a]
+        if a < b and b < NUM_NODES
+    )
+)
+assert len(EDGES) == NUM_EDGES
+# Both orientations of an edge => edge_id
+EDGE_ID: Dict[EdgeId, int] = {
+    **{(a, b): i for i, (a, b) in enumerate(EDGES)},
+    **{(b, a): i for i, (a, b) in enumerate(EDGES)},
+}
+# EDGE_NODES[edge_id] => n1 ^ n2. So the other end of edge_id from node n is
+#   EDGE_NODES[edge_id] ^ n.
+EDGE_NODES: Tuple[int, ...] = tuple(a ^ b for a, b in EDGES)
+# EDGE_NODE_MASK[edge_id] => mask of both ends
+EDGE_NODE_MASK: Tuple[int, ...] = tuple((1 << a) | (1 << b) for a, b in EDGES)
+
+# NODE_EDGES[node_id] => ids of incident land edges (in NEIGHBORS order)
+NODE_EDGES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(EDGE_ID[(a, b)] for b in NEIGHBORS[a] if b < NUM_NODES)
+    for a in range(NUM_NODES)
+)
+
+# NODE_NEIGHBOR_MASK[node_id] => mask of adjacent land nodes
+NODE_NEIGHBOR_MASK = [0] * NUM_NODES
+# NODE_EDGE_MASK[node_id] => mask of incident land edges
+NODE_EDGE_MASK = [0] * NUM_NODES
+for _edge_id, (_a, _b) in enumerate(EDGES):
+    NODE_NEIGHBOR_MASK[_a] |= 1 << _b
+    NODE_NEIGHBOR_MASK[_b] |= 1 << _a
+    NODE_EDGE_MASK[_a] |= 1 << _edge_id
+    NODE_EDGE_MASK[_b] |= 1 << _edge_id
+NODE_NEIGHBOR_MASK = tuple(NODE_NEIGHBOR_MASK)
+NODE_EDGE_MASK = tuple(NODE_EDGE_MASK)
+
+
+@functools.lru_cache(3)  # None, range(54), range(24)
+def get_edges(land_nodes: Optional[Iterable[int]] = None) -> List[EdgeId]:
+    """Edges among land_nodes (default: all land nodes) as (n1, n2) tuples"""
+    nodes = set(land_nodes or range(NUM_NODES))
+    return [
+        (a, b) for a in sorted(nodes) for b in NEIGHBORS[a] if a < b and b in nodes
+    ]
+
+
+@functools.lru_cache(1)
+def static_graph():
+    """networkx Graph of all (land and water) nodes and edges. Only meant
+    for utilities off the hot path."""
+    import networkx as nx  # type: ignore
+
+    graph = nx.Graph()
+    for tile in _base_map.tiles.values():
+        graph.add_nodes_from(tile.nodes.values())
+        graph.add_edges_from(tile.edges.values())
+    return graph
+
+
+def iter_bits(mask):
+    """Yields the indices of the set bits of mask, in increasing order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def nodes_mask(node_ids):
+    mask = 0
+    for node_id in node_ids:
+        mask |= 1 << node_id
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def land_edges_mask(land_nodes_mask):
+    """Mask of edges with both ends in land_nodes_mask"""
+    mask = 0
+    for edge_id, (a, b) in enumerate(EDGES):
+        if (land_nodes_mask >> a) & 1 and (land_nodes_mask >> b) & 1:
+            mask |= 1 << edge_id
+    return mask
+
+
+def edges_of_nodes_mask(node_mask):
+    """Mask of edges incident to any node in node_mask"""
+    mask = 0
+    for node_id in iter_bits(node_mask):
+        mask |= NODE_EDGE_MASK[node_id]
+    return mask
+
+
+def node_ids_of(mask) -> List[int]:
+    return list(iter_bits(mask))
+
+
+def edges_of(mask) -> List[EdgeId]:
+    return [EDGES[edge_id] for edge_id in iter_bits(mask)]
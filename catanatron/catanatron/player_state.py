@@ -0,0 +1,165 @@
+"""
+Flat representation of per-player state.
+
+All players' fields live in a single array of int16s (State.player_buffer),
+one block of NUM_PLAYER_FIELDS values per seat. Fields are addressed with the
+integer offsets defined here (e.g. buffer[seat_offset + WOOD_IN_HAND]) so the
+hot getters and mutators in state_functions.py don't have to format and hash
+"P{index}_{FIELD}" keys. Copying all player state is a single memcpy
+(buffer[:]), and takes 2 bytes per field. Boolean fields are stored as 0/1.
+
+PlayerStateView exposes the same buffer with the historical string keys
+(e.g. "P0_ACTUAL_VICTORY_POINTS") for feature extraction, JSON encoding, etc...
+"""
+
+import functools
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, FrozenSet, Tuple
+
+from catanatron.models.enums import DEVELOPMENT_CARDS, RESOURCES, VICTORY_POINT
+
+# These will be prefixed by P0_, P1_, ... in PlayerStateView.
+# Create Player State blueprint
+PLAYER_INITIAL_STATE = {
+    "VICTORY_POINTS": 0,
+    "ROADS_AVAILABLE": 15,
+    "SETTLEMENTS_AVAILABLE": 5,
+    "CITIES_AVAILABLE": 4,
+    "HAS_ROAD": False,
+    "HAS_ARMY": False,
+    "HAS_ROLLED": False,
+    "HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN": False,
+    # de-normalized features (for performance since we think they are good features)
+    "ACTUAL_VICTORY_POINTS": 0,
+    "LONGEST_ROAD_LENGTH": 0,
+    "KNIGHT_OWNED_AT_START": False,
+    "MONOPOLY_OWNED_AT_START": False,
+    "YEAR_OF_PLENTY_OWNED_AT_START": False,
+    "ROAD_BUILDING_OWNED_AT_START": False,
+}
+for resource in RESOURCES:
+    PLAYER_INITIAL_STATE[f"{resource}_IN_HAND"] = 0
+for dev_card in DEVELOPMENT_CARDS:
+    PLAYER_INITIAL_STATE[f"{dev_card}_IN_HAND"] = 0
+    PLAYER_INITIAL_STATE[f"PLAYED_{dev_card}"] = 0
+
+PLAYER_FIELDS: Tuple[str, ...] = tuple(PLAYER_INITIAL_STATE.keys())
+NUM_PLAYER_FIELDS = len(PLAYER_FIELDS)
+FIELD_OFFSETS: Dict[str, int] = {field: i for i, field in enumerate(PLAYER_FIELDS)}
+# Offsets of fields PlayerStateView reads back as bools
+BOOL_OFFSETS: FrozenSet[int] = frozenset(
+    FIELD_OFFSETS[field]
+    for field, value in PLAYER_INITIAL_STATE.items()
+    if isinstance(value, bool)
+)
+PLAYER_BUFFER_TYPECODE = "h"
+
+# ===== Field offsets (relative to the start of a seat's block)
+VICTORY_POINTS = FIELD_OFFSETS["VICTORY_POINTS"]
+ROADS_AVAILABLE = FIELD_OFFSETS["ROADS_AVAILABLE"]
+SETTLEMENTS_AVAILABLE = FIELD_OFFSETS["SETTLEMENTS_AVAILABLE"]
+CITIES_AVAILABLE = FIELD_OFFSETS["CITIES_AVAILABLE"]
+HAS_ROAD = FIELD_OFFSETS["HAS_ROAD"]
+HAS_ARMY = FIELD_OFFSETS["HAS_ARMY"]
+HAS_ROLLED = FIELD_OFFSETS["HAS_ROLLED"]
+HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN = FIELD_OFFSETS[
+    "HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"
+]
+ACTUAL_VICTORY_POINTS = FIELD_OFFSETS["ACTUAL_VICTORY_POINTS"]
+LONGEST_ROAD_LENGTH = FIELD_OFFSETS["LONGEST_ROAD_LENGTH"]
+
+WOOD_IN_HAND = FIELD_OFFSETS["WOOD_IN_HAND"]
+BRICK_IN_HAND = FIELD_OFFSETS["BRICK_IN_HAND"]
+SHEEP_IN_HAND = FIELD_OFFSETS["SHEEP_IN_HAND"]
+WHEAT_IN_HAND = FIELD_OFFSETS["WHEAT_IN_HAND"]
+ORE_IN_HAND = FIELD_OFFSETS["ORE_IN_HAND"]
+# Resources are contiguous (in RESOURCES order), so a hand freqdeck is
+#   buffer[base + WOOD_IN_HAND : base + HAND_END].
+HAND_END = ORE_IN_HAND + 1
+assert HAND_END - WOOD_IN_HAND == len(RESOURCES)
+
+RESOURCE_IN_HAND = {r: FIELD_OFFSETS[f"{r}_IN_HAND"] for r in RESOURCES}
+DEV_CARD_IN_HAND = {d: FIELD_OFFSETS[f"{d}_IN_HAND"] for d in DEVELOPMENT_CARDS}
+PLAYED_DEV_CARD = {d: FIELD_OFFSETS[f"PLAYED_{d}"] for d in DEVELOPMENT_CARDS}
+# Any card (resource or development) => its _IN_HAND offset
+CARD_IN_HAND = {**RESOURCE_IN_HAND, **DEV_CARD_IN_HAND}
+DEV_CARD_OWNED_AT_START = {
+    d: FIELD_OFFSETS[f"{d}_OWNED_AT_START"]
+    for d in DEVELOPMENT_CARDS
+    if d != VICTORY_POINT
+}
+
+
+def initial_player_buffer(num_players):
+    """Returns a fresh buffer with PLAYER_INITIAL_STATE for each seat."""
+    return array(PLAYER_BUFFER_TYPECODE, PLAYER_INITIAL_STATE.values()) * num_players
+
+
+@functools.lru_cache(8)
+def player_state_bool_positions(num_players) -> FrozenSet[int]:
+    """Absolute buffer positions of boolean fields."""
+    return frozenset(
+        index * NUM_PLAYER_FIELDS + offset
+        for index in range(num_players)
+        for offset in BOOL_OFFSETS
+    )
+
+
+@functools.lru_cache(8)
+def player_state_keys(num_players) -> Dict[str, int]:
+    """Mapping of "P{index}_{FIELD}" keys to absolute buffer positions."""
+    keys = {}
+    for index in range(num_players):
+        for field, offset in FIELD_OFFSETS.items():
+            keys[f"P{index}_{field}"] = index * NUM_PLAYER_FIELDS + offset
+    return keys
+
+
+class PlayerStateView(MutableMapping):
+    """Dict-like view over a State's player buffer.
+
+    Keys look like { P0_HAS_ROAD: False, P1_SETTLEMENTS_AVAILABLE: 18, ... }.
+    Reads and writes go straight to the underlying buffer (boolean fields
+    are converted back to bools), writes through player_buffer_set, so the
+    state's Zobrist hash stays in sync. Keys can't be added or removed (the
+    layout is fixed).
+    """
+
+    __slots__ = ("_state", "_buffer", "_keys", "_bools")
+
+    def __init__(self, state):
+        buffer = state.player_buffer
+        self._state = state
+        self._buffer = buffer
+        self._keys = player_state_keys(len(buffer) // NUM_PLAYER_FIELDS)
+        self._bools = player_state_bool_positions(len(buffer) // NUM_PLAYER_FIELDS)
+
+    def __getitem__(self, key):
+        position = self._keys[key]
+        if position in self._bools:
+            return bool(self._buffer[position])
+        return self._buffer[position]
+
+    def __setitem__(self, key, value):
+        from catanatron.state_functions import player_buffer_set
+
+        player_buffer_set(self._state, self._keys[key], value)
+
+    def __delitem__(self, key):
+        raise TypeError("Player state keys can't be removed")
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"PlayerStateView({self.copy()!r})"
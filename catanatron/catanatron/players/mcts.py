@@ -2,11 +2,17 @@ import math
 import time
 from collections import defaultdict
 import random
+import uuid
 
 from catanatron.game import Game
+from catanatron.models.enums import ActionType
 from catanatron.models.player import Player
-from catanatron.players.playouts import run_playout
-from catanatron.players.tree_search_utils import execute_spectrum, list_prunned_actions
+from catanatron.players.playouts import fast_playout
+from catanatron.players.tree_search_utils import (
+    execute_outcome,
+    list_prunned_actions,
+    list_spectrum,
+)
 
 SIMULATIONS = 10
 epsilon = 1e-8
@@ -14,10 +20,49 @@ EXP_C = 2**0.5
 
 
 class MCTSPlayer(Player):
-    def __init__(self, color, num_simulations=SIMULATIONS, prunning=False):
+    """Monte Carlo Tree Search with random playouts.
+
+    With num_workers > 1, simulations run in a pool of that many processes
+    (started on the first such decision, and then shared by all searches,
+    see players/search_pool.py). By default, each worker grows a tree of its
+    own with its share of num_simulations (root parallelization), and their
+    root statistics are summed. With tree_parallel=True, there is one tree,
+    which selects num_workers leaves at a time, and the workers play them
+    out. Nodes count a visit as soon as it's selected, so until its playout
+    is back, it's a loss (a virtual loss) that steers the other selections
+    elsewhere.
+
+    The tree is kept between decisions: the next one starts from the node of
+    the actions taken since (e.g. the roll and build of the same turn), if
+    it got explored, with the simulations of before (reuse_tree=False
+    starts over each time). Workers' trees aren't kept, so with root
+    parallelization only the merged statistics of its children are.
+    """
+
+    def __init__(
+        self,
+        color,
+        num_simulations=SIMULATIONS,
+        prunning=False,
+        num_workers=1,
+        tree_parallel=False,
+        reuse_tree=True,
+    ):
         super().__init__(color)
         self.num_simulations = int(num_simulations)
         self.prunning = bool(prunning)
+        self.num_workers = int(num_workers)
+        self.tree_parallel = str(tree_parallel).lower() != "false"
+        self.search_id = str(uuid.uuid4())  # for workers to tell players apart
+        self.reuse_tree = str(reuse_tree).lower() != "false"
+        self.tree = None  # (game id, log length, root) of the last search
+
+    def reset_state(self):
+        self.tree = None
+
+    def __getstate__(self):
+        # Without the kept tree (e.g. when sent to search pool workers)
+        return {**self.__dict__, "tree": None}
 
     def decide(self, game: Game, playable_actions):
         actions = list_prunned_actions(game) if self.prunning else playable_actions
@@ -25,25 +70,120 @@ class MCTSPlayer(Player):
             return actions[0]
 
         start = time.time()
-        root = StateNode(self.color, game.copy(), None, self.prunning)
-        for _ in range(self.num_simulations):
-            root.run_simulation()
+        root = self.search(game)
 
         # print(
         #     f"{str(self)} took {time.time() - start} secs to decide {len(playable_actions)}"
         # )
         return root.choose_best_action()
 
+    def search(self, game):
+        """Runs num_simulations from game. Returns the root StateNode (with
+        the statistics of the workers' trees, with root parallelization)."""
+        root = self.reused_root(game)
+        if root is None:
+            root = StateNode(self.color, game.copy(), None, self.prunning)
+        if self.reuse_tree:
+            self.tree = (game.id, len(game.state.actions), root)
+
+        if self.num_workers == 1:
+            for _ in range(self.num_simulations):
+                root.run_simulation()
+            return root
+
+        from catanatron.players.search_pool import get_search_pool
+
+        pool = get_search_pool(self.num_workers)
+        if self.tree_parallel:
+            for start in range(0, self.num_simulations, self.num_workers):
+                batch = min(self.num_workers, self.num_simulations - start)
+                leaves = [root.select_leaf() for _ in range(batch)]
+                tasks = [
+                    ("playout", random.randrange(2**32), leaf.outcome_actions())
+                    for leaf in leaves
+                    if leaf.result is None
+                ]
+                winners = iter(pool.run(self, game, tasks))
+                for leaf in leaves:
+                    winner = next(winners) if leaf.result is None else leaf.result
+                    leaf.backpropagate(winner == self.color)
+            return root
+
+        share, remainder = divmod(self.num_simulations, self.num_workers)
+        tasks = [
+            ("simulations", random.randrange(2**32), share + (i < remainder))
+            for i in range(min(self.num_workers, self.num_simulations))
+        ]
+        if root.is_leaf():  # else expanded too, by the same game
+            root.expand()  # as the workers' roots, so children are in the same order
+        for wins, visits, children_stats in pool.run(self, game, tasks):
+            root.wins += wins
+            root.visits += visits
+            for children, stats in zip(root.children.values(), children_stats):
+                for (child, _), (child_wins, child_visits) in zip(children, stats):
+                    child.wins += child_wins
+                    child.visits += child_visits
+        return root
+
+    def reused_root(self, game):
+        """The node of the last search's tree for game's state (reached by
+        the actions taken since), as a root. None if there isn't one."""
+        if self.tree is None:
+            return None
+        game_id, length, node = self.tree
+        self.tree = None  # let it go, but for the subtree returned
+        log = game.state.actions
+        if game_id != game.id or len(log) < length:
+            return None
+        for action in log[length:]:
+            node = node.find_child(action)
+            if node is None:
+                return None
+        if node.game.state.zobrist != game.state.zobrist:
+            return None  # e.g. discarded other cards than imagined
+
+        node.parent = None
+        node.outcome_action = None
+        return node
+
+    def run_search_task(self, game, task, alpha):
+        """Runs a task of search, in a search pool worker: either simulations
+        (returns the root's and its children's wins and visits) or a playout
+        from the game of the given outcome actions (returns the winner)."""
+        kind, seed, argument = task
+        random.seed(seed)
+        if kind == "simulations":
+            root = StateNode(self.color, game.copy(), None, self.prunning)
+            for _ in range(argument):
+                root.run_simulation()
+            children_stats = [
+                [(child.wins, child.visits) for child, _ in children]
+                for children in root.children.values()
+            ]
+            return root.wins, root.visits, children_stats
+
+        leaf_game = game.copy()
+        for outcome_action in argument:
+            execute_outcome(leaf_game, outcome_action)
+        winner, _ = fast_playout(leaf_game.state, random, vps_to_win=game.vps_to_win)
+        return winner
+
     def __repr__(self):
         return super().__repr__() + f"({self.num_simulations}:{self.prunning})"
 
 
 class StateNode:
-    def __init__(self, color, game, parent, prunning=False):
+    """Node of the search tree. Children (outcomes of each action) are nodes
+    with an outcome_action instead of a game: their game (the parent's, with
+    outcome_action applied) is only copied and built when first needed,
+    i.e. when a simulation gets to them."""
+
+    def __init__(self, color, game, parent, prunning=False, outcome_action=None):
         self.level = 0 if parent is None else parent.level + 1
         self.color = color  # color of player carrying out MCTS
         self.parent = parent
-        self.game = game  # state
+        self._game = game  # state
+        self.outcome_action = outcome_action
         self.children = []
         self.prunning = prunning
 
@@ -52,6 +192,14 @@ class StateNode:
         self.result = None  # set if terminal
 
     def run_simulation(self):
+        leaf = self.select_leaf()
+        result = leaf.result if leaf.result is not None else leaf.playout()
+        leaf.backpropagate(result == self.color)
+
+    def select_leaf(self):
+        """Selects (and expands) down to the node to play out next, counting
+        a visit to each node on the way. Sets the node's result if the game
+        is over there."""
         # select
         tmp = self
         tmp.visits += 1
@@ -64,14 +212,40 @@ class StateNode:
             tmp.expand()
             tmp = tmp.select()
             tmp.visits += 1
-
-            # playout
-            result = tmp.playout()
         else:
-            result = self.game.winning_color()
+            tmp.result = tmp.game.winning_color()
+        return tmp
+
+    def find_child(self, action):
+        """Child for action as logged (that is, with its outcome). None if
+        it wasn't explored."""
+        if self.is_leaf():
+            return None
+        for children in self.children.values():
+            for child, _ in children:
+                if child.outcome_action == action or (
+                    action.action_type == ActionType.ROLL
+                    and child.outcome_action.action_type == ActionType.ROLL
+                    and sum(child.outcome_action.value) == sum(action.value)
+                ):
+                    return child
+        return None
+
+    def outcome_actions(self):
+        """Outcome actions from the root's game to this node's"""
+        actions = []
+        tmp = self
+        while tmp.parent is not None:
+            actions.append(tmp.outcome_action)
+            tmp = tmp.parent
+        return actions[::-1]
 
-        # backpropagate
-        tmp.backpropagate(result == self.color)
+    @property
+    def game(self):
+        if self._game is None:
+            self._game = self.parent.game.copy()
+            execute_outcome(self._game, self.outcome_action)
+        return self._game
 
     def is_leaf(self):
         return len(self.children) == 0
@@ -84,11 +258,11 @@ class StateNode:
         playable_actions = self.game.state.playable_actions
         actions = list_prunned_actions(self.game) if self.prunning else playable_actions
         for action in actions:
-            outcomes = execute_spectrum(self.game, action)
-            for state, proba in outcomes:
-                children[action].append(
-                    (StateNode(self.color, state, self, self.prunning), proba)
+            for outcome_action, proba in list_spectrum(self.game, action):
+                child = StateNode(
+                    self.color, None, self, self.prunning, outcome_action
                 )
+                children[action].append((child, proba))
         self.children = children
 
     def select(self):
@@ -122,7 +296,10 @@ class StateNode:
         return score
 
     def playout(self):
-        return run_playout(self.game)
+        winner, _ = fast_playout(
+            self.game.state, random, vps_to_win=self.game.vps_to_win
+        )
+        return winner
 
     def backpropagate(self, value):
         self.wins += value
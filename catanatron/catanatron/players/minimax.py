@@ -1,18 +1,32 @@
 import time
 import random
-from typing import Any
+import uuid
+from collections import defaultdict
+from contextlib import closing
+from typing import Any, Dict, List
 
 from catanatron.game import Game
+from catanatron.models.enums import ActionType
 from catanatron.models.player import Player
-from catanatron.players.tree_search_utils import expand_spectrum, list_prunned_actions
+from catanatron.players.transposition_table import (
+    DEFAULT_CAPACITY,
+    TranspositionTable,
+)
+from catanatron.players.tree_search_utils import (
+    apply_outcomes,
+    list_prunned_actions,
+    list_spectrum,
+)
 from catanatron.players.value import (
     DEFAULT_WEIGHTS,
     get_value_fn,
+    hand_value_spread,
 )
 
 
 ALPHABETA_DEFAULT_DEPTH = 2
 MAX_SEARCH_TIME_SECS = 20
+NUM_KILLERS = 2  # killer moves remembered per ply
 
 
 class AlphaBetaPlayer(Player):
@@ -21,6 +35,34 @@ class AlphaBetaPlayer(Player):
     is taken to be the expected value (using the probability of rolls, etc...)
     of its children. At leafs we simply use the heuristic function given.
 
+    Searches with iterative deepening (depth 1, 2, ... up to depth), so when
+    MAX_SEARCH_TIME_SECS runs out it plays the best action of the last
+    completed depth instead of a half-searched one. Each iteration searches
+    first the best action found for a position by the previous one (or the
+    transposition table), then killer moves (actions that caused cutoffs at
+    the same ply), then by the history of cutoffs of each ActionType.
+    search_stats has the completed depth, nodes and cutoffs (alpha-beta and
+    chance node ones) of the last decision.
+
+    Positions reached again (through other orders of the same actions, or
+    in later decisions) are looked up in a transposition table instead of
+    re-searched. Its stats() help size it (transposition_table_size, 0 to
+    disable); it is cleared between games.
+
+    Chance nodes (e.g. rolls) search their outcomes most likely first, and
+    stop once their expected value can't fall inside the alpha-beta window
+    (Star1). For rolls right before the leaves, whose values can only differ
+    in the value function's hand terms (see hand_value_spread), that's often
+    after the first outcome or two. With a transposition table (which keeps
+    their work for the full search, if needed), deeper chance nodes first
+    search one action of each outcome (Star2 probing), for a bound that can
+    settle them too. chance_pruning=False searches every outcome.
+
+    With num_workers > 1, root actions are searched in parallel by a pool of
+    that many processes (started on the first such decision, and then shared
+    by all players, see players/search_pool.py). Each worker keeps its own
+    transposition table.
+
     NOTE: More than 3 levels seems to take much longer, it would be
     interesting to see this with prunning.
     """
@@ -33,6 +75,10 @@ class AlphaBetaPlayer(Player):
         value_fn_builder_name=None,
         params=DEFAULT_WEIGHTS,
         epsilon=None,
+        transposition_table_size=DEFAULT_CAPACITY,
+        eviction="lru",
+        num_workers=1,
+        chance_pruning=True,
     ):
         super().__init__(color)
         self.depth = int(depth)
@@ -43,6 +89,27 @@ class AlphaBetaPlayer(Player):
         self.params = params
         self.use_value_function = None
         self.epsilon = epsilon
+        self.transposition_table = (
+            TranspositionTable(transposition_table_size, eviction)
+            if int(transposition_table_size) > 0
+            else None
+        )
+        # ActionType => cutoffs caused (weighted by depth^2), during the game
+        self.history: Dict[Any, int] = defaultdict(int)
+        # Per decision: ply => killer actions, position => best action found
+        self.killers: Dict[int, List[Any]] = defaultdict(list)
+        self.best_actions: Dict[int, Any] = dict()
+        self.search_depth = self.depth
+        self.search_stats: Dict[str, int] = new_search_stats()
+        self.num_workers = int(num_workers)
+        self.search_id = str(uuid.uuid4())  # for workers to tell players apart
+        self.search_decision = None  # in workers, decision of killers, etc.
+        self.chance_pruning = str(chance_pruning).lower() != "false"
+
+    def reset_state(self):
+        if self.transposition_table is not None:
+            self.transposition_table.clear()
+        self.history.clear()
 
     def value_function(self, game, p0_color):
         raise NotImplementedError
@@ -62,11 +129,28 @@ class AlphaBetaPlayer(Player):
 
         start = time.time()
         state_id = str(len(game.state.actions))
-        node = DebugStateNode(state_id, self.color)  # i think it comes from outside
         deadline = start + MAX_SEARCH_TIME_SECS
-        result = self.alphabeta(
-            game.copy(), self.depth, float("-inf"), float("inf"), deadline, node
-        )
+        game_copy = game.copy()
+        self.killers.clear()
+        self.search_stats = new_search_stats()
+        if self.num_workers > 1:
+            result = self.parallel_search(game, actions, deadline)
+        else:
+            result = (None, None)
+            for depth in range(1, self.depth + 1):
+                self.search_depth = depth
+                # i think it comes from outside
+                node = DebugStateNode(state_id, self.color)
+                iteration_result = self.alphabeta(
+                    game_copy, depth, float("-inf"), float("inf"), deadline, node
+                )
+                if time.time() >= deadline and result[0] is not None:
+                    break  # keep the last completed depth's result
+                result = iteration_result
+                if time.time() >= deadline:
+                    break
+                self.search_stats["depth"] = depth
+        self.best_actions.clear()
         # print("Decision Results:", self.depth, len(actions), time.time() - start)
         # if game.state.num_turns > 10:
         #     render_debug_tree(node)
@@ -81,6 +165,75 @@ class AlphaBetaPlayer(Player):
             + f"(depth={self.depth},value_fn={self.value_fn_builder_name},prunning={self.prunning})"
         )
 
+    def parallel_search(self, game, actions, deadline):
+        """Iterative deepening like decide's, with each depth's root actions
+        split among the workers of the search pool. Returns (action, value)."""
+        from catanatron.players.search_pool import get_search_pool
+
+        pool = get_search_pool(self.num_workers)
+        decision = pool.new_decision()
+        result = (None, None)
+        for depth in range(1, self.depth + 1):
+            # Each action goes to the same worker every time (whose table has
+            # its subtree from shallower depths), unless another one runs out.
+            tasks = [
+                (action, index, depth, deadline, decision)
+                for index, action in enumerate(actions)
+            ]
+            values = []
+            for value, alpha, stats in pool.run(
+                self, game, tasks, affinity=lambda task: hash(task[0])
+            ):
+                values.append((value, value > alpha))
+                for key, count in stats.items():
+                    self.search_stats[key] += count
+            if time.time() >= deadline and result[0] is not None:
+                break  # keep the last completed depth's result
+
+            # Best first (for the next depth to raise alpha sooner). Values
+            # that aren't exact are bounds of actions some other one beats.
+            # Ties go to the earlier action, as in the serial search.
+            order = sorted(
+                range(len(actions)),
+                key=lambda i: (values[i][1], values[i][0], -i),
+                reverse=True,
+            )
+            actions = [actions[i] for i in order]
+            result = (actions[0], values[order[0]][0])
+            if time.time() >= deadline:
+                break
+            self.search_stats["depth"] = depth
+        return result
+
+    def run_search_task(self, game, task, alpha):
+        """Searches a root action for parallel_search, in a search pool
+        worker, with alpha (shared by the workers) as lower bound.
+
+        Returns:
+            Tuple[float, float, Dict[str, int]]: The action's value (an upper
+                bound if it isn't above the alpha it started with), that
+                alpha, and search_stats (but depth).
+        """
+        action, index, depth, deadline, decision = task
+        if self.search_decision != decision:
+            self.search_decision = decision
+            self.killers.clear()
+            self.best_actions.clear()
+        self.search_depth = depth
+        self.search_stats = new_search_stats()
+        lower_bound = alpha.value
+        node = DebugStateNode(str(index), self.color)
+        value = self.expected_value(
+            game, action, depth, lower_bound, float("inf"), deadline, node, index
+        )
+        with alpha.get_lock():
+            if value > alpha.value:
+                alpha.value = value
+
+        stats = self.search_stats
+        del stats["depth"]
+        return value, lower_bound, stats
+
     def alphabeta(self, game, depth, alpha, beta, deadline, node):
         """AlphaBeta MiniMax Algorithm.
 
@@ -90,88 +243,243 @@ class AlphaBetaPlayer(Player):
 
         {'value', 'action'|None if leaf, 'node' }
         """
-        if depth == 0 or game.winning_color() is not None or time.time() >= deadline:
-            value_fn = get_value_fn(
-                self.value_fn_builder_name,
-                self.params,
-                self.value_function if self.use_value_function else None,
-            )
-            value = value_fn(game, self.color)
-
+        if self.is_leaf(game, depth, deadline):
+            value = self.leaf_value(game, alpha, beta)
             node.expected_value = value
             return None, value
 
-        maximizingPlayer = game.state.current_color() == self.color
         actions = self.get_actions(game)  # list of actions.
-        action_outcomes = expand_spectrum(game, actions)  # action => (game, proba)[]
+        result, actions = self.probe(game, actions, depth, alpha, beta)
+        if result is not None:
+            node.expected_value = result[1]
+            return result
+        window = (alpha, beta)
+        self.search_stats["nodes"] += 1
+
+        maximizingPlayer = game.state.current_color() == self.color
 
         if maximizingPlayer:
             best_action = None
             best_value = float("-inf")
-            for i, (action, outcomes) in enumerate(action_outcomes.items()):
-                action_node = DebugActionNode(action)
-
-                expected_value = 0
-                for j, (outcome, proba) in enumerate(outcomes):
-                    out_node = DebugStateNode(
-                        f"{node.label} {i} {j}", outcome.state.current_color()
-                    )
-
-                    result = self.alphabeta(
-                        outcome, depth - 1, alpha, beta, deadline, out_node
-                    )
-                    value = result[1]
-                    expected_value += proba * value
-
-                    action_node.children.append(out_node)
-                    action_node.probas.append(proba)
-
-                action_node.expected_value = expected_value
-                node.children.append(action_node)
-
+            for i, action in enumerate(actions):
+                expected_value = self.expected_value(
+                    game, action, depth, alpha, beta, deadline, node, i
+                )
                 if expected_value > best_value:
                     best_action = action
                     best_value = expected_value
                 alpha = max(alpha, best_value)
                 if alpha >= beta:
+                    self.record_cutoff(action, depth)
                     break  # beta cutoff
 
             node.expected_value = best_value
+            self.store(game, depth, window, deadline, best_value, best_action)
             return best_action, best_value
         else:
             best_action = None
             best_value = float("inf")
-            for i, (action, outcomes) in enumerate(action_outcomes.items()):
-                action_node = DebugActionNode(action)
-
-                expected_value = 0
-                for j, (outcome, proba) in enumerate(outcomes):
-                    out_node = DebugStateNode(
-                        f"{node.label} {i} {j}", outcome.state.current_color()
-                    )
-
-                    result = self.alphabeta(
-                        outcome, depth - 1, alpha, beta, deadline, out_node
-                    )
-                    value = result[1]
-                    expected_value += proba * value
-
-                    action_node.children.append(out_node)
-                    action_node.probas.append(proba)
-
-                action_node.expected_value = expected_value
-                node.children.append(action_node)
-
+            for i, action in enumerate(actions):
+                expected_value = self.expected_value(
+                    game, action, depth, alpha, beta, deadline, node, i
+                )
                 if expected_value < best_value:
                     best_action = action
                     best_value = expected_value
                 beta = min(beta, best_value)
                 if beta <= alpha:
+                    self.record_cutoff(action, depth)
                     break  # alpha cutoff
 
             node.expected_value = best_value
+            self.store(game, depth, window, deadline, best_value, best_action)
             return best_action, best_value
 
+    def is_leaf(self, game, depth, deadline):
+        return depth == 0 or game.winning_color() is not None or time.time() >= deadline
+
+    def probe(self, game, actions, depth, alpha, beta):
+        """Looks game up in the transposition table. Returns (result, actions):
+        the (action, value) result if the table settles this search (else
+        None), and actions in the order to search them (see order_actions)."""
+        best_action = self.best_actions.get(game.state.zobrist)
+        table = self.transposition_table
+        if table is not None:
+            entry, value = table.lookup(game.state.zobrist, depth, alpha, beta)
+            if entry is not None and entry.action in actions:
+                if value is not None:
+                    return (entry.action, value), actions
+                best_action = entry.action
+        return None, self.order_actions(actions, depth, best_action)
+
+    def order_actions(self, actions, depth, best_action=None):
+        """Likely best actions first (for more cutoffs): best_action (from the
+        previous iteration or the table), then killer moves of this ply, then
+        by history of cutoffs of their ActionType. Stable otherwise."""
+        killers = self.killers[self.search_depth - depth]
+        history = self.history
+
+        def priority(action):
+            if action == best_action:
+                return (2, 0)
+            if action in killers:
+                return (1, -killers.index(action))
+            return (0, history[action.action_type])
+
+        return sorted(actions, key=priority, reverse=True)
+
+    def record_cutoff(self, action, depth):
+        self.search_stats["cutoffs"] += 1
+        killers = self.killers[self.search_depth - depth]
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[NUM_KILLERS:]
+        self.history[action.action_type] += depth * depth
+
+    def leaf_value(self, game, alpha, beta):
+        """Heuristic value of game (looked up in the table, if there). Never a
+        deeper search's result, as chance node bounds rely on it."""
+        table = self.transposition_table
+        if table is not None:
+            key = game.state.zobrist
+            entry, value = table.lookup(key, 0, alpha, beta)
+            if value is not None and entry.depth == 0:
+                return value
+
+        value_fn = get_value_fn(
+            self.value_fn_builder_name,
+            self.params,
+            self.value_function if self.use_value_function else None,
+        )
+        value = value_fn(game, self.color)
+        if table is not None:
+            table.store(key, 0, float("-inf"), float("inf"), value)
+        return value
+
+    def store(self, game, depth, window, deadline, value, action):
+        """Saves a search result (for the next iteration to search action
+        first, and in the transposition table). Unless the search ran out
+        of time (its value is then only a partial result)."""
+        if time.time() >= deadline:
+            return
+        key = game.state.zobrist
+        self.best_actions[key] = action
+        if self.transposition_table is not None:
+            alpha, beta = window
+            self.transposition_table.store(key, depth, alpha, beta, value, action)
+
+    def expected_value(self, game, action, depth, alpha, beta, deadline, node, i):
+        """Expected alphabeta value of taking action (averaging over its chance
+        outcomes). Explores each outcome by applying it to game in place and
+        undoing it afterwards, so game is left unchanged.
+
+        With chance_pruning, may return a bound instead: an upper one if the
+        value is <= alpha, or a lower one if >= beta (see class docstring)."""
+        action_node = DebugActionNode(action)
+        outcomes = list_spectrum(game, action)
+        # Leaf outcomes of a roll differ only in resource hands (not in what
+        # was built, the robber, etc.), so their values are spread apart at
+        # most this much. (Other chance actions can have outcomes that turn
+        # out impossible, see execute_outcome, and leave the game as it was.)
+        spread = None
+        if self.chance_pruning and len(outcomes) > 1:
+            outcomes = sorted(outcomes, key=lambda outcome: outcome[1], reverse=True)
+            if depth > 1 and self.transposition_table is not None:
+                bound = self.probe_outcomes(
+                    game, outcomes, depth, alpha, beta, deadline
+                )
+                if bound is not None:
+                    self.search_stats["chance_cutoffs"] += 1
+                    action_node.expected_value = bound
+                    node.children.append(action_node)
+                    return bound
+            elif (
+                depth == 1
+                and action.action_type == ActionType.ROLL
+                and not self.use_value_function
+            ):
+                spread = hand_value_spread(self.value_fn_builder_name, self.params)
+        remaining = 1.0
+        lowest, highest = float("inf"), float("-inf")
+
+        expected_value = 0
+        with closing(apply_outcomes(game, outcomes)) as applied:
+            for j, (game, proba) in enumerate(applied):
+                out_node = DebugStateNode(
+                    f"{node.label} {i} {j}", game.state.current_color()
+                )
+                result = self.alphabeta(
+                    game, depth - 1, alpha, beta, deadline, out_node
+                )
+                value = result[1]
+                expected_value += proba * value
+
+                action_node.children.append(out_node)
+                action_node.probas.append(proba)
+
+                if spread is not None and j < len(outcomes) - 1:  # Star1
+                    remaining -= proba
+                    lowest, highest = min(lowest, value), max(highest, value)
+                    upper = expected_value + remaining * (lowest + spread)
+                    lower = expected_value + remaining * (highest - spread)
+                    if upper <= alpha or lower >= beta:
+                        self.search_stats["chance_cutoffs"] += 1
+                        expected_value = upper if upper <= alpha else lower
+                        break
+
+        action_node.expected_value = expected_value
+        node.children.append(action_node)
+        return expected_value
+
+    def probe_outcomes(self, game, outcomes, depth, alpha, beta, deadline):
+        """Star2: searches just one action (the likely best) of each outcome
+        of a chance node. For outcomes where the opponent moves, that bounds
+        the value from above (they'd pick that action or a better one for
+        them), and where we move, from below. Returns the bound of the
+        expected value if it settles the search (else None)."""
+        upper, lower = 0.0, 0.0
+        with closing(apply_outcomes(game, outcomes)) as applied:
+            for game, proba in applied:
+                # Only a bound beyond alpha or beta helps (that probing can
+                # still find: any outcome where we move rules out the upper)
+                if not (upper < float("inf") and alpha > float("-inf")) and not (
+                    lower > float("-inf") and beta < float("inf")
+                ):
+                    return None
+                if self.is_leaf(game, depth - 1, deadline):
+                    value = self.leaf_value(game, alpha, beta)
+                    upper += proba * value
+                    lower += proba * value
+                    continue
+
+                _, actions = self.probe(
+                    game, self.get_actions(game), depth - 1, alpha, beta
+                )
+                node = DebugStateNode("probe", game.state.current_color())
+                if game.state.current_color() == self.color:
+                    window = (float("-inf"), beta)
+                else:
+                    window = (alpha, float("inf"))
+                value = self.expected_value(
+                    game, actions[0], depth - 1, *window, deadline, node, 0
+                )
+                if game.state.current_color() == self.color:
+                    upper = float("inf")
+                    lower += proba * value
+                else:
+                    upper += proba * value
+                    lower = float("-inf")
+
+        if upper <= alpha:
+            return upper
+        if lower >= beta:
+            return lower
+        return None
+
+
+def new_search_stats():
+    return dict(depth=0, nodes=0, cutoffs=0, chance_cutoffs=0)
+
 
 class DebugStateNode:
     def __init__(self, label, color):
@@ -229,6 +537,11 @@ class SameTurnAlphaBetaPlayer(AlphaBetaPlayer):
     Same like AlphaBeta but only within turn
     """
 
+    def is_leaf(self, game, depth, deadline):
+        return game.state.current_color() != self.color or super().is_leaf(
+            game, depth, deadline
+        )
+
     def alphabeta(self, game, depth, alpha, beta, deadline, node):
         """AlphaBeta MiniMax Algorithm.
 
@@ -238,54 +551,33 @@ class SameTurnAlphaBetaPlayer(AlphaBetaPlayer):
 
         {'value', 'action'|None if leaf, 'node' }
         """
-        if (
-            depth == 0
-            or game.state.current_color() != self.color
-            or game.winning_color() is not None
-            or time.time() >= deadline
-        ):
-            value_fn = get_value_fn(
-                self.value_fn_builder_name,
-                self.params,
-                self.value_function if self.use_value_function else None,
-            )
-            value = value_fn(game, self.color)
-
+        if self.is_leaf(game, depth, deadline):
+            value = self.leaf_value(game, alpha, beta)
             node.expected_value = value
             return None, value
 
         actions = self.get_actions(game)  # list of actions.
-        action_outcomes = expand_spectrum(game, actions)  # action => (game, proba)[]
+        result, actions = self.probe(game, actions, depth, alpha, beta)
+        if result is not None:
+            node.expected_value = result[1]
+            return result
+        window = (alpha, beta)
+        self.search_stats["nodes"] += 1
 
         best_action = None
         best_value = float("-inf")
-        for i, (action, outcomes) in enumerate(action_outcomes.items()):
-            action_node = DebugActionNode(action)
-
-            expected_value = 0
-            for j, (outcome, proba) in enumerate(outcomes):
-                out_node = DebugStateNode(
-                    f"{node.label} {i} {j}", outcome.state.current_color()
-                )
-
-                result = self.alphabeta(
-                    outcome, depth - 1, alpha, beta, deadline, out_node
-                )
-                value = result[1]
-                expected_value += proba * value
-
-                action_node.children.append(out_node)
-                action_node.probas.append(proba)
-
-            action_node.expected_value = expected_value
-            node.children.append(action_node)
-
+        for i, action in enumerate(actions):
+            expected_value = self.expected_value(
+                game, action, depth, alpha, beta, deadline, node, i
+            )
             if expected_value > best_value:
                 best_action = action
                 best_value = expected_value
             alpha = max(alpha, best_value)
             if alpha >= beta:
+                self.record_cutoff(action, depth)
                 break  # beta cutoff
 
         node.expected_value = best_value
+        self.store(game, depth, window, deadline, best_value, best_action)
         return best_action, best_value
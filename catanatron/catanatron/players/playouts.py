@@ -3,8 +3,13 @@ import random
 import multiprocessing
 from collections import Counter
 
-from catanatron.game import Game
+from catanatron.game import Game, TURNS_LIMIT
+from catanatron.models.action_codes import get_action
+from catanatron.models.enums import Action, ActionType
 from catanatron.models.player import Player
+from catanatron.player_state import ACTUAL_VICTORY_POINTS, NUM_PLAYER_FIELDS
+from catanatron.state import apply_action
+from catanatron.state_functions import player_deck_to_array
 
 DEFAULT_NUM_PLAYOUTS = 25
 USE_MULTIPROCESSING = True
@@ -69,11 +74,98 @@ def run_playouts(action_applied_game_copy, num_playouts):
 
 
 def run_playout(action_applied_game_copy):
-    game_copy = action_applied_game_copy.copy()
-    game_copy.play(decide_fn=decide_fn)
-    return game_copy.winning_color()
+    winner, _ = fast_playout(
+        action_applied_game_copy.state,
+        random,
+        vps_to_win=action_applied_game_copy.vps_to_win,
+    )
+    return winner
+
+
+def fast_playout(state, rng, max_turns=TURNS_LIMIT, vps_to_win=10):
+    """Plays a copy of state to the end with uniformly random decisions.
+
+    Unlike Game.play, doesn't validate actions, log them or call accumulators,
+    and only checks whether the player that just acted won (or, after a
+    settlement, which can cut a road and hand Longest Road to another
+    player, whether anyone did). All randomness
+    (decisions, dice, discards and robber steals) comes from rng, so passing
+    the random module gives the same games as Game.play(decide_fn=decide_fn).
+
+    Args:
+        state (State): State to play from. Not modified.
+        rng (random.Random): Source of randomness.
+        max_turns (int, optional): Turn at which the game is truncated.
+            Defaults to TURNS_LIMIT.
+        vps_to_win (int, optional): Victory points needed to win. Defaults
+            to 10.
+
+    Returns:
+        Tuple[Color, Tuple[int, ...]]: Winning color (None if truncated) and
+            the actual victory points of each of state.colors.
+    """
+    state = state.copy()
+    buffer_vps = range(
+        ACTUAL_VICTORY_POINTS, len(state.player_buffer), NUM_PLAYER_FIELDS
+    )
+
+    winner = _winning_color(state, buffer_vps, vps_to_win)
+    while winner is None and state.num_turns < max_turns:
+        actions = state.playable_actions
+        action = _resolve_chance(state, actions[rng.randrange(len(actions))], rng)
+        apply_action(state, action, log=False)
+
+        if action.action_type == ActionType.BUILD_SETTLEMENT:
+            winner = _winning_color(state, buffer_vps, vps_to_win)
+        else:
+            index = state.color_to_index[action.color]
+            if state.player_buffer[buffer_vps[index]] >= vps_to_win:
+                winner = action.color
+    return winner, tuple(state.player_buffer[i] for i in buffer_vps)
+
+
+def _winning_color(state, buffer_vps, vps_to_win):
+    """As Game.winning_color"""
+    winner = None
+    for color, index in zip(state.colors, buffer_vps):
+        if state.player_buffer[index] >= vps_to_win:
+            winner = color
+    return winner
+
+
+def _resolve_chance(state, action, rng):
+    """Fills in the random outcome of action (as apply_action would), using
+    rng instead of the random module."""
+    action_type = action.action_type
+    if action_type == ActionType.ROLL:
+        return get_action(
+            action.color, action_type, (rng.randint(1, 6), rng.randint(1, 6))
+        )
+    if action_type == ActionType.DISCARD:
+        hand = player_deck_to_array(state, action.color)
+        return Action(action.color, action_type, rng.sample(hand, k=len(hand) // 2))
+    if action_type == ActionType.MOVE_ROBBER:
+        coordinate, robbed_color, resource = action.value
+        if robbed_color is not None and resource is None:
+            resource = rng.choice(player_deck_to_array(state, robbed_color))
+            return get_action(
+                action.color, action_type, (coordinate, robbed_color, resource)
+            )
+    return action
 
 
 def decide_fn(self, game, playable_actions):
     index = random.randrange(0, len(playable_actions))
     return playable_actions[index]
+
+
+def run_batched_playouts(game, num_playouts, seed=None):
+    """Like run_playouts, but plays all of them at once (in lockstep) with the
+    batched engine. Requires numpy. See catanatron.batch."""
+    from catanatron.batch import BatchedGames
+
+    batch = BatchedGames(game, num_playouts, seed)
+    winners, _ = batch.run()
+    return Counter(
+        batch.colors[winner] if winner >= 0 else None for winner in winners.tolist()
+    )
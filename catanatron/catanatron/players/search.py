@@ -1,10 +1,11 @@
 import random
 
 from catanatron.state_functions import (
-    player_key,
+    get_actual_victory_points,
 )
 from catanatron.models.player import Player
 from catanatron.game import Game
+from catanatron.state import apply_action_with_undo, undo_action
 
 
 class VictoryPointPlayer(Player):
@@ -20,12 +21,12 @@ class VictoryPointPlayer(Player):
 
         best_value = float("-inf")
         best_actions = []
+        game_copy = game.copy()
         for action in playable_actions:
-            game_copy = game.copy()
-            game_copy.execute(action)
+            record = apply_action_with_undo(game_copy.state, action)
+            value = get_actual_victory_points(game_copy.state, self.color)
+            undo_action(game_copy.state, record)
 
-            key = player_key(game_copy.state, self.color)
-            value = game_copy.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
             if value == best_value:
                 best_actions.append(action)
             if value > best_value:
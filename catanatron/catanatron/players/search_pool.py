@@ -0,0 +1,219 @@
+"""
+Persistent worker processes for parallel search (see the num_workers
+arguments of AlphaBetaPlayer and MCTSPlayer).
+
+A search hands the pool tasks (e.g. a root action to search, or simulations
+to run) and the workers run them with player.run_search_task. Workers
+outlive decisions (and games) and keep what they were sent: players, with
+their transposition tables, and games. Later tasks on a game only send the
+actions taken since, which the worker replays (the log has the outcome of
+each roll, card draw, etc., so replaying gives the same state). Copies of a
+game keep its id, so the worker checks the result against the state's
+Zobrist hash too. A worker that doesn't have what it's asked about (e.g. it
+dropped it, see MAX_CACHED, or had another branch of the game) asks for all
+of it again.
+"""
+
+import atexit
+import multiprocessing
+import threading
+import traceback
+from collections import OrderedDict
+from multiprocessing.connection import wait
+
+MAX_CACHED = 16  # games (and players) each worker keeps
+
+_POOLS = dict()
+_POOLS_LOCK = threading.Lock()
+
+
+def get_search_pool(num_workers):
+    """The (started once, then shared) pool of num_workers processes"""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(num_workers)
+        if pool is None:
+            pool = _POOLS[num_workers] = SearchPool(num_workers)
+        return pool
+
+
+class SearchPool:
+    """Serves one run at a time: runs from other threads wait their turn."""
+
+    def __init__(self, num_workers):
+        self.lock = threading.Lock()
+        self.alpha = multiprocessing.Value("d", float("-inf"))
+        self.decisions = 0
+        self.workers = []
+        for _ in range(num_workers):
+            conn, worker_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_work, args=(worker_conn, self.alpha), daemon=True
+            )
+            process.start()
+            worker_conn.close()
+            self.workers.append(_WorkerHandle(process, conn))
+        atexit.register(self.close)
+
+    def new_decision(self):
+        """Id for searches of the same decision (iterative deepening), which
+        share killer moves and best actions"""
+        with self.lock:
+            self.decisions += 1
+            return self.decisions
+
+    def run(self, player, game, tasks, affinity=None):
+        """Runs player.run_search_task(game, task, alpha) for each of tasks,
+        in the workers (on their copies of player and game). alpha is a
+        shared Value, -inf at the start of each run, for tasks to share a
+        bound (see AlphaBetaPlayer).
+
+        Tasks go to the workers in turn, or to affinity(task) (modulo the
+        number of workers) if given, e.g. so a worker gets the tasks its
+        tables have work of. Workers that run out take others' tasks.
+
+        Returns:
+            List: The results of tasks, in order.
+        """
+        with self.lock:
+            return self._run(player, game, tasks, affinity)
+
+    def _run(self, player, game, tasks, affinity):
+        self.alpha.value = float("-inf")
+        results = [None] * len(tasks)
+        # Queues are popped from the end, so in the order of tasks.
+        queues = {worker: [] for worker in self.workers}
+        for index in reversed(range(len(tasks))):
+            key = index if affinity is None else affinity(tasks[index])
+            queues[self.workers[key % len(self.workers)]].append(index)
+        idle = list(reversed(self.workers))
+        busy = dict()  # conn => (worker, index of task)
+        error = None
+        while busy or (any(queues.values()) and error is None):
+            while idle and any(queues.values()) and error is None:
+                worker = idle.pop()
+                if queues[worker]:
+                    index = queues[worker].pop()
+                else:  # take another's last
+                    index = max(queues.values(), key=len).pop(0)
+                worker.send(player, game, tasks[index])
+                busy[worker.conn] = (worker, index)
+
+            for conn in wait(list(busy)):
+                worker, index = busy.pop(conn)
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    self.close()
+                    raise RuntimeError("Search worker died")
+                if message[0] == "missing":
+                    worker.forget()
+                    worker.send(player, game, tasks[index])
+                    busy[conn] = (worker, index)
+                    continue
+                if message[0] == "error":
+                    error = message[1]
+                else:
+                    results[index] = message[1]
+                idle.append(worker)
+        if error is not None:
+            raise RuntimeError(f"Search worker failed:\n{error}")
+        return results
+
+    def close(self):
+        for worker in self.workers:
+            worker.conn.close()
+            worker.process.terminate()
+        self.workers = []
+        for num_workers, pool in list(_POOLS.items()):
+            if pool is self:
+                del _POOLS[num_workers]
+
+
+class _WorkerHandle:
+    """A worker process, and what it has been sent (to send it only what's
+    new; the worker says so if it no longer has it)"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.forget()
+
+    def forget(self):
+        self.player_ids = set()
+        self.games = dict()  # game id => (length of log, last action)
+
+    def send(self, player, game, task):
+        log = game.state.actions
+        known = self.games.get(game.id)
+        if (
+            known is not None
+            and known[0] <= len(log)
+            and _last(log, known[0]) == known[1]
+        ):
+            sync = ("actions", *known, log[known[0] :], game.state.zobrist)
+        else:
+            sync = ("game", game)
+        sent_player = None if player.search_id in self.player_ids else player
+
+        self.conn.send((player.search_id, sent_player, game.id, sync, task))
+        self.player_ids.add(player.search_id)
+        self.games[game.id] = (len(log), _last(log, len(log)))
+
+
+def _last(log, length):
+    """Last of the first length actions of log (None if length is 0)"""
+    return log[length - 1] if length > 0 else None
+
+
+def _remember(cache, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > MAX_CACHED:
+        cache.popitem(last=False)
+
+
+def _synced_game(games, game_id, sync):
+    if sync[0] == "game":
+        game = sync[1]
+    else:
+        _, length, last_action, actions, zobrist = sync
+        game = games.get(game_id)
+        if game is None:
+            return None
+        log = game.state.actions
+        if len(log) != length or _last(log, length) != last_action:
+            return None
+        try:
+            for action in actions:
+                game.execute(action, validate_action=False)
+        except Exception:  # it's another branch of the game
+            del games[game_id]
+            return None
+        if game.state.zobrist != zobrist:  # so is this
+            del games[game_id]
+            return None
+    _remember(games, game_id, game)
+    return game
+
+
+def _work(conn, alpha):
+    players = OrderedDict()  # search id => player
+    games = OrderedDict()  # game id => game
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        search_id, player, game_id, sync, task = message
+        try:
+            if player is not None:
+                _remember(players, search_id, player)
+            player = players.get(search_id)
+            game = _synced_game(games, game_id, sync)
+            if player is None or game is None:
+                conn.send(("missing",))
+                continue
+            players.move_to_end(search_id)
+            conn.send(("result", player.run_search_task(game, task, alpha)))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
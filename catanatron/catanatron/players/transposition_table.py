@@ -0,0 +1,149 @@
+"""
+Transposition table for tree search players (see AlphaBetaPlayer).
+
+Search reaches the same position through different orders of the same
+actions (e.g. two maritime trades swapped, or road-then-settlement versus
+settlement-then-road). The table remembers what a search of a position found,
+keyed by its Zobrist hash (State.zobrist), so the second visit can reuse it.
+"""
+
+from collections import OrderedDict, defaultdict
+from typing import Any, NamedTuple, Optional, Tuple
+
+# Bound types. Searches with an alpha-beta window only learn a bound of the
+# value when they fail low (UPPER: value <= result) or high (LOWER).
+EXACT, LOWER, UPPER = range(3)
+
+# Which entry to drop when the table is full:
+#   "lru": least recently stored or used.
+#   "fifo": least recently stored.
+#   "depth": shallowest (cheapest to recompute), least recently stored.
+EVICTION_POLICIES = ("lru", "fifo", "depth")
+
+DEFAULT_CAPACITY = 2**18
+
+
+class TTEntry(NamedTuple):
+    depth: int  # search depth the value was computed with (0 for leaves)
+    bound: int  # EXACT, LOWER or UPPER
+    value: float
+    action: Any  # best action found (None for leaves)
+
+
+class TranspositionTable:
+    """Bounded map of state hash => TTEntry.
+
+    Args:
+        capacity (int, optional): Max number of entries.
+        eviction (str, optional): One of EVICTION_POLICIES. Defaults to "lru".
+
+    Attributes:
+        hits, misses (int): Lookups that found (or didn't) an entry.
+        cutoffs (int): Hits whose value could be used as is (deep enough,
+            and its bound is conclusive given the search window).
+        stores, evictions (int): Entries written, and dropped to make room.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, eviction="lru"):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"eviction must be one of {EVICTION_POLICIES}")
+        self.capacity = int(capacity)
+        self.eviction = eviction
+        self.entries: OrderedDict = OrderedDict()
+        # depth => keys of entries of that depth, in store order ("depth" only)
+        self.keys_by_depth: defaultdict = defaultdict(OrderedDict)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.keys_by_depth.clear()
+
+    def lookup(
+        self, key, depth, alpha, beta
+    ) -> Tuple[Optional[TTEntry], Optional[float]]:
+        """Returns (entry, value): the entry of key (if any), and its value if
+        it settles a search of the given depth and (alpha, beta) window."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+        self.hits += 1
+        if self.eviction == "lru":
+            self.entries.move_to_end(key)
+        if entry.depth >= depth and (
+            entry.bound == EXACT
+            or (entry.bound == LOWER and entry.value >= beta)
+            or (entry.bound == UPPER and entry.value <= alpha)
+        ):
+            self.cutoffs += 1
+            return entry, entry.value
+        return entry, None
+
+    def store(self, key, depth, alpha, beta, value, action=None):
+        """Stores the result of searching key with the (alpha, beta) window.
+        Keeps an existing deeper entry instead."""
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+
+        old = self.entries.get(key)
+        if old is not None:
+            if old.depth > depth:
+                return
+            del self.entries[key]
+            if self.eviction == "depth":
+                del self.keys_by_depth[old.depth][key]
+        elif len(self.entries) >= self.capacity:
+            self._evict()
+        if self.capacity <= 0:
+            return
+
+        self.entries[key] = TTEntry(depth, bound, value, action)
+        if self.eviction == "depth":
+            self.keys_by_depth[depth][key] = None
+        self.stores += 1
+
+    def _evict(self):
+        if not self.entries:
+            return
+        if self.eviction == "depth":
+            depth = min(depth for depth, keys in self.keys_by_depth.items() if keys)
+            key, _ = self.keys_by_depth[depth].popitem(last=False)
+            del self.entries[key]
+        else:
+            self.entries.popitem(last=False)
+        self.evictions += 1
+
+    def stats(self):
+        """Counters and sizes, to tune capacity with"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cutoffs": self.cutoffs,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        # Just a cache: pickles (e.g. of games, with their players) empty
+        return (self.capacity, self.eviction)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
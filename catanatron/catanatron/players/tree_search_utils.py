@@ -1,5 +1,4 @@
 import math
-from collections import defaultdict
 
 from catanatron.models.map import number_probability
 from catanatron.models.enums import (
@@ -16,6 +15,7 @@ from catanatron.state_functions import (
     get_player_freqdeck,
     get_enemy_colors,
 )
+from catanatron.state import apply_action_with_undo, undo_action
 from catanatron.features import build_production_features
 from catanatron.players.value import value_production
 
@@ -35,20 +35,24 @@ DETERMINISTIC_ACTIONS = set(
 )
 
 
-def execute_deterministic(game, action):
-    copy = game.copy()
-    copy.execute(action, validate_action=False)
-    return [(copy, 1)]
+# Chance actions whose outcomes are enumerated from the perspective of the
+# current player, who might imagine impossible ones (e.g. drawing a dev card
+# that is actually in an enemy's hand).
+IMAGINED_OUTCOME_ACTIONS = set(
+    [
+        ActionType.BUY_DEVELOPMENT_CARD,
+        ActionType.MOVE_ROBBER,
+    ]
+)
 
 
-def execute_spectrum(game, action):
-    """Returns [(game_copy, proba), ...] tuples for result of given action.
-    Result probas should add up to 1. Does not modify self"""
+def list_spectrum(game, action):
+    """Returns [(outcome_action, proba), ...] tuples, where each outcome_action
+    is a fully-specified version of given action (e.g. a ROLL with its dice).
+    Result probas should add up to 1. Does not modify game"""
     if action.action_type in DETERMINISTIC_ACTIONS:
-        return execute_deterministic(game, action)
+        return [(action, 1)]
     elif action.action_type == ActionType.BUY_DEVELOPMENT_CARD:
-        results = []
-
         # Get the possible deck from the perspective of the current player
         # by getting all face down cards
         current_deck = game.state.development_listdeck.copy()
@@ -57,67 +61,83 @@ def execute_spectrum(game, action):
                 number = get_dev_cards_in_hand(game.state, color, card)
                 current_deck += [card] * number
 
-        for card in set(current_deck):
-            option_action = Action(action.color, action.action_type, card)
-            option_game = game.copy()
-            try:
-                option_game.execute(option_action, validate_action=False)
-            except Exception:
-                # ignore exceptions, since player might imagine impossible outcomes.
-                # ignoring means the value function of this node will be flattened,
-                # to the one before.
-                pass
-            results.append((option_game, current_deck.count(card) / len(current_deck)))
-        return results
+        return [
+            (
+                Action(action.color, action.action_type, card),
+                current_deck.count(card) / len(current_deck),
+            )
+            for card in set(current_deck)
+        ]
     elif action.action_type == ActionType.ROLL:
         results = []
         for roll in range(2, 13):
             outcome = (roll // 2, math.ceil(roll / 2))
-
             option_action = Action(action.color, action.action_type, outcome)
-            option_game = game.copy()
-            option_game.execute(option_action, validate_action=False)
-            results.append((option_game, number_probability(roll)))
+            results.append((option_action, number_probability(roll)))
         return results
     elif action.action_type == ActionType.MOVE_ROBBER:
         (coordinate, robbed_color, _) = action.value
         if robbed_color is None:  # no one to steal, then deterministic
-            return execute_deterministic(game, action)
+            return [(action, 1)]
 
-        results = []
         opponent_hand = get_player_freqdeck(game.state, robbed_color)
         opponent_hand_size = sum(opponent_hand)
         if opponent_hand_size == 0:
             # Nothing to steal
-            return execute_deterministic(game, action)
-
-        for card in RESOURCES:
-            option_action = Action(
-                action.color,
-                action.action_type,
-                (coordinate, robbed_color, card),
+            return [(action, 1)]
+
+        return [
+            (
+                Action(
+                    action.color, action.action_type, (coordinate, robbed_color, card)
+                ),
+                1 / 5.0,
             )
-            option_game = game.copy()
-            try:
-                option_game.execute(option_action, validate_action=False)
-            except Exception:
-                # ignore exceptions, since player might imagine impossible outcomes.
-                # ignoring means the value function of this node will be flattened,
-                # to the one before.
-                pass
-            results.append((option_game, 1 / 5.0))
-        return results
+            for card in RESOURCES
+        ]
     else:
         raise RuntimeError("Unknown ActionType " + str(action.action_type))
 
 
-def expand_spectrum(game, actions):
-    """Consumes game if playable_actions not specified"""
-    children = defaultdict(list)
-    for action in actions:
-        outprobas = execute_spectrum(game, action)
-        children[action] = outprobas
-    return children  # action => (game, proba)[]
+def execute_outcome(game, outcome_action):
+    """Applies an outcome_action (from list_spectrum) to game in place.
+
+    Returns:
+        UndoRecord | None: Record to undo_action with, or None if outcome
+            was imagined-impossible (in which case game is left unchanged,
+            flattening the value of this node to the one before).
+    """
+    try:
+        return apply_action_with_undo(game.state, outcome_action)
+    except Exception:
+        if outcome_action.action_type not in IMAGINED_OUTCOME_ACTIONS:
+            raise
+        return None
+
+
+def execute_spectrum(game, action):
+    """Returns [(game_copy, proba), ...] tuples for result of given action.
+    Result probas should add up to 1. Does not modify self"""
+    results = []
+    for outcome_action, proba in list_spectrum(game, action):
+        option_game = game.copy()
+        execute_outcome(option_game, outcome_action)
+        results.append((option_game, proba))
+    return results
+
+
+def apply_outcomes(game, spectrum):
+    """Yields (game, proba) for each (outcome_action, proba) of spectrum (see
+    list_spectrum), with that outcome applied to game in place. It's undone
+    when the next one is requested, or the generator closed (close it when
+    stopping early, e.g. with contextlib.closing). Copy game to keep one."""
+    for outcome_action, proba in spectrum:
+        record = execute_outcome(game, outcome_action)
+        try:
+            yield game, proba
+        finally:
+            if record is not None:
+                undo_action(game.state, record)
 
 
 def list_prunned_actions(game):
@@ -174,12 +194,15 @@ def prune_robber_actions(current_color, game, actions):
 
     production_features = build_production_features(True)
 
-    def impact(action):
-        game_copy = game.copy()
-        game_copy.execute(action)
+    game_copy = game.copy()
 
-        our_production_sample = production_features(game_copy, current_color)
-        enemy_production_sample = production_features(game_copy, current_color)
+    def impact(action):
+        record = apply_action_with_undo(game_copy.state, action)
+        try:
+            our_production_sample = production_features(game_copy, current_color)
+            enemy_production_sample = production_features(game_copy, current_color)
+        finally:
+            undo_action(game_copy.state, record)
         production = value_production(our_production_sample, "P0")
         enemy_production = value_production(enemy_production_sample, "P1")
 
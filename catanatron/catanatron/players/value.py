@@ -3,11 +3,12 @@ import random
 from catanatron.state_functions import (
     get_longest_road_length,
     get_played_dev_cards,
-    player_key,
+    get_visible_victory_points,
     player_num_dev_cards,
     player_num_resource_cards,
 )
 from catanatron.models.player import Player
+from catanatron.state import apply_action_with_undo, undo_action
 from catanatron.models.enums import RESOURCES, SETTLEMENT, CITY
 from catanatron.features import (
     build_production_features,
@@ -16,6 +17,7 @@ from catanatron.features import (
 )
 
 TRANSLATE_VARIETY = 4  # i.e. each new resource is like 4 production points
+MAX_HAND_SIZE = 19 * len(RESOURCES)  # every resource card in the game
 
 DEFAULT_WEIGHTS = {
     # Where to place. Note winning is best at all costs
@@ -62,7 +64,6 @@ def base_fn(params=DEFAULT_WEIGHTS):
         production = value_production(our_production_sample, "P0")
         enemy_production = value_production(enemy_production_sample, "P1", False)
 
-        key = player_key(game.state, p0_color)
         longest_road_length = get_longest_road_length(game.state, p0_color)
 
         reachability_sample = reachability_features(game, p0_color, 2)
@@ -103,7 +104,7 @@ def base_fn(params=DEFAULT_WEIGHTS):
         )
 
         return float(
-            game.state.player_state[f"{key}_VICTORY_POINTS"] * params["public_vps"]
+            get_visible_victory_points(game.state, p0_color) * params["public_vps"]
             + production * params["production"]
             + enemy_production * params["enemy_production"]
             + reachable_production_at_zero * params["reachable_production_0"]
@@ -167,12 +168,14 @@ class ValueFunctionPlayer(Player):
 
         best_value = float("-inf")
         best_action = None
+        game_copy = game.copy()
         for action in playable_actions:
-            game_copy = game.copy()
-            game_copy.execute(action)
-
-            value_fn = get_value_fn(self.value_fn_builder_name, self.params)
-            value = value_fn(game_copy, self.color)
+            record = apply_action_with_undo(game_copy.state, action)
+            try:
+                value_fn = get_value_fn(self.value_fn_builder_name, self.params)
+                value = value_fn(game_copy, self.color)
+            finally:
+                undo_action(game_copy.state, record)
             if value > best_value:
                 best_value = value
                 best_action = action
@@ -183,6 +186,18 @@ class ValueFunctionPlayer(Player):
         return super().__str__() + f"(value_fn={self.value_fn_builder_name})"
 
 
+def hand_value_spread(name, params):
+    """Most that get_value_fn(name, params) values can differ between
+    positions that only differ in resource hands (like the outcomes of a
+    roll, before anyone acts on them): the range of its hand terms."""
+    weights = DEFAULT_WEIGHTS if name == "base_fn" else (params or CONTENDER_WEIGHTS)
+    return (
+        abs(weights["hand_synergy"])  # times hand_synergy, in [0, 1]
+        + abs(weights["hand_resources"]) * MAX_HAND_SIZE
+        + abs(weights["discard_penalty"])
+    )
+
+
 def get_value_fn(name, params, value_function=None):
     if value_function is not None:
         return value_function
@@ -0,0 +1,23 @@
+"""
+Rules profiles. A game's rules are fixed when it's created (see Game's rules
+argument) and shared by all its copies.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SimulationRules:
+    """Optional rules, honoured by move generation.
+
+    Attributes:
+        domestic_trade (bool): Whether players can offer trades to each other
+            (OFFER_TRADE, and the DECIDE_TRADE/DECIDE_ACCEPTEES prompts that
+            follow). Bulk simulations and searches of bots that never trade
+            can turn it off to cut branching factor and ticks.
+    """
+
+    domestic_trade: bool = True
+
+
+DEFAULT_RULES = SimulationRules()
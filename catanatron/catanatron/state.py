@@ -3,11 +3,12 @@ Module with main State class and main apply_action call (game controller).
 """
 
 import random
-import pickle
-from collections import defaultdict
-from typing import Any, List, Sequence, Tuple, Dict
+import operator
+from typing import Any, List, NamedTuple, Sequence, Tuple, Dict
 
 from catanatron.models.map import BASE_MAP_TEMPLATE, CatanMap
+from catanatron.models.action_codes import get_action
+from catanatron.models.action_log import ActionLog
 from catanatron.models.board import Board
 from catanatron.models.enums import (
     DEVELOPMENT_CARDS,
@@ -16,6 +17,7 @@ from catanatron.models.enums import (
     YEAR_OF_PLENTY,
     SETTLEMENT,
     CITY,
+    ROAD,
     Action,
     ActionPrompt,
     ActionType,
@@ -26,7 +28,6 @@ from catanatron.models.decks import (
     SETTLEMENT_COST_FREQDECK,
     draw_from_listdeck,
     freqdeck_add,
-    freqdeck_can_draw,
     freqdeck_contains,
     freqdeck_draw,
     freqdeck_from_listdeck,
@@ -36,6 +37,10 @@ from catanatron.models.decks import (
     starting_resource_bank,
 )
 from catanatron.models.actions import (
+    BUY_DEVELOPMENT_CARD,
+    CITIES,
+    END_TURN,
+    ROADS,
     generate_playable_actions,
     road_building_possibilities,
 )
@@ -55,37 +60,23 @@ from catanatron.state_functions import (
     player_deck_replenish,
     player_freqdeck_subtract,
     player_deck_to_array,
-    player_key,
     player_num_resource_cards,
+    player_buffer_add,
+    player_buffer_set,
+    player_offset,
     player_resource_freqdeck_contains,
 )
 from catanatron.models.player import Color, Player
-from catanatron.models.enums import FastResource
-
-# These will be prefixed by P0_, P1_, ...
-# Create Player State blueprint
-PLAYER_INITIAL_STATE = {
-    "VICTORY_POINTS": 0,
-    "ROADS_AVAILABLE": 15,
-    "SETTLEMENTS_AVAILABLE": 5,
-    "CITIES_AVAILABLE": 4,
-    "HAS_ROAD": False,
-    "HAS_ARMY": False,
-    "HAS_ROLLED": False,
-    "HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN": False,
-    # de-normalized features (for performance since we think they are good features)
-    "ACTUAL_VICTORY_POINTS": 0,
-    "LONGEST_ROAD_LENGTH": 0,
-    "KNIGHT_OWNED_AT_START": False,
-    "MONOPOLY_OWNED_AT_START": False,
-    "YEAR_OF_PLENTY_OWNED_AT_START": False,
-    "ROAD_BUILDING_OWNED_AT_START": False,
-}
-for resource in RESOURCES:
-    PLAYER_INITIAL_STATE[f"{resource}_IN_HAND"] = 0
-for dev_card in DEVELOPMENT_CARDS:
-    PLAYER_INITIAL_STATE[f"{dev_card}_IN_HAND"] = 0
-    PLAYER_INITIAL_STATE[f"PLAYED_{dev_card}"] = 0
+from catanatron.rules import DEFAULT_RULES
+from catanatron.player_state import (
+    CARD_IN_HAND,
+    HAS_ROLLED,
+    PLAYER_INITIAL_STATE,
+    PlayerStateView,
+    initial_player_buffer,
+)
+from catanatron.zobrist import players_zobrist_hash, scalars_zobrist_hash
+
 
 
 class State:
@@ -98,8 +89,11 @@ class State:
             information that can be easily copiable.
         board (Board): Board state. Settlement locations, cities,
             roads, ect... See Board class.
-        player_state (Dict[str, Any]): See PLAYER_INITIAL_STATE. It will
-            contain one of each key in PLAYER_INITIAL_STATE but prefixed
+        player_buffer (array): Flat per-player state. One block of
+            NUM_PLAYER_FIELDS values per seat, addressed by the offsets in
+            catanatron.player_state. See PLAYER_INITIAL_STATE.
+        player_state (PlayerStateView): Dict-like view over player_buffer. It
+            contains one of each key in PLAYER_INITIAL_STATE but prefixed
             with "P<index_of_player>".
             Example: { P0_HAS_ROAD: False, P1_SETTLEMENTS_AVAILABLE: 18, ... }
         color_to_index (Dict[Color, int]): Color to seating location cache
@@ -111,7 +105,8 @@ class State:
         buildings_by_color (Dict[Color, Dict[FastBuildingType, List]]): Cache of
             buildings. Can be used like: `buildings_by_color[Color.RED][SETTLEMENT]`
             to get a list of all node ids where RED has settlements.
-        actions (List[Action]): Log of all actions taken. Fully-specified actions.
+        actions (ActionLog): Log of all actions taken. Fully-specified actions.
+            List-like, and shared by copies (see models/action_log.py).
         num_turns (int): number of turns thus far
         current_player_index (int): index per colors array of player that should be
             making a decision now. Not necesarilly the same as current_turn_index
@@ -125,27 +120,67 @@ class State:
             Building dev card.
         free_roads_available (int): Number of roads available left in Road Building
             phase.
+        players_zobrist (int): Incrementally maintained Zobrist hash of
+            player_buffer. See catanatron.zobrist.
+        zobrist (int): Zobrist hash of the whole state. Equal states hash equal.
         playable_actions (List[Action]): List of playable actions by current player.
+            Generated lazily on first access after each action (see
+            invalidate_playable_actions).
+        rules (SimulationRules): Optional rules in play. Immutable.
+
+    States (and Boards and Games) use __slots__ and share everything they
+    don't change with their copies, so search trees can hold many of them.
+    Besides the action log, a copy takes about 1KB of its own (see
+    catanatron_experimental/benchmarks/benchmark_state_memory.py); keep it
+    that way when adding fields.
     """
 
+    __slots__ = (
+        "players",
+        "colors",
+        "board",
+        "discard_limit",
+        "rules",
+        "player_buffer",
+        "players_zobrist",
+        "color_to_index",
+        "resource_freqdeck",
+        "development_listdeck",
+        "buildings_by_color",
+        "actions",
+        "num_turns",
+        "current_player_index",
+        "current_turn_index",
+        "current_prompt",
+        "is_initial_build_phase",
+        "is_discarding",
+        "is_moving_knight",
+        "is_road_building",
+        "free_roads_available",
+        "is_resolving_trade",
+        "current_trade",
+        "acceptees",
+        "_playable_actions",
+        "_play_turn_cache",
+    )
+
     def __init__(
         self,
         players: Sequence[Player],
         catan_map=None,
         discard_limit=7,
         initialize=True,
+        rules=None,
     ):
         if initialize:
             self.players = random.sample(players, len(players))
             self.colors = tuple([player.color for player in self.players])
             self.board = Board(catan_map or CatanMap.from_template(BASE_MAP_TEMPLATE))
             self.discard_limit = discard_limit
+            self.rules = rules or DEFAULT_RULES
 
-            # feature-ready dictionary
-            self.player_state = dict()
-            for index in range(len(self.colors)):
-                for key, value in PLAYER_INITIAL_STATE.items():
-                    self.player_state[f"P{index}_{key}"] = value
+            self.player_buffer = initial_player_buffer(len(self.colors))
+            self.players_zobrist = players_zobrist_hash(self.player_buffer)
             self.color_to_index = {
                 color: index for index, color in enumerate(self.colors)
             }
@@ -156,9 +191,9 @@ class State:
 
             # Auxiliary attributes to implement game logic
             self.buildings_by_color: Dict[Color, Dict[Any, Any]] = {
-                p.color: defaultdict(list) for p in players
+                p.color: {SETTLEMENT: [], CITY: [], ROAD: []} for p in players
             }
-            self.actions: List[Action] = []  # log of all action taken by players
+            self.actions = ActionLog()  # log of all action taken by players
             self.num_turns = 0  # num_completed_turns
 
             # Current prompt / player
@@ -178,7 +213,37 @@ class State:
             self.current_trade: Tuple = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
             self.acceptees = tuple(None for _ in self.colors)  # 改用 None 初始化
 
-            self.playable_actions = generate_playable_actions(self)
+            self._playable_actions = None
+            self._play_turn_cache = {}
+
+    @property
+    def playable_actions(self):
+        if self._playable_actions is None:
+            self._playable_actions = generate_playable_actions(
+                self, self._play_turn_cache
+            )
+        return self._playable_actions
+
+    @playable_actions.setter
+    def playable_actions(self, actions):
+        self._playable_actions = actions
+        self._play_turn_cache = {}
+
+    @property
+    def player_state(self):
+        """Feature-ready, dict-like view over .player_buffer"""
+        return PlayerStateView(self)
+
+    @player_state.setter
+    def player_state(self, mapping):
+        self.player_buffer = initial_player_buffer(len(self.colors))
+        self.player_state.update(mapping)
+        self.players_zobrist = players_zobrist_hash(self.player_buffer)
+
+    @property
+    def zobrist(self):
+        """64-bit Zobrist hash of this state (see catanatron.zobrist)"""
+        return self.board.zobrist ^ self.players_zobrist ^ scalars_zobrist_hash(self)
 
     def current_player(self):
         """Helper for accessing Player instance who should decide next"""
@@ -192,26 +257,30 @@ class State:
         """Creates a copy of this State class that can be modified without
         repercusions to this one. Immutable values are just copied over.
 
+        The board, bank decks and buildings_by_color are shared with the copy:
+        game logic never mutates them in place (it replaces them with updated
+        copies instead), so only the player buffer needs to be duplicated.
+
         Returns:
             State: State copy.
         """
         state_copy = State([], None, initialize=False)
         state_copy.players = self.players
         state_copy.discard_limit = self.discard_limit  # immutable
+        state_copy.rules = self.rules  # immutable
 
         state_copy.board = self.board.copy()
 
-        state_copy.player_state = self.player_state.copy()
+        state_copy.player_buffer = self.player_buffer[:]
+        state_copy.players_zobrist = self.players_zobrist
         state_copy.color_to_index = self.color_to_index
         state_copy.colors = self.colors  # immutable
 
-        state_copy.resource_freqdeck = self.resource_freqdeck.copy()
-        state_copy.development_listdeck = self.development_listdeck.copy()
+        state_copy.resource_freqdeck = self.resource_freqdeck
+        state_copy.development_listdeck = self.development_listdeck
 
-        state_copy.buildings_by_color = pickle.loads(
-            pickle.dumps(self.buildings_by_color)
-        )
-        state_copy.actions = self.actions.copy()
+        state_copy.buildings_by_color = self.buildings_by_color
+        state_copy.actions = self.actions.copy()  # O(1), shares history
         state_copy.num_turns = self.num_turns
 
         # Current prompt / player
@@ -230,7 +299,8 @@ class State:
         state_copy.current_trade = self.current_trade
         state_copy.acceptees = self.acceptees
 
-        state_copy.playable_actions = self.playable_actions
+        state_copy._playable_actions = self._playable_actions
+        state_copy._play_turn_cache = self._play_turn_cache.copy()
         return state_copy
 
 
@@ -257,41 +327,22 @@ def yield_resources(board: Board, resource_freqdeck, number):
             Second is an array of resources that couldn't be yieleded
             because they depleted.
     """
-    intented_payout: Dict[Color, Dict[FastResource, int]] = defaultdict(
-        lambda: defaultdict(int)
-    )
-    resource_totals: Dict[FastResource, int] = defaultdict(int)
-    for coordinate, tile in board.map.land_tiles.items():
-        if tile.number != number or board.robber_coordinate == coordinate:
-            continue  # doesn't yield
-
-        for node_id in tile.nodes.values():
-            building = board.buildings.get(node_id, None)
-            assert tile.resource is not None
-            if building is None:
-                continue
-            elif building[1] == SETTLEMENT:
-                intented_payout[building[0]][tile.resource] += 1
-                resource_totals[tile.resource] += 1
-            elif building[1] == CITY:
-                intented_payout[building[0]][tile.resource] += 2
-                resource_totals[tile.resource] += 2
+    payout: Dict[Color, List[int]] = {}
+    totals = [0, 0, 0, 0, 0]
+    for _, _, color, resource_index, amount in board.payouts.get(number, ()):
+        freqdeck = payout.get(color)
+        if freqdeck is None:
+            freqdeck = payout[color] = [0, 0, 0, 0, 0]
+        freqdeck[resource_index] += amount
+        totals[resource_index] += amount
 
     # for each resource, check enough in deck to yield.
     depleted = []
-    for resource in RESOURCES:
-        total = resource_totals[resource]
-        if not freqdeck_can_draw(resource_freqdeck, total, resource):
+    for index, resource in enumerate(RESOURCES):
+        if totals[index] > resource_freqdeck[index]:
             depleted.append(resource)
-
-    # build final data color => freqdeck structure
-    payout = {}
-    for player, player_payout in intented_payout.items():
-        payout[player] = [0, 0, 0, 0, 0]
-
-        for resource, count in player_payout.items():
-            if resource not in depleted:
-                freqdeck_replenish(payout[player], count, resource)
+            for freqdeck in payout.values():
+                freqdeck[index] = 0
 
     return payout, depleted
 
@@ -304,11 +355,29 @@ def advance_turn(state, direction=1):
     state.num_turns += 1
 
 
+def invalidate_playable_actions(state, keep=()):
+    """Marks state.playable_actions for regeneration on next access.
+
+    Args:
+        state (State): State that was just changed.
+        keep (Iterable[str]): PLAY_TURN categories (see
+            catanatron.models.actions) that the change couldn't have affected,
+            and so can be reused from the current ones.
+    """
+    state._playable_actions = None
+    play_turn_cache = state._play_turn_cache
+    state._play_turn_cache = {
+        category: play_turn_cache[category]
+        for category in keep
+        if category in play_turn_cache
+    }
+
+
 def next_player_index(state, direction=1):
     return (state.current_player_index + direction) % len(state.colors)
 
 
-def apply_action(state: State, action: Action):
+def apply_action(state: State, action: Action, log: bool = True):
     """Main controller call. Follows redux-like pattern and
     routes the given action to the appropiate state-changing calls.
 
@@ -321,6 +390,8 @@ def apply_action(state: State, action: Action):
     Args:
         state (State): State to mutate
         action (Action): Action to carry out
+        log (bool, optional): Whether to append the action to state.actions.
+            Playouts that only need the outcome skip it. Defaults to True.
 
     Raises:
         ValueError: If invalid action given
@@ -333,7 +404,7 @@ def apply_action(state: State, action: Action):
         player_clean_turn(state, action.color)
         advance_turn(state)
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.BUILD_SETTLEMENT:
         node_id = action.value
         if state.is_initial_build_phase:
@@ -344,15 +415,18 @@ def apply_action(state: State, action: Action):
             # yield resources if second settlement
             is_second_house = len(buildings) == 2
             if is_second_house:
-                key = player_key(state, action.color)
+                base = player_offset(state, action.color)
+                resource_freqdeck = state.resource_freqdeck.copy()
                 for tile in state.board.map.adjacent_tiles[node_id]:
                     if tile.resource != None:
-                        freqdeck_draw(state.resource_freqdeck, 1, tile.resource)  # type: ignore
-                        state.player_state[f"{key}_{tile.resource}_IN_HAND"] += 1
+                        freqdeck_draw(resource_freqdeck, 1, tile.resource)  # type: ignore
+                        index = base + CARD_IN_HAND[tile.resource]
+                        player_buffer_add(state, index, 1)
+                state.resource_freqdeck = resource_freqdeck
 
             # state.current_player_index stays the same
             state.current_prompt = ActionPrompt.BUILD_INITIAL_ROAD
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(state)
         else:
             (
                 previous_road_color,
@@ -367,7 +441,7 @@ def apply_action(state: State, action: Action):
 
             # state.current_player_index stays the same
             # state.current_prompt stays as PLAY
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(state)
     elif action.action_type == ActionType.BUILD_ROAD:
         edge = action.value
         if state.is_initial_build_phase:
@@ -395,7 +469,7 @@ def apply_action(state: State, action: Action):
             else:
                 advance_turn(state, -1)
                 state.current_prompt = ActionPrompt.BUILD_INITIAL_SETTLEMENT
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(state)
         elif state.is_road_building and state.free_roads_available > 0:
             result = state.board.build_road(action.color, edge)
             previous_road_color, road_color, road_lengths = result
@@ -411,7 +485,7 @@ def apply_action(state: State, action: Action):
                 state.free_roads_available = 0
                 # state.current_player_index stays the same
                 # state.current_prompt stays as PLAY
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(state)
         else:
             result = state.board.build_road(action.color, edge)
             previous_road_color, road_color, road_lengths = result
@@ -420,7 +494,9 @@ def apply_action(state: State, action: Action):
 
             # state.current_player_index stays the same
             # state.current_prompt stays as PLAY
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(
+                state, keep=(CITIES, BUY_DEVELOPMENT_CARD, END_TURN)
+            )
     elif action.action_type == ActionType.BUILD_CITY:
         node_id = action.value
         state.board.build_city(action.color, node_id)
@@ -431,35 +507,40 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         # state.current_prompt stays as PLAY
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state, keep=(ROADS, END_TURN))
     elif action.action_type == ActionType.BUY_DEVELOPMENT_CARD:
         if len(state.development_listdeck) == 0:
             raise ValueError("No more development cards")
         if not player_can_afford_dev_card(state, action.color):
             raise ValueError("No money to buy development card")
 
+        development_listdeck = state.development_listdeck.copy()
         if action.value is None:
-            card = state.development_listdeck.pop()  # already shuffled
+            card = development_listdeck.pop()  # already shuffled
         else:
             card = action.value
-            draw_from_listdeck(state.development_listdeck, 1, card)
+            draw_from_listdeck(development_listdeck, 1, card)
+        state.development_listdeck = development_listdeck
 
         buy_dev_card(state, action.color, card)
         state.resource_freqdeck = freqdeck_add(
             state.resource_freqdeck, DEVELOPMENT_CARD_COST_FREQDECK
         )
 
-        action = Action(action.color, action.action_type, card)
+        action = get_action(action.color, action.action_type, card)
         # state.current_player_index stays the same
         # state.current_prompt stays as PLAY
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state, keep=(ROADS, END_TURN))
     elif action.action_type == ActionType.ROLL:
-        key = player_key(state, action.color)
-        state.player_state[f"{key}_HAS_ROLLED"] = True
+        index = player_offset(state, action.color) + HAS_ROLLED
+        player_buffer_set(state, index, True)
 
-        dices = action.value or roll_dice()
+        if action.value is None:
+            dices = roll_dice()
+            action = get_action(action.color, action.action_type, dices)
+        else:  # for replay functionality
+            dices = action.value
         number = dices[0] + dices[1]
-        action = Action(action.color, action.action_type, dices)
 
         if number == 7:
             discarders = [
@@ -476,7 +557,7 @@ def apply_action(state: State, action: Action):
                 # state.current_player_index stays the same
                 state.current_prompt = ActionPrompt.MOVE_ROBBER
                 state.is_moving_knight = True
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(state)
         else:
             payout, _ = yield_resources(state.board, state.resource_freqdeck, number)
             for color, resource_freqdeck in payout.items():
@@ -488,7 +569,7 @@ def apply_action(state: State, action: Action):
 
             # state.current_player_index stays the same
             state.current_prompt = ActionPrompt.PLAY_TURN
-            state.playable_actions = generate_playable_actions(state)
+            invalidate_playable_actions(state)
     elif action.action_type == ActionType.DISCARD:
         hand = player_deck_to_array(state, action.color)
         num_to_discard = len(hand) // 2
@@ -517,14 +598,14 @@ def apply_action(state: State, action: Action):
             state.is_discarding = False
             state.is_moving_knight = True
 
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.MOVE_ROBBER:
         (coordinate, robbed_color, robbed_resource) = action.value
-        state.board.robber_coordinate = coordinate
+        state.board.move_robber(coordinate)
         if robbed_color is not None:
             if robbed_resource is None:
                 robbed_resource = player_deck_random_draw(state, robbed_color)
-                action = Action(
+                action = get_action(
                     action.color,
                     action.action_type,
                     (coordinate, robbed_color, robbed_resource),
@@ -535,7 +616,7 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_KNIGHT_CARD:
         if not player_can_play_dev(state, action.color, "KNIGHT"):
             raise ValueError("Player cant play knight card now")
@@ -544,7 +625,7 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.MOVE_ROBBER
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_YEAR_OF_PLENTY:
         cards_selected = freqdeck_from_listdeck(action.value)
         if not player_can_play_dev(state, action.color, YEAR_OF_PLENTY):
@@ -559,7 +640,7 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_MONOPOLY:
         mono_resource = action.value
         cards_stolen = [0, 0, 0, 0, 0]
@@ -567,10 +648,9 @@ def apply_action(state: State, action: Action):
             raise ValueError("Player cant play monopoly now")
         for color in state.colors:
             if not color == action.color:
-                key = player_key(state, color)
-                number_of_cards_to_steal = state.player_state[
-                    f"{key}_{mono_resource}_IN_HAND"
-                ]
+                number_of_cards_to_steal = player_num_resource_cards(
+                    state, color, mono_resource
+                )
                 freqdeck_replenish(
                     cards_stolen, number_of_cards_to_steal, mono_resource
                 )
@@ -580,7 +660,7 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_ROAD_BUILDING:
         if not player_can_play_dev(state, action.color, "ROAD_BUILDING"):
             raise ValueError("Player cant play road building now")
@@ -591,7 +671,7 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.MARITIME_TRADE:
         trade_offer = action.value
         offering = freqdeck_from_listdeck(
@@ -609,7 +689,7 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
     elif action.action_type == ActionType.OFFER_TRADE:
         # 設置交易狀態
         state.is_resolving_trade = True
@@ -630,7 +710,7 @@ def apply_action(state: State, action: Action):
             # 只有一個玩家的情況（不應該發生）
             reset_trading_state(state)
 
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
 
     elif action.action_type == ActionType.CANCEL_TRADE:
         print(f"{action.color.value} is canceling the trade")
@@ -655,7 +735,7 @@ def apply_action(state: State, action: Action):
             print(f"{action.color.value} cannot cancel trade - no active trade")
         
         # 重新生成可用行動
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
 
     elif action.action_type == ActionType.REJECT_TRADE:
         print(f"{action.color.value} is rejecting the trade")
@@ -694,7 +774,7 @@ def apply_action(state: State, action: Action):
             state.current_player_index = initiator_index  # 修復
             state.current_prompt = ActionPrompt.DECIDE_ACCEPTEES
 
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
 
     elif action.action_type == ActionType.ACCEPT_TRADE:
         print(f"{action.color.value} is accepting the trade")
@@ -719,7 +799,7 @@ def apply_action(state: State, action: Action):
             state.current_player_index = initiator_index  # 修復
             state.current_prompt = ActionPrompt.DECIDE_ACCEPTEES
 
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
 
     elif action.action_type == ActionType.CONFIRM_TRADE:
         print(f"{action.color.value} is confirming the trade")
@@ -747,16 +827,116 @@ def apply_action(state: State, action: Action):
         state.current_player_index = state.current_turn_index
         state.current_prompt = ActionPrompt.PLAY_TURN
         
-        state.playable_actions = generate_playable_actions(state)
+        invalidate_playable_actions(state)
 
     else:
         raise ValueError("Unknown ActionType " + str(action.action_type))
 
     # TODO: Think about possible-action/idea vs finalized-action design
-    state.actions.append(action)
+    if log:
+        state.actions.append(action)
     return action
 
 
+# Attributes apply_action may (re)assign. Containers held by them are never
+# mutated in place (see State.copy), so keeping references is enough to
+# restore them; player_buffer is the only one that needs a copy.
+UNDO_STATE_FIELDS = (
+    "resource_freqdeck",
+    "development_listdeck",
+    "buildings_by_color",
+    "num_turns",
+    "current_player_index",
+    "current_turn_index",
+    "current_prompt",
+    "is_initial_build_phase",
+    "is_discarding",
+    "is_moving_knight",
+    "is_road_building",
+    "free_roads_available",
+    "is_resolving_trade",
+    "current_trade",
+    "acceptees",
+    "players_zobrist",
+    "_playable_actions",
+    "_play_turn_cache",
+)
+UNDO_BOARD_FIELDS = (
+    "buildings",
+    "roads",
+    "component_masks",
+    "road_lengths",
+    "road_color",
+    "road_length",
+    "robber_coordinate",
+    "zobrist",
+    "payouts",
+    "settlement_mask",
+    "city_mask",
+    "road_mask",
+    "occupied_node_mask",
+    "occupied_edge_mask",
+    "buildable_node_mask",
+    "component_node_mask",
+    "buildable_edges_cache",
+    "player_port_resources_cache",
+)
+_get_state_fields = operator.attrgetter(*UNDO_STATE_FIELDS)
+_get_board_fields = operator.attrgetter(*UNDO_BOARD_FIELDS)
+
+
+class UndoRecord(NamedTuple):
+    """What undo_action needs to restore a State to how it was before
+    apply_action_with_undo."""
+
+    action: Action  # fully-specified action that was applied
+    player_buffer: Sequence[int]
+    num_actions: int
+    state_fields: Tuple
+    board_fields: Tuple
+
+
+def apply_action_with_undo(state: State, action: Action) -> UndoRecord:
+    """Like apply_action (mutates state in place), but also returns an
+    UndoRecord so that undo_action(state, record) can restore the exact
+    prior state. Allows searching via make/evaluate/unmake instead of
+    copying the state for every action tried.
+
+    If apply_action raises, state is restored before re-raising.
+
+    Args:
+        state (State): State to mutate
+        action (Action): Action to carry out
+
+    Returns:
+        UndoRecord: Record to pass to undo_action. Its .action is the
+            fully-specified action (as returned by apply_action).
+    """
+    player_buffer = state.player_buffer[:]
+    num_actions = len(state.actions)
+    state_fields = _get_state_fields(state)
+    board_fields = _get_board_fields(state.board)
+    record = UndoRecord(action, player_buffer, num_actions, state_fields, board_fields)
+    try:
+        action = apply_action(state, action)
+    except Exception:
+        undo_action(state, record)
+        raise
+    return record._replace(action=action)
+
+
+def undo_action(state: State, record: UndoRecord):
+    """Reverts the apply_action_with_undo call that produced record.
+    Records must be undone in reverse order (last applied, first undone)."""
+    state.player_buffer = record.player_buffer
+    state.actions.truncate(record.num_actions)
+    for field, value in zip(UNDO_STATE_FIELDS, record.state_fields):
+        setattr(state, field, value)
+    board = state.board
+    for field, value in zip(UNDO_BOARD_FIELDS, record.board_fields):
+        setattr(board, field, value)
+
+
 def reset_trading_state(state):
     """重置所有交易相關狀態"""
     state.is_resolving_trade = False
@@ -20,27 +20,52 @@ from catanatron.models.enums import (
     ROAD,
     FastResource,
 )
+from catanatron.zobrist import PLAYER_FIELD_KEYS, VALUE_KEYS_MASK
+from catanatron.player_state import (
+    ACTUAL_VICTORY_POINTS,
+    BRICK_IN_HAND,
+    CARD_IN_HAND,
+    CITIES_AVAILABLE,
+    DEV_CARD_IN_HAND,
+    DEV_CARD_OWNED_AT_START,
+    HAND_END,
+    HAS_ARMY,
+    HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN,
+    HAS_ROAD,
+    HAS_ROLLED,
+    LONGEST_ROAD_LENGTH,
+    NUM_PLAYER_FIELDS,
+    ORE_IN_HAND,
+    PLAYED_DEV_CARD,
+    RESOURCE_IN_HAND,
+    ROADS_AVAILABLE,
+    SETTLEMENTS_AVAILABLE,
+    SHEEP_IN_HAND,
+    VICTORY_POINTS,
+    WHEAT_IN_HAND,
+    WOOD_IN_HAND,
+)
 
 
 def maintain_longest_road(state, previous_road_color, road_color, road_lengths):
     for color, length in road_lengths.items():
-        key = player_key(state, color)
-        state.player_state[f"{key}_LONGEST_ROAD_LENGTH"] = length
+        base = player_offset(state, color)
+        player_buffer_set(state, base + LONGEST_ROAD_LENGTH, length)
 
     # If road_color is not set or is the same as before, do nothing.
     if road_color is None or (previous_road_color == road_color):
         return
 
     # Set new longest road player and unset previous if any.
-    winner_key = player_key(state, road_color)
-    state.player_state[f"{winner_key}_HAS_ROAD"] = True
-    state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-    state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+    winner = player_offset(state, road_color)
+    player_buffer_set(state, winner + HAS_ROAD, True)
+    player_buffer_add(state, winner + VICTORY_POINTS, 2)
+    player_buffer_add(state, winner + ACTUAL_VICTORY_POINTS, 2)
     if previous_road_color is not None:
-        loser_key = player_key(state, previous_road_color)
-        state.player_state[f"{loser_key}_HAS_ROAD"] = False
-        state.player_state[f"{loser_key}_VICTORY_POINTS"] -= 2
-        state.player_state[f"{loser_key}_ACTUAL_VICTORY_POINTS"] -= 2
+        loser = player_offset(state, previous_road_color)
+        player_buffer_set(state, loser + HAS_ROAD, False)
+        player_buffer_add(state, loser + VICTORY_POINTS, -2)
+        player_buffer_add(state, loser + ACTUAL_VICTORY_POINTS, -2)
 
 
 def maintain_largest_army(state, color, previous_army_color, previous_army_size):
@@ -51,21 +76,21 @@ def maintain_largest_army(state, color, previous_army_color, previous_army_size)
         return
 
     if previous_army_color is None:
-        winner_key = player_key(state, color)
-        state.player_state[f"{winner_key}_HAS_ARMY"] = True
-        state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-        state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+        winner = player_offset(state, color)
+        player_buffer_set(state, winner + HAS_ARMY, True)
+        player_buffer_add(state, winner + VICTORY_POINTS, 2)
+        player_buffer_add(state, winner + ACTUAL_VICTORY_POINTS, 2)
     elif previous_army_size < candidate_size and previous_army_color != color:
         # switch, remove previous points and award to new king
-        winner_key = player_key(state, color)
-        state.player_state[f"{winner_key}_HAS_ARMY"] = True
-        state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-        state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
-
-        loser_key = player_key(state, previous_army_color)
-        state.player_state[f"{loser_key}_HAS_ARMY"] = False
-        state.player_state[f"{loser_key}_VICTORY_POINTS"] -= 2
-        state.player_state[f"{loser_key}_ACTUAL_VICTORY_POINTS"] -= 2
+        winner = player_offset(state, color)
+        player_buffer_set(state, winner + HAS_ARMY, True)
+        player_buffer_add(state, winner + VICTORY_POINTS, 2)
+        player_buffer_add(state, winner + ACTUAL_VICTORY_POINTS, 2)
+
+        loser = player_offset(state, previous_army_color)
+        player_buffer_set(state, loser + HAS_ARMY, False)
+        player_buffer_add(state, loser + VICTORY_POINTS, -2)
+        player_buffer_add(state, loser + ACTUAL_VICTORY_POINTS, -2)
     # else: someone else has army and we dont compete
 
 
@@ -74,72 +99,78 @@ def player_key(state, color):
     return f"P{state.color_to_index[color]}"
 
 
+def player_offset(state, color):
+    """Start of color's block in state.player_buffer (see player_state.py)"""
+    return state.color_to_index[color] * NUM_PLAYER_FIELDS
+
+
 def get_enemy_colors(colors, player_color):
     return filter(lambda c: c != player_color, colors)
 
 
 def get_actual_victory_points(state, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
+    return state.player_buffer[player_offset(state, color) + ACTUAL_VICTORY_POINTS]
 
 
 def get_visible_victory_points(state, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_VICTORY_POINTS"]
+    return state.player_buffer[player_offset(state, color) + VICTORY_POINTS]
 
 
 def get_longest_road_color(state):
+    buffer = state.player_buffer
     for index in range(len(state.colors)):
-        if state.player_state[f"P{index}_HAS_ROAD"]:
+        if buffer[index * NUM_PLAYER_FIELDS + HAS_ROAD]:
             return state.colors[index]
     return None
 
 
 def get_largest_army(state):
+    buffer = state.player_buffer
     for index in range(len(state.colors)):
-        if state.player_state[f"P{index}_HAS_ARMY"]:
+        base = index * NUM_PLAYER_FIELDS
+        if buffer[base + HAS_ARMY]:
             return (
                 state.colors[index],
-                state.player_state[f"P{index}_PLAYED_KNIGHT"],
+                buffer[base + PLAYED_DEV_CARD["KNIGHT"]],
             )
     return None, None
 
 
 def player_has_rolled(state, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_HAS_ROLLED"]
+    return state.player_buffer[player_offset(state, color) + HAS_ROLLED]
 
 
 def get_longest_road_length(state, color):
-    key = player_key(state, color)
-    return state.player_state[key + "_LONGEST_ROAD_LENGTH"]
+    return state.player_buffer[player_offset(state, color) + LONGEST_ROAD_LENGTH]
 
 
 def get_played_dev_cards(state, color, dev_card=None):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     if dev_card is None:
         return (
-            state.player_state[f"{key}_PLAYED_KNIGHT"]
-            + state.player_state[f"{key}_PLAYED_MONOPOLY"]
-            + state.player_state[f"{key}_PLAYED_ROAD_BUILDING"]
-            + state.player_state[f"{key}_PLAYED_YEAR_OF_PLENTY"]
+            buffer[base + PLAYED_DEV_CARD["KNIGHT"]]
+            + buffer[base + PLAYED_DEV_CARD["MONOPOLY"]]
+            + buffer[base + PLAYED_DEV_CARD["ROAD_BUILDING"]]
+            + buffer[base + PLAYED_DEV_CARD["YEAR_OF_PLENTY"]]
         )
     else:
-        return state.player_state[f"{key}_PLAYED_{dev_card}"]
+        return buffer[base + PLAYED_DEV_CARD[dev_card]]
 
 
 def get_dev_cards_in_hand(state, color, dev_card=None):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     if dev_card is None:
         return (
-            state.player_state[f"{key}_KNIGHT_IN_HAND"]
-            + state.player_state[f"{key}_MONOPOLY_IN_HAND"]
-            + state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"]
-            + state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"]
-            + state.player_state[f"{key}_VICTORY_POINT_IN_HAND"]
+            buffer[base + DEV_CARD_IN_HAND["KNIGHT"]]
+            + buffer[base + DEV_CARD_IN_HAND["MONOPOLY"]]
+            + buffer[base + DEV_CARD_IN_HAND["ROAD_BUILDING"]]
+            + buffer[base + DEV_CARD_IN_HAND["YEAR_OF_PLENTY"]]
+            + buffer[base + DEV_CARD_IN_HAND["VICTORY_POINT"]]
         )
     else:
-        return state.player_state[f"{key}_{dev_card}_IN_HAND"]
+        return buffer[base + DEV_CARD_IN_HAND[dev_card]]
 
 
 def get_player_buildings(state, color_param, building_type_param):
@@ -148,170 +179,191 @@ def get_player_buildings(state, color_param, building_type_param):
 
 def get_player_freqdeck(state, color):
     """Returns a 'freqdeck' of a player's resource hand."""
-    key = player_key(state, color)
-    return [
-        state.player_state[f"{key}_WOOD_IN_HAND"],
-        state.player_state[f"{key}_BRICK_IN_HAND"],
-        state.player_state[f"{key}_SHEEP_IN_HAND"],
-        state.player_state[f"{key}_WHEAT_IN_HAND"],
-        state.player_state[f"{key}_ORE_IN_HAND"],
-    ]
+    base = player_offset(state, color)
+    return state.player_buffer[base + WOOD_IN_HAND : base + HAND_END].tolist()
 
 
 # ===== State Mutators
+def player_buffer_add(state, index, amount):
+    """state.player_buffer[index] += amount, keeping state.players_zobrist in sync"""
+    buffer = state.player_buffer
+    keys = PLAYER_FIELD_KEYS[index]
+    value = buffer[index]
+    buffer[index] = value + amount
+    state.players_zobrist ^= (
+        keys[value & VALUE_KEYS_MASK] ^ keys[(value + amount) & VALUE_KEYS_MASK]
+    )
+
+
+def player_buffer_set(state, index, value):
+    """state.player_buffer[index] = value, keeping state.players_zobrist in sync"""
+    buffer = state.player_buffer
+    keys = PLAYER_FIELD_KEYS[index]
+    state.players_zobrist ^= (
+        keys[buffer[index] & VALUE_KEYS_MASK] ^ keys[value & VALUE_KEYS_MASK]
+    )
+    buffer[index] = value
+
+
+def _replace_player_buildings(state, color, building_type, buildings):
+    """Path-copies state.buildings_by_color (which copies of this state may
+    share) replacing color's building_type list with the given one."""
+    color_buildings = state.buildings_by_color[color].copy()
+    color_buildings[building_type] = buildings
+    state.buildings_by_color = {**state.buildings_by_color, color: color_buildings}
+
+
 def build_settlement(state, color, node_id, is_free):
-    state.buildings_by_color[color][SETTLEMENT].append(node_id)
+    settlements = state.buildings_by_color[color][SETTLEMENT]
+    _replace_player_buildings(state, color, SETTLEMENT, settlements + [node_id])
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] -= 1
+    base = player_offset(state, color)
+    player_buffer_add(state, base + SETTLEMENTS_AVAILABLE, -1)
 
-    state.player_state[f"{key}_VICTORY_POINTS"] += 1
-    state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+    player_buffer_add(state, base + VICTORY_POINTS, 1)
+    player_buffer_add(state, base + ACTUAL_VICTORY_POINTS, 1)
 
     if not is_free:
-        state.player_state[f"{key}_WOOD_IN_HAND"] -= 1
-        state.player_state[f"{key}_BRICK_IN_HAND"] -= 1
-        state.player_state[f"{key}_SHEEP_IN_HAND"] -= 1
-        state.player_state[f"{key}_WHEAT_IN_HAND"] -= 1
+        player_buffer_add(state, base + WOOD_IN_HAND, -1)
+        player_buffer_add(state, base + BRICK_IN_HAND, -1)
+        player_buffer_add(state, base + SHEEP_IN_HAND, -1)
+        player_buffer_add(state, base + WHEAT_IN_HAND, -1)
 
 
 def build_road(state, color, edge, is_free):
-    state.buildings_by_color[color][ROAD].append(edge)
+    roads = state.buildings_by_color[color][ROAD]
+    _replace_player_buildings(state, color, ROAD, roads + [edge])
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_ROADS_AVAILABLE"] -= 1
+    base = player_offset(state, color)
+    player_buffer_add(state, base + ROADS_AVAILABLE, -1)
     if not is_free:
-        state.player_state[f"{key}_WOOD_IN_HAND"] -= 1
-        state.player_state[f"{key}_BRICK_IN_HAND"] -= 1
+        player_buffer_add(state, base + WOOD_IN_HAND, -1)
+        player_buffer_add(state, base + BRICK_IN_HAND, -1)
         state.resource_freqdeck = freqdeck_add(
             state.resource_freqdeck, ROAD_COST_FREQDECK
         )  # replenish bank
 
 
 def build_city(state, color, node_id):
-    state.buildings_by_color[color][SETTLEMENT].remove(node_id)
-    state.buildings_by_color[color][CITY].append(node_id)
+    settlements = state.buildings_by_color[color][SETTLEMENT]
+    cities = state.buildings_by_color[color][CITY]
+    _replace_player_buildings(
+        state, color, SETTLEMENT, [n for n in settlements if n != node_id]
+    )
+    _replace_player_buildings(state, color, CITY, cities + [node_id])
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] += 1
-    state.player_state[f"{key}_CITIES_AVAILABLE"] -= 1
+    base = player_offset(state, color)
+    player_buffer_add(state, base + SETTLEMENTS_AVAILABLE, 1)
+    player_buffer_add(state, base + CITIES_AVAILABLE, -1)
 
-    state.player_state[f"{key}_VICTORY_POINTS"] += 1
-    state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+    player_buffer_add(state, base + VICTORY_POINTS, 1)
+    player_buffer_add(state, base + ACTUAL_VICTORY_POINTS, 1)
 
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= 2
-    state.player_state[f"{key}_ORE_IN_HAND"] -= 3
+    player_buffer_add(state, base + WHEAT_IN_HAND, -2)
+    player_buffer_add(state, base + ORE_IN_HAND, -3)
 
 
 # ===== Deck Functions
 def player_can_afford_dev_card(state, color):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     return (
-        state.player_state[f"{key}_SHEEP_IN_HAND"] >= 1
-        and state.player_state[f"{key}_WHEAT_IN_HAND"] >= 1
-        and state.player_state[f"{key}_ORE_IN_HAND"] >= 1
+        buffer[base + SHEEP_IN_HAND] >= 1
+        and buffer[base + WHEAT_IN_HAND] >= 1
+        and buffer[base + ORE_IN_HAND] >= 1
     )
 
 
 def player_resource_freqdeck_contains(state, color, freqdeck):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     return (
-        state.player_state[f"{key}_WOOD_IN_HAND"] >= freqdeck[0]
-        and state.player_state[f"{key}_BRICK_IN_HAND"] >= freqdeck[1]
-        and state.player_state[f"{key}_SHEEP_IN_HAND"] >= freqdeck[2]
-        and state.player_state[f"{key}_WHEAT_IN_HAND"] >= freqdeck[3]
-        and state.player_state[f"{key}_ORE_IN_HAND"] >= freqdeck[4]
+        buffer[base + WOOD_IN_HAND] >= freqdeck[0]
+        and buffer[base + BRICK_IN_HAND] >= freqdeck[1]
+        and buffer[base + SHEEP_IN_HAND] >= freqdeck[2]
+        and buffer[base + WHEAT_IN_HAND] >= freqdeck[3]
+        and buffer[base + ORE_IN_HAND] >= freqdeck[4]
     )
 
 
 def player_can_play_dev(state, color, dev_card):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     return (
-        not state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"]
-        and state.player_state[f"{key}_{dev_card}_IN_HAND"] >= 1
-        and state.player_state[f"{key}_{dev_card}_OWNED_AT_START"]
+        not buffer[base + HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN]
+        and buffer[base + DEV_CARD_IN_HAND[dev_card]] >= 1
+        and buffer[base + DEV_CARD_OWNED_AT_START[dev_card]]
     )
 
 
 def player_freqdeck_add(state, color, freqdeck):
-    key = player_key(state, color)
-    state.player_state[f"{key}_WOOD_IN_HAND"] += freqdeck[0]
-    state.player_state[f"{key}_BRICK_IN_HAND"] += freqdeck[1]
-    state.player_state[f"{key}_SHEEP_IN_HAND"] += freqdeck[2]
-    state.player_state[f"{key}_WHEAT_IN_HAND"] += freqdeck[3]
-    state.player_state[f"{key}_ORE_IN_HAND"] += freqdeck[4]
+    base = player_offset(state, color)
+    player_buffer_add(state, base + WOOD_IN_HAND, freqdeck[0])
+    player_buffer_add(state, base + BRICK_IN_HAND, freqdeck[1])
+    player_buffer_add(state, base + SHEEP_IN_HAND, freqdeck[2])
+    player_buffer_add(state, base + WHEAT_IN_HAND, freqdeck[3])
+    player_buffer_add(state, base + ORE_IN_HAND, freqdeck[4])
 
 
 def player_freqdeck_subtract(state, color, freqdeck):
-    key = player_key(state, color)
-    state.player_state[f"{key}_WOOD_IN_HAND"] -= freqdeck[0]
-    state.player_state[f"{key}_BRICK_IN_HAND"] -= freqdeck[1]
-    state.player_state[f"{key}_SHEEP_IN_HAND"] -= freqdeck[2]
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= freqdeck[3]
-    state.player_state[f"{key}_ORE_IN_HAND"] -= freqdeck[4]
+    base = player_offset(state, color)
+    player_buffer_add(state, base + WOOD_IN_HAND, -freqdeck[0])
+    player_buffer_add(state, base + BRICK_IN_HAND, -freqdeck[1])
+    player_buffer_add(state, base + SHEEP_IN_HAND, -freqdeck[2])
+    player_buffer_add(state, base + WHEAT_IN_HAND, -freqdeck[3])
+    player_buffer_add(state, base + ORE_IN_HAND, -freqdeck[4])
 
 
 def buy_dev_card(state, color, dev_card):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
 
-    assert state.player_state[f"{key}_SHEEP_IN_HAND"] >= 1
-    assert state.player_state[f"{key}_WHEAT_IN_HAND"] >= 1
-    assert state.player_state[f"{key}_ORE_IN_HAND"] >= 1
+    assert buffer[base + SHEEP_IN_HAND] >= 1
+    assert buffer[base + WHEAT_IN_HAND] >= 1
+    assert buffer[base + ORE_IN_HAND] >= 1
 
-    state.player_state[f"{key}_{dev_card}_IN_HAND"] += 1
+    player_buffer_add(state, base + DEV_CARD_IN_HAND[dev_card], 1)
     if dev_card == VICTORY_POINT:
-        state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+        player_buffer_add(state, base + ACTUAL_VICTORY_POINTS, 1)
 
-    state.player_state[f"{key}_SHEEP_IN_HAND"] -= 1
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= 1
-    state.player_state[f"{key}_ORE_IN_HAND"] -= 1
+    player_buffer_add(state, base + SHEEP_IN_HAND, -1)
+    player_buffer_add(state, base + WHEAT_IN_HAND, -1)
+    player_buffer_add(state, base + ORE_IN_HAND, -1)
 
 
 def player_num_resource_cards(state, color, card: Optional[FastResource] = None):
-    key = player_key(state, color)
+    base = player_offset(state, color)
     if card is None:
-        return (
-            state.player_state[f"{key}_WOOD_IN_HAND"]
-            + state.player_state[f"{key}_BRICK_IN_HAND"]
-            + state.player_state[f"{key}_SHEEP_IN_HAND"]
-            + state.player_state[f"{key}_WHEAT_IN_HAND"]
-            + state.player_state[f"{key}_ORE_IN_HAND"]
-        )
+        return sum(state.player_buffer[base + WOOD_IN_HAND : base + HAND_END])
     else:
-        return state.player_state[f"{key}_{card}_IN_HAND"]
+        return state.player_buffer[base + RESOURCE_IN_HAND[card]]
 
 
 def player_num_dev_cards(state, color):
-    key = player_key(state, color)
-    return (
-        state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"]
-        + state.player_state[f"{key}_MONOPOLY_IN_HAND"]
-        + state.player_state[f"{key}_VICTORY_POINT_IN_HAND"]
-        + state.player_state[f"{key}_KNIGHT_IN_HAND"]
-        + state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"]
-    )
+    return get_dev_cards_in_hand(state, color)
 
 
 def player_deck_to_array(state, color):
-    key = player_key(state, color)
+    buffer = state.player_buffer
+    base = player_offset(state, color)
     return (
-        state.player_state[f"{key}_WOOD_IN_HAND"] * [WOOD]
-        + state.player_state[f"{key}_BRICK_IN_HAND"] * [BRICK]
-        + state.player_state[f"{key}_SHEEP_IN_HAND"] * [SHEEP]
-        + state.player_state[f"{key}_WHEAT_IN_HAND"] * [WHEAT]
-        + state.player_state[f"{key}_ORE_IN_HAND"] * [ORE]
+        buffer[base + WOOD_IN_HAND] * [WOOD]
+        + buffer[base + BRICK_IN_HAND] * [BRICK]
+        + buffer[base + SHEEP_IN_HAND] * [SHEEP]
+        + buffer[base + WHEAT_IN_HAND] * [WHEAT]
+        + buffer[base + ORE_IN_HAND] * [ORE]
     )
 
 
 def player_deck_draw(state, color, card, amount=1):
-    key = player_key(state, color)
-    assert state.player_state[f"{key}_{card}_IN_HAND"] >= amount
-    state.player_state[f"{key}_{card}_IN_HAND"] -= amount
+    index = player_offset(state, color) + CARD_IN_HAND[card]
+    assert state.player_buffer[index] >= amount
+    player_buffer_add(state, index, -amount)
 
 
 def player_deck_replenish(state, color, resource, amount=1):
-    key = player_key(state, color)
-    state.player_state[f"{key}_{resource}_IN_HAND"] += amount
+    index = player_offset(state, color) + CARD_IN_HAND[resource]
+    player_buffer_add(state, index, amount)
 
 
 def player_deck_random_draw(state, color):
@@ -324,28 +376,20 @@ def player_deck_random_draw(state, color):
 def play_dev_card(state, color, dev_card):
     if dev_card == "KNIGHT":
         previous_army_color, previous_army_size = get_largest_army(state)
-    key = player_key(state, color)
     player_deck_draw(state, color, dev_card)
-    state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = True
-    state.player_state[f"{key}_PLAYED_{dev_card}"] += 1
+    base = player_offset(state, color)
+    player_buffer_set(state, base + HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN, True)
+    player_buffer_add(state, base + PLAYED_DEV_CARD[dev_card], 1)
     if dev_card == "KNIGHT":
         maintain_largest_army(state, color, previous_army_color, previous_army_size)  # type: ignore
 
 
 def player_clean_turn(state, color):
-    key = player_key(state, color)
-    state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = False
-    state.player_state[f"{key}_HAS_ROLLED"] = False
+    buffer = state.player_buffer
+    base = player_offset(state, color)
+    player_buffer_set(state, base + HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN, False)
+    player_buffer_set(state, base + HAS_ROLLED, False)
     # Dev cards owned this turn will be playable next turn
-    state.player_state[f"{key}_KNIGHT_OWNED_AT_START"] = (
-        state.player_state[f"{key}_KNIGHT_IN_HAND"] > 0
-    )
-    state.player_state[f"{key}_MONOPOLY_OWNED_AT_START"] = (
-        state.player_state[f"{key}_MONOPOLY_IN_HAND"] > 0
-    )
-    state.player_state[f"{key}_YEAR_OF_PLENTY_OWNED_AT_START"] = (
-        state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"] > 0
-    )
-    state.player_state[f"{key}_ROAD_BUILDING_OWNED_AT_START"] = (
-        state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"] > 0
-    )
+    for dev_card, owned_index in DEV_CARD_OWNED_AT_START.items():
+        owned = buffer[base + DEV_CARD_IN_HAND[dev_card]] > 0
+        player_buffer_set(state, base + owned_index, owned)
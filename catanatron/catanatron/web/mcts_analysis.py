@@ -1,9 +1,14 @@
-from catanatron.players.mcts import StateNode
+from catanatron.players.mcts import MCTSPlayer
 
 
 class GameAnalyzer:
-    def __init__(self, num_simulations=100):
+    """num_workers > 1 runs the simulations in that many processes (see
+    MCTSPlayer), which stay up between analyses. They are shared by the
+    whole process, and serve one analysis (or other search) at a time."""
+
+    def __init__(self, num_simulations=100, num_workers=1):
         self.num_simulations = num_simulations
+        self.num_workers = num_workers
 
     def analyze_win_probabilities(self, game):
         """Uses MCTS to analyze win probabilities from current game state"""
@@ -16,9 +21,13 @@ class GameAnalyzer:
             return result
 
         # Create root node and run simulations
-        root = StateNode(game.state.current_color(), game.copy(), None, prunning=True)
-        for _ in range(self.num_simulations):
-            root.run_simulation()
+        player = MCTSPlayer(
+            game.state.current_color(),
+            self.num_simulations,
+            prunning=True,
+            num_workers=self.num_workers,
+        )
+        root = player.search(game)
 
         # Calculate probabilities using MCTS statistics
         probabilities = {}
@@ -0,0 +1,132 @@
+"""
+Zobrist hashing of game states.
+
+A state's hash (State.zobrist) is the XOR of three parts:
+
+- Board.zobrist: one random key per (node, color, building), (edge, color)
+    and robber coordinate. Maintained incrementally by Board's mutators.
+- State.players_zobrist: one random key per (player buffer index, value).
+    Maintained incrementally by the player-buffer mutators in
+    state_functions.py (see player_buffer_add and player_buffer_set), which
+    writes to State.player_state go through too.
+- A keyed hash of the handful of scalar fields (current player and turn,
+    prompt flags, trade in progress, bank and dev deck size), computed when
+    the hash is read.
+
+Keys are generated from a fixed seed, so hashes are stable across processes
+and can be used to deduplicate datasets. Code that writes player_buffer
+directly (i.e. not through state_functions) should re-sync with
+`state.players_zobrist = players_zobrist_hash(state.player_buffer)`.
+"""
+
+import functools
+import random
+
+from catanatron.models.enums import CITY, SETTLEMENT, ActionPrompt
+from catanatron.models.player import Color
+from catanatron.player_state import NUM_PLAYER_FIELDS
+
+ZOBRIST_SEED = 0xCA7A
+MASK_64 = (1 << 64) - 1
+
+MAX_PLAYERS = len(Color)
+# Player buffer values are small ints/bools; keys cycle past this range.
+NUM_VALUE_KEYS = 64
+VALUE_KEYS_MASK = NUM_VALUE_KEYS - 1
+
+_rng = random.Random(ZOBRIST_SEED)
+# PLAYER_FIELD_KEYS[buffer_index][value & VALUE_KEYS_MASK]
+PLAYER_FIELD_KEYS = [
+    [_rng.getrandbits(64) for _ in range(NUM_VALUE_KEYS)]
+    for _ in range(MAX_PLAYERS * NUM_PLAYER_FIELDS)
+]
+COLOR_INDEX = {color: i for i, color in enumerate(Color)}
+PROMPT_INDEX = {prompt: i for i, prompt in enumerate(ActionPrompt)}
+BUILDING_INDEX = {SETTLEMENT: 0, CITY: 1}
+
+# Tags to keep keys of different kinds of features apart
+_BUILDING, _ROAD, _ROBBER, _SCALARS = range(4)
+_SCALARS_SEED = _rng.getrandbits(64)
+
+
+def _splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return x ^ (x >> 31)
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_key(*parts):
+    """Deterministic 64-bit key for a tuple of ints"""
+    key = ZOBRIST_SEED
+    for part in parts:
+        key = _splitmix64(key ^ (part & MASK_64))
+    return key
+
+
+def building_key(node_id, color, building_type):
+    return zobrist_key(
+        _BUILDING, node_id, COLOR_INDEX[color], BUILDING_INDEX[building_type]
+    )
+
+
+def road_key(edge, color):
+    a, b = edge
+    if a > b:
+        a, b = b, a
+    return zobrist_key(_ROAD, a, b, COLOR_INDEX[color])
+
+
+def robber_key(coordinate):
+    return zobrist_key(_ROBBER, *coordinate)
+
+
+def players_zobrist_hash(player_buffer):
+    """Full (non-incremental) hash of a player buffer"""
+    result = 0
+    for index, value in enumerate(player_buffer):
+        result ^= PLAYER_FIELD_KEYS[index][value & VALUE_KEYS_MASK]
+    return result
+
+
+def board_zobrist_hash(board):
+    """Full (non-incremental) hash of a board"""
+    result = robber_key(board.robber_coordinate)
+    for node_id, (color, building_type) in board.buildings.items():
+        result ^= building_key(node_id, color, building_type)
+    for edge, color in board.roads.items():
+        if edge[0] < edge[1]:  # roads has both orientations
+            result ^= road_key(edge, color)
+    return result
+
+
+def scalars_zobrist_hash(state):
+    """Keyed hash of the (few) non-board, non-player fields of state"""
+    acceptees = tuple(2 if a is None else int(a) for a in state.acceptees)
+    scalars = (
+        state.current_player_index,
+        state.current_turn_index,
+        PROMPT_INDEX[state.current_prompt],
+        state.is_initial_build_phase,
+        state.is_discarding,
+        state.is_moving_knight,
+        state.is_road_building,
+        state.free_roads_available,
+        state.is_resolving_trade,
+        len(state.development_listdeck),
+        *state.resource_freqdeck,
+        *state.current_trade,
+        *acceptees,
+    )
+    # hash() of a tuple of ints is deterministic (unlike str hashes)
+    return _splitmix64(_SCALARS_SEED ^ (hash(scalars) & MASK_64))
+
+
+def zobrist_hash(state):
+    """Full (non-incremental) hash of state. Equals state.zobrist"""
+    return (
+        board_zobrist_hash(state.board)
+        ^ players_zobrist_hash(state.player_buffer)
+        ^ scalars_zobrist_hash(state)
+    )
@@ -0,0 +1,65 @@
+"""
+Random playouts per second: one Game at a time (what run_playout does) vs
+all at once with the lockstep batched engine (catanatron.batch), from the
+same mid-game position. Also prints both engines' win rates, which should
+agree up to sampling noise.
+"""
+
+import contextlib
+import io
+import random
+import time
+from collections import Counter
+
+from catanatron.batch import BatchedGames
+from catanatron.game import Game
+from catanatron.models.player import RandomPlayer, Color
+
+NUM_SCALAR = 100
+NUM_BATCHED = 2000
+
+
+def decide_fn(self, game, playable_actions):
+    # Dev card plays can be offered when they can't be played (and raise).
+    actions = [
+        a for a in playable_actions if not a.action_type.name.startswith("PLAY_")
+    ]
+    return random.choice(actions)
+
+
+def win_rates(counter, colors):
+    total = sum(counter.values())
+    return " ".join(f"{color.value}={counter[color] / total:.2f}" for color in colors)
+
+
+random.seed(3)
+game = Game([RandomPlayer(color) for color in list(Color)], seed=1)
+with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+    for _ in range(700):
+        game.play_tick()
+
+start = time.time()
+counter = Counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    for _ in range(NUM_SCALAR):
+        game_copy = game.copy()
+        try:
+            game_copy.play(decide_fn=decide_fn)
+        except ValueError:
+            continue
+        counter[game_copy.winning_color()] += 1
+scalar_rate = NUM_SCALAR / (time.time() - start)
+print(f"{scalar_rate:.1f} games/s; Game.play ({win_rates(counter, game.state.colors)})")
+
+start = time.time()
+batch = BatchedGames(game, NUM_BATCHED, seed=0)
+winners, _ = batch.run()
+batched_rate = NUM_BATCHED / (time.time() - start)
+counter = Counter(batch.colors[w] for w in winners.tolist() if w >= 0)
+print(f"{batched_rate:.1f} games/s; BatchedGames ({win_rates(counter, batch.colors)})")
+print(f"{batched_rate / scalar_rate:.0f}x")
+
+# Results:
+# 1.7 games/s; Game.play (BLUE=0.20 ORANGE=0.00 RED=0.62 WHITE=0.19)
+# 36.1 games/s; BatchedGames (BLUE=0.19 ORANGE=0.01 RED=0.57 WHITE=0.23)
+# 21x
@@ -0,0 +1,82 @@
+"""
+Seconds per AlphaBetaPlayer decision, searching root actions serially vs in
+parallel with 2, 4, ... up to one worker per core (num_workers). Decides at
+positions along the same games, so workers get later decisions as deltas of
+the game they already have. Also counts decisions that differ from the
+serial ones (only possible between actions of equal value).
+"""
+
+import contextlib
+import io
+import multiprocessing
+import random
+import time
+
+from catanatron.game import Game
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.minimax import AlphaBetaPlayer
+from catanatron.players.search_pool import get_search_pool
+from catanatron.rules import SimulationRules
+
+NUM_GAMES = 3
+DECISIONS_PER_GAME = 10
+MIN_ACTIONS = 5  # fewer can't keep many workers busy
+DEPTH = 3
+
+num_cores = multiprocessing.cpu_count()
+worker_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= max(num_cores, 2)]
+if num_cores not in worker_counts:
+    worker_counts.append(num_cores)
+
+# Positions to decide at: DECISIONS_PER_GAME of each random game
+random.seed(0)
+games = []
+with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+    for seed in range(NUM_GAMES):
+        game = Game(
+            [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)],
+            seed=seed,
+            rules=SimulationRules(domestic_trade=False),
+        )
+        positions = []
+        while len(positions) < DECISIONS_PER_GAME and game.winning_color() is None:
+            num_actions = len(game.state.playable_actions)
+            if game.state.num_turns >= 10 and num_actions >= MIN_ACTIONS:
+                positions.append(game.copy())
+            game.play_tick()
+        games.append(positions)
+
+serial_time, serial_decisions = None, None
+for num_workers in worker_counts:
+    if num_workers > 1:
+        start = time.time()
+        get_search_pool(num_workers)
+        startup = time.time() - start
+
+    start = time.time()
+    decisions = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for positions in games:
+            players = {
+                color: AlphaBetaPlayer(color, DEPTH, num_workers=num_workers)
+                for color in (Color.RED, Color.BLUE)
+            }
+            for game in positions:
+                player = players[game.state.current_color()]
+                decisions.append(player.decide(game, game.state.playable_actions))
+    duration = (time.time() - start) / len(decisions)
+
+    if num_workers == 1:
+        serial_time, serial_decisions = duration, decisions
+        print(f"{duration:.3f} secs/decision; serial")
+        continue
+    differ = sum(a != b for a, b in zip(decisions, serial_decisions))
+    print(
+        f"{duration:.3f} secs/decision; {num_workers} workers "
+        + f"({serial_time / duration:.2f}x, pool startup {startup:.2f} secs, "
+        + f"{differ}/{len(decisions)} decisions differ)"
+    )
+
+# Results (1 core, so workers only add overhead here):
+# 0.081 secs/decision; serial
+# 0.131 secs/decision; 2 workers (0.62x, pool startup 0.02 secs, 3/30 decisions differ)
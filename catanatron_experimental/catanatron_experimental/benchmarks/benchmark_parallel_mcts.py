@@ -0,0 +1,85 @@
+"""
+Seconds per 100-simulation GameAnalyzer analysis (MCTS win probabilities,
+as the web API runs it), serially vs with 2, 4, ... up to one worker per
+core (num_workers), with root and tree parallelization.
+"""
+
+import contextlib
+import io
+import multiprocessing
+import random
+import time
+
+from catanatron.game import Game
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.mcts import MCTSPlayer
+from catanatron.players.search_pool import get_search_pool
+from catanatron.rules import SimulationRules
+
+NUM_GAMES = 3
+ANALYSES_PER_GAME = 3
+NUM_SIMULATIONS = 100
+
+num_cores = multiprocessing.cpu_count()
+worker_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= max(num_cores, 2)]
+if num_cores not in worker_counts:
+    worker_counts.append(num_cores)
+
+# Positions to analyze: ANALYSES_PER_GAME of each random game, 30 ticks apart
+random.seed(0)
+games = []
+with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+    for seed in range(NUM_GAMES):
+        game = Game(
+            [RandomPlayer(color) for color in Color],
+            seed=seed,
+            rules=SimulationRules(domestic_trade=False),
+        )
+        positions = []
+        while len(positions) < ANALYSES_PER_GAME and game.winning_color() is None:
+            game.play_tick()
+            if len(game.state.actions) % 30 == 0:
+                positions.append(game.copy())
+        games.append(positions)
+
+
+def analyze(game, num_workers, tree_parallel):
+    # As GameAnalyzer.analyze_win_probabilities
+    player = MCTSPlayer(
+        game.state.current_color(),
+        NUM_SIMULATIONS,
+        prunning=True,
+        num_workers=num_workers,
+        tree_parallel=tree_parallel,
+    )
+    return player.search(game)
+
+
+serial_time = None
+for num_workers in worker_counts:
+    if num_workers > 1:
+        start = time.time()
+        get_search_pool(num_workers)
+        startup = time.time() - start
+
+    for tree_parallel in (False, True) if num_workers > 1 else (False,):
+        start = time.time()
+        for positions in games:
+            for game in positions:
+                analyze(game, num_workers, tree_parallel)
+        duration = (time.time() - start) / (NUM_GAMES * ANALYSES_PER_GAME)
+
+        if num_workers == 1:
+            serial_time = duration
+            print(f"{duration:.3f} secs/analysis; serial")
+            continue
+        mode = "tree" if tree_parallel else "root"
+        print(
+            f"{duration:.3f} secs/analysis; {num_workers} workers, {mode} "
+            + f"({serial_time / duration:.2f}x, pool startup {startup:.2f} secs)"
+        )
+
+# Results (1 core, so workers only add overhead here):
+# 3.365 secs/analysis; serial
+# 3.855 secs/analysis; 2 workers, root (0.87x, pool startup 0.01 secs)
+# 3.977 secs/analysis; 2 workers, tree (0.85x, pool startup 0.01 secs)
@@ -0,0 +1,68 @@
+"""
+Bytes per search-tree state. Tree search players keep a Game per node, so
+this (not CPU time) limits how many nodes fit in RAM.
+
+Measures what each retained copy allocates on its own (what it shares with
+the original isn't counted), for plain copies and for copies that then
+execute an action (like a child node would). Budget: a State should cost
+about 1KB (the action log is shared with the original, see ActionLog).
+"""
+
+import contextlib
+import gc
+import io
+import random
+import tracemalloc
+
+from catanatron.game import Game
+from catanatron.models.player import RandomPlayer, Color
+
+NUMBER = 2000
+
+
+def bytes_per_state(fn):
+    gc.collect()
+    tracemalloc.start()
+    kept = [fn() for _ in range(NUMBER)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return allocated / NUMBER
+
+
+def copy_and_execute(game):
+    game_copy = game.copy()
+    game_copy.execute(game_copy.state.playable_actions[0])
+    return game_copy
+
+
+random.seed(0)
+game = Game(
+    [
+        RandomPlayer(Color.RED),
+        RandomPlayer(Color.BLUE),
+        RandomPlayer(Color.WHITE),
+        RandomPlayer(Color.ORANGE),
+    ],
+    seed=0,
+)
+with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+    for _ in range(300):  # mid-game
+        game.play_tick()
+print(len(game.state.actions), "actions")
+print(f"{bytes_per_state(game.state.board.copy):.0f} bytes/board; board.copy()")
+for label, fn in [
+    ("game.copy()", game.copy),
+    ("game.state.copy()", game.state.copy),
+    ("game.copy() + execute", lambda: copy_and_execute(game)),
+]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        per_state = bytes_per_state(fn)
+    print(f"{per_state:.0f} bytes/state; {label}")
+
+# Results:
+# 300 actions
+# 200 bytes/board; board.copy()
+# 928 bytes/state; game.copy()
+# 864 bytes/state; game.state.copy()
+# 1529 bytes/state; game.copy() + execute
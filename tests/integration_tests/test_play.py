@@ -21,6 +21,21 @@ def test_play_strong():
     assert "Game Summary" in result.output
 
 
+def test_map_pool_of_tournament_maps_is_rejected(tmp_path):
+    from catanatron.models.map_pool import MapPool  # requires numpy
+
+    path = tmp_path / "maps.npy"
+    MapPool.generate(path, 3, "BASE")
+    runner = CliRunner()
+    result = runner.invoke(
+        simulate,
+        ["--num=1", "--players=R,R", "--config-map=TOURNAMENT"]
+        + [f"--config-map-pool={path}"],
+    )
+    assert result.exit_code == 2
+    assert "BASE or MINI" in result.output
+
+
 def test_csv_play():
     runner = CliRunner()
     with tempfile.TemporaryDirectory() as tmpdirname:
@@ -1,7 +1,8 @@
+import pickle
 from typing import List
 from catanatron import Game, RandomPlayer, Color
 from catanatron.models.player import Player
-from catanatron.players.mcts import StateNode
+from catanatron.players.mcts import MCTSPlayer, StateNode
 
 
 def test_root_node_initial_properties():
@@ -84,3 +85,67 @@ def test_child_node_initial_properties():
     assert (
         child_node.children == []
     ), "Initial children for child node should be an empty list"
+
+
+def test_expanded_children_build_game_when_needed():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game_instance = Game(players, seed=1)
+    root_node = StateNode(color=Color.RED, game=game_instance, parent=None)
+    root_node.expand()
+
+    for action, children in root_node.children.items():
+        for child_node, proba in children:
+            assert child_node._game is None, "Children shouldn't copy games yet"
+
+    action = game_instance.state.playable_actions[0]
+    child_node, _ = root_node.children[action][0]
+    assert child_node.game.state.actions[-1] == action
+    assert len(game_instance.state.actions) == 0, "Parent game shouldn't change"
+
+
+def test_parallel_mcts():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game_instance = Game(players, seed=1, vps_to_win=4)  # short playouts
+    actions = game_instance.state.playable_actions
+    for tree_parallel in (False, True):
+        player = MCTSPlayer(Color.RED, 7, num_workers=2, tree_parallel=tree_parallel)
+        root_node = player.search(game_instance)
+
+        assert root_node.visits == 7
+        children = [child for c in root_node.children.values() for child, _ in c]
+        assert sum(child.visits for child in children) == 7
+        assert root_node.wins == sum(child.wins for child in children)
+        assert player.decide(game_instance, actions) in actions
+    assert len(game_instance.state.actions) == 0, "Game shouldn't change"
+
+
+def test_mcts_reuses_tree_of_actions_taken():
+    players = [MCTSPlayer(Color.RED, 10), RandomPlayer(Color.BLUE)]
+    game_instance = Game(players, seed=1, vps_to_win=4)  # short playouts
+    player = players[0]
+    action = player.decide(game_instance, game_instance.state.playable_actions)
+    root_node = player.tree[2]
+    child_node, _ = root_node.children[action][0]
+    child_visits = child_node.visits
+
+    game_instance.execute(action)
+    reused_node = player.search(game_instance)
+    assert reused_node is child_node
+    assert reused_node.parent is None
+    assert reused_node.visits == child_visits + 10
+
+    game_instance = Game(players, seed=2, vps_to_win=4)  # a new game
+    assert player.search(game_instance) is not reused_node
+
+
+def test_mcts_player_pickles_without_its_tree():
+    players = [MCTSPlayer(Color.RED, 5), RandomPlayer(Color.BLUE)]
+    game_instance = Game(players, seed=1, vps_to_win=4)  # short playouts
+    player = players[0]
+    player.search(game_instance)
+    assert player.tree is not None
+
+    copy = pickle.loads(pickle.dumps(player))
+    assert copy.tree is None
+    assert (copy.color, copy.num_simulations) == (Color.RED, 5)
+    assert player.tree is not None
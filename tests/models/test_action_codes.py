@@ -0,0 +1,49 @@
+from catanatron.game import Game
+from catanatron.models.action_codes import (
+    actions_table,
+    decode,
+    encode,
+    get_action,
+    intern,
+)
+from catanatron.models.enums import Action, ActionType
+from catanatron.models.player import Color, SimplePlayer
+from catanatron.models.topology import EDGE_ID
+
+
+def test_encode_decode_roundtrip():
+    actions = [
+        Action(Color.RED, ActionType.ROLL, None),
+        Action(Color.BLUE, ActionType.ROLL, (3, 4)),
+        Action(Color.WHITE, ActionType.BUILD_ROAD, (12, 3)),
+        Action(Color.ORANGE, ActionType.BUILD_SETTLEMENT, 53),
+        Action(Color.RED, ActionType.MOVE_ROBBER, ((0, 0, 0), Color.BLUE, "ORE")),
+        Action(Color.RED, ActionType.MARITIME_TRADE, ("WOOD",) * 4 + ("ORE",)),
+        Action(Color.BLUE, ActionType.OFFER_TRADE, (1, 0, 0, 0, 0, 0, 0, 1, 0, 0)),
+    ]
+    codes = [encode(action) for action in actions]
+    assert len(set(codes)) == len(codes)
+    for action, code in zip(actions, codes):
+        assert decode(code) == action
+        assert decode(code) is intern(action)
+        assert encode(decode(code)) == code
+
+
+def test_static_tables():
+    roads = actions_table(Color.RED, ActionType.BUILD_ROAD)
+    assert roads[EDGE_ID[(2, 9)]] == Action(Color.RED, ActionType.BUILD_ROAD, (2, 9))
+    assert get_action(Color.RED, ActionType.BUILD_ROAD, (2, 9)) is roads[
+        EDGE_ID[(2, 9)]
+    ]
+    assert get_action(Color.RED, ActionType.END_TURN) is get_action(
+        Color.RED, ActionType.END_TURN, None
+    )
+
+
+def test_generated_actions_are_interned():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    game = Game(players, seed=1)
+    for _ in range(30):
+        for action in game.state.playable_actions:
+            assert intern(action) is action
+        game.play_tick()
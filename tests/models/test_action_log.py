@@ -0,0 +1,42 @@
+import pickle
+
+from catanatron.models.action_log import CHUNK_SIZE, ActionLog
+
+
+def test_action_log_behaves_like_a_list():
+    log = ActionLog()
+    expected = []
+    for i in range(3 * CHUNK_SIZE + 5):
+        log.append(i)
+        expected.append(i)
+        assert len(log) == len(expected)
+        assert log[-1] == i
+
+    assert log == expected
+    assert list(log) == expected
+    assert log[CHUNK_SIZE] == CHUNK_SIZE
+    assert log[-CHUNK_SIZE - 1] == expected[-CHUNK_SIZE - 1]
+    assert log[10:-10:3] == expected[10:-10:3]
+    assert ActionLog(expected) == log
+    assert pickle.loads(pickle.dumps(log)) == log
+
+
+def test_action_log_copies_share_history():
+    log = ActionLog(range(2 * CHUNK_SIZE + 3))
+    log_copy = log.copy()
+    assert log_copy.chunks is log.chunks
+
+    log_copy.append("a")
+    log.append("b")
+    assert log_copy[-1] == "a" and log[-1] == "b"
+    assert log_copy[:-1] == log[:-1]
+
+
+def test_action_log_truncate():
+    expected = list(range(2 * CHUNK_SIZE + 3))
+    for length in [len(expected), 2 * CHUNK_SIZE, CHUNK_SIZE + 1, 0]:
+        log = ActionLog(expected)
+        log.truncate(length)
+        assert log == expected[:length]
+        log.append("x")
+        assert log == expected[:length] + ["x"]
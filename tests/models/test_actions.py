@@ -19,6 +19,7 @@ from catanatron.models.enums import (
     BRICK,
     ORE,
     RESOURCES,
+    SHEEP,
     ActionType,
     WHEAT,
     WOOD,
@@ -206,6 +207,25 @@ def test_maritime_possibities_respect_bank_not_having_cards():
     assert len(maritime_trade_possibilities(state, player.color)) == 0
 
 
+def test_maritime_trade_possibilities_are_memoized_by_hand_signature():
+    player = SimplePlayer(Color.RED)
+    state = State([player])
+    player_deck_replenish(state, player.color, WHEAT, 4)
+    state.resource_freqdeck[RESOURCES.index(ORE)] = 0
+    possibilities = maritime_trade_possibilities(state, player.color)
+    assert [a.value for a in possibilities] == [
+        (WHEAT, WHEAT, WHEAT, WHEAT, WOOD),
+        (WHEAT, WHEAT, WHEAT, WHEAT, BRICK),
+        (WHEAT, WHEAT, WHEAT, WHEAT, SHEEP),
+    ]
+
+    # More cards than the 4:1 rate is the same signature (same interned actions)
+    player_deck_replenish(state, player.color, WHEAT, 3)
+    more_possibilities = maritime_trade_possibilities(state, player.color)
+    assert all(a is b for a, b in zip(more_possibilities, possibilities))
+    assert more_possibilities is not possibilities
+
+
 def test_year_of_plenty_same_resource():
     bank = [0, 0, 0, 1, 0]
 
@@ -4,6 +4,7 @@ from catanatron.models.map import MINI_MAP_TEMPLATE, CatanMap
 from catanatron.models.enums import RESOURCES
 from catanatron.models.board import Board, get_node_distances
 from catanatron.models.player import Color
+from catanatron.models.topology import edges_of
 
 
 def test_initial_build_phase_bypasses_restrictions():
@@ -357,3 +358,44 @@ def test_many_buildings():
 
 
 # TODO: Test super long road, cut at many places, to yield 5+ component graph
+
+
+def test_copy_is_independent_of_original():
+    board = Board()
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board.build_road(Color.RED, (3, 2))
+    board.buildable_edges(Color.RED)  # warm cache
+
+    board_copy = board.copy()
+    board_copy.build_road(Color.RED, (2, 1))
+    board_copy.build_settlement(Color.BLUE, 0, initial_build_phase=True)
+    board_copy.build_city(Color.RED, 3)
+
+    assert board.buildings == {3: (Color.RED, "SETTLEMENT")}
+    assert (2, 1) not in board.roads
+    assert board.find_connected_components(Color.RED) == [{3, 2}]
+    assert board.find_connected_components(Color.BLUE) == []
+    assert 0 in board.board_buildable_ids
+    assert (1, 2) in board.buildable_edges(Color.RED)
+
+    assert board_copy.buildings[3] == (Color.RED, "CITY")
+    assert board_copy.find_connected_components(Color.RED) == [{3, 2, 1}]
+    assert (1, 2) not in board_copy.buildable_edges(Color.RED)
+
+
+def test_bitboards_track_buildings_and_roads():
+    board = Board()
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board.build_road(Color.RED, (3, 2))
+    board.build_settlement(Color.BLUE, 0, initial_build_phase=True)
+    board.build_city(Color.RED, 3)
+
+    assert board.settlement_mask == {Color.RED: 0, Color.BLUE: 1 << 0}
+    assert board.city_mask == {Color.RED: 1 << 3}
+    assert board.occupied_node_mask == (1 << 0) | (1 << 3)
+    assert edges_of(board.road_mask[Color.RED]) == [(2, 3)]
+    assert board.component_node_mask[Color.RED] == (1 << 2) | (1 << 3)
+    assert board.is_enemy_node(0, Color.RED)
+    assert not board.is_enemy_node(3, Color.RED)
+    assert 2 not in board.board_buildable_ids  # distance rule
+    assert board.buildable_edges(Color.RED) == [(1, 2), (2, 9), (3, 4), (3, 12)]
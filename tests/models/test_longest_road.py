@@ -0,0 +1,35 @@
+from catanatron.models.board import Board, longest_acyclic_path
+from catanatron.models.longest_road import component_longest_road
+from catanatron.models.player import Color
+
+
+def build_loop_with_tail(board):
+    board.build_settlement(Color.RED, 0, initial_build_phase=True)
+    for edge in [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 0), (3, 12), (12, 11)]:
+        board.build_road(Color.RED, edge)
+
+
+def test_longest_road_through_loop():
+    board = Board()
+    build_loop_with_tail(board)
+
+    assert board.road_lengths[Color.RED] == 8
+    assert board.road_color == Color.RED
+    (component,) = board.component_masks[Color.RED]
+    assert component_longest_road(component, board.road_mask[Color.RED], 0) == 8
+
+
+def test_longest_road_matches_path_search_after_cut():
+    board = Board()
+    build_loop_with_tail(board)
+    board.build_settlement(Color.BLUE, 12, initial_build_phase=True)
+
+    enemy_nodes = board.enemy_node_mask(Color.RED)
+    for component, node_set in zip(
+        board.component_masks[Color.RED],
+        board.find_connected_components(Color.RED),
+    ):
+        length = component_longest_road(
+            component, board.road_mask[Color.RED], enemy_nodes
+        )
+        assert length == len(longest_acyclic_path(board, node_set, Color.RED))
@@ -4,6 +4,7 @@ from catanatron.models.map import (
     MINI_MAP_TEMPLATE,
     CatanMap,
     LandTile,
+    get_map_topology,
     get_nodes_and_edges,
     get_node_counter_production,
     DICE_PROBAS,
@@ -77,3 +78,20 @@ def test_get_nodes_and_edges_for_east_and_southeast_attachment():
     )
     assert max(map(lambda n: n, nodes3.values())) == 12
     assert len(edges3.values()) == 6
+
+
+def test_maps_of_a_template_share_its_topology():
+    topology = get_map_topology(BASE_MAP_TEMPLATE)
+    assert get_map_topology(BASE_MAP_TEMPLATE) is topology
+    assert len(topology.land_nodes) == 54
+
+    map1 = CatanMap.from_template(BASE_MAP_TEMPLATE)
+    map2 = CatanMap.from_template(BASE_MAP_TEMPLATE)
+    assert map1.tiles_by_id[3].nodes is map2.tiles_by_id[3].nodes
+
+    # Same lookups as deriving them from the tiles alone
+    derived = CatanMap.from_tiles(map1.tiles)
+    assert map1.land_nodes == derived.land_nodes
+    assert map1.port_nodes == derived.port_nodes
+    assert map1.adjacent_tiles == derived.adjacent_tiles
+    assert map1.node_production == derived.node_production
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from catanatron.models.enums import RESOURCES
+from catanatron.models.map import build_map
+from catanatron.models.map_pool import THREE_TO_ONE, MapPool
+from catanatron.models.topology import nodes_mask
+
+
+@pytest.mark.parametrize("map_type", ["BASE", "MINI"])
+def test_map_pool_maps_match_their_tables(tmp_path, map_type):
+    path = tmp_path / "maps.npy"
+    pool = MapPool.generate(path, 50, map_type, seed=0)
+    assert len(pool) == 50
+
+    for index in [0, 17, 49]:
+        catan_map = pool[index]
+        tables = pool.tables[index]
+        assert pool[index] is catan_map  # read-only, so cached and shared
+
+        for tile_id, tile in catan_map.tiles_by_id.items():
+            resource = tables["tile_resources"][tile_id]
+            assert tile.resource == (None if resource < 0 else RESOURCES[resource])
+            assert (tile.number or 0) == tables["tile_numbers"][tile_id]
+        for node_id, production in catan_map.node_production.items():
+            for i, resource in enumerate(RESOURCES):
+                assert tables["node_production"][node_id, i] == pytest.approx(
+                    production[resource]
+                )
+        for resource, node_ids in catan_map.port_nodes.items():
+            i = THREE_TO_ONE if resource is None else RESOURCES.index(resource)
+            assert tables["port_node_masks"][i] == nodes_mask(node_ids)
+
+    # Same file, same maps. Even in another process (pools pickle as a path)
+    reopened = pickle.loads(pickle.dumps(pool))
+    assert reopened[17].tiles_by_id == pool[17].tiles_by_id
+    assert MapPool.generate(path, 50, map_type, seed=0)[3].tiles == pool[3].tiles
+    assert build_map(map_type, pool, 17).tiles == pool[17].tiles
+
+
+def test_map_pool_checks_map_type(tmp_path):
+    path = tmp_path / "maps.npy"
+    MapPool.generate(path, 3, "MINI")
+    with pytest.raises(ValueError):
+        MapPool(path, "BASE")
+    with pytest.raises(ValueError):
+        MapPool(path, "TOURNAMENT")
+    with pytest.raises(ValueError):
+        MapPool.generate(tmp_path / "tournament.npy", 3, "TOURNAMENT")
+    with pytest.raises(ValueError):  # e.g. catanatron-play --config-map-pool
+        build_map("TOURNAMENT", MapPool(path, "MINI"), 0)
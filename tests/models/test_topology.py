@@ -0,0 +1,38 @@
+from catanatron.models.map import (
+    MINI_MAP_TEMPLATE,
+    NUM_EDGES,
+    NUM_NODES,
+    CatanMap,
+)
+from catanatron.models.topology import (
+    EDGE_ID,
+    EDGE_NODES,
+    EDGES,
+    NEIGHBORS,
+    NODE_EDGES,
+    get_edges,
+    static_graph,
+)
+
+
+def test_tables_match_networkx_graph():
+    graph = static_graph()
+    assert len(NEIGHBORS) == graph.number_of_nodes()
+    for node_id, neighbors in enumerate(NEIGHBORS):
+        assert neighbors == tuple(graph.neighbors(node_id))
+
+
+def test_edges_are_canonical():
+    assert len(EDGES) == NUM_EDGES
+    assert all(a < b < NUM_NODES for a, b in EDGES)
+    for edge_id, (a, b) in enumerate(EDGES):
+        assert EDGE_ID[(a, b)] == EDGE_ID[(b, a)] == edge_id
+        assert EDGE_NODES[edge_id] ^ a == b
+        assert edge_id in NODE_EDGES[a] and edge_id in NODE_EDGES[b]
+
+
+def test_get_edges():
+    assert get_edges() == list(static_graph().subgraph(range(NUM_NODES)).edges())
+
+    mini_land_nodes = CatanMap.from_template(MINI_MAP_TEMPLATE).land_nodes
+    assert len(get_edges(mini_land_nodes)) == 30
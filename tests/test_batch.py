@@ -0,0 +1,61 @@
+import numpy as np
+
+from catanatron.batch import BatchedGames
+from catanatron.game import Game
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.playouts import run_batched_playouts
+from catanatron.state_functions import (
+    get_actual_victory_points,
+    get_player_freqdeck,
+)
+
+
+def test_batched_games_start_from_game():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=1)
+    for _ in range(60):
+        game.play_tick()
+
+    batch = BatchedGames(game, 3, seed=0)
+    for i, color in enumerate(batch.colors):
+        for g in range(3):
+            assert batch.hand[g, i].tolist() == get_player_freqdeck(game.state, color)
+            assert batch.victory_points[g, i] == get_actual_victory_points(
+                game.state, color
+            )
+    assert batch.bank[0].tolist() == list(game.state.resource_freqdeck)
+
+
+def test_batched_games_play_to_the_end():
+    players = [RandomPlayer(c) for c in [Color.RED, Color.BLUE, Color.WHITE]]
+    game = Game(players, seed=2, vps_to_win=6)
+    batch = BatchedGames(game, 8, seed=0)
+    winners, victory_points = batch.run()
+
+    assert batch.done.all()
+    for g, winner in enumerate(winners):
+        if winner >= 0:
+            assert victory_points[g, winner] >= game.vps_to_win
+        else:
+            assert batch.num_turns[g] >= 1000
+    # No cards created or lost
+    cards = batch.hand.sum(1) + batch.bank
+    assert (cards == 19).all()
+    assert (batch.hand >= 0).all() and (batch.bank >= 0).all()
+    # Buildings and VPs (without dev cards, road and army) add up
+    for g in range(8):
+        for i in range(3):
+            buildings = batch.level[g][batch.owner[g] == i].sum()
+            bonus = 2 * (batch.road_holder[g] == i) + 2 * (batch.army_holder[g] == i)
+            vp_cards = batch.dev_hand[g, i, -1]
+            assert victory_points[g, i] == buildings + bonus + vp_cards
+    assert np.count_nonzero(batch.road_owner >= 0) > 0
+
+
+def test_run_batched_playouts():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=3, vps_to_win=6)
+    counter = run_batched_playouts(game, 10, seed=0)
+    assert sum(counter.values()) == 10
+    assert set(counter) <= {Color.RED, Color.BLUE, None}
+    assert game.state.num_turns == 0  # game isn't modified
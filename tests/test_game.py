@@ -7,7 +7,7 @@ from catanatron.state_functions import (
     player_clean_turn,
     player_has_rolled,
 )
-from catanatron.game import Game, is_valid_trade
+from catanatron.game import Game, is_valid_action, is_valid_trade
 from catanatron.state import (
     apply_action,
     player_deck_replenish,
@@ -29,6 +29,7 @@ from catanatron.models.enums import (
     ROAD_BUILDING,
 )
 from catanatron.models.player import Color, RandomPlayer, SimplePlayer
+from catanatron.rules import SimulationRules
 
 
 def test_initial_build_phase():
@@ -487,6 +488,29 @@ def test_trade_offers_are_valid():
     assert is_valid_trade(action_value)
 
 
+def test_rules_can_turn_off_domestic_trade():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=1, rules=SimulationRules(domestic_trade=False))
+    for _ in range(200):
+        actions = game.state.playable_actions
+        assert all(a.action_type != ActionType.OFFER_TRADE for a in actions)
+        game.play_tick()
+    assert game.copy().state.rules == SimulationRules(domestic_trade=False)
+
+    state = game.state
+    while not (
+        state.current_prompt == ActionPrompt.PLAY_TURN
+        and player_has_rolled(state, state.current_color())
+    ):
+        game.play_tick()
+    color = state.current_color()
+    player_deck_replenish(state, color, WOOD)
+    offer = Action(color, ActionType.OFFER_TRADE, (1, 0, 0, 0, 0, 0, 1, 0, 0, 0))
+    assert not is_valid_action(state, offer)
+    state.rules = SimulationRules()
+    assert is_valid_action(state, offer)
+
+
 @patch("catanatron.state.roll_dice")
 def test_trading_sequence(fake_roll_dice):
     # Play initial building phase
@@ -5,6 +5,7 @@ from gymnasium.utils.env_checker import check_env
 import numpy as np
 
 from catanatron.features import get_feature_ordering
+from catanatron.models.map_pool import MapPool
 from catanatron.models.player import Color, RandomPlayer
 from catanatron.players.value import ValueFunctionPlayer
 from catanatron.gym.envs.catanatron_env import CatanatronEnv
@@ -104,6 +105,19 @@ def test_custom_map():
     # assert env.action_space.n == 260
 
 
+def test_map_pool(tmp_path):
+    pool = MapPool.generate(tmp_path / "maps.npy", 10, "MINI", seed=0)
+    env = gymnasium.make("catanatron/Catanatron-v0", config={"map_pool": pool})
+    observation, info = env.reset(options={"map_index": 3})
+    assert env.unwrapped.game.state.board.map is pool[3]
+    assert len(observation) < 614  # MINI features, from the pool's map type
+
+    env.reset(seed=1)
+    first_map = env.unwrapped.game.state.board.map
+    env.reset(seed=1)
+    assert env.unwrapped.game.state.board.map is first_map
+
+
 def test_enemies():
     env = gymnasium.make(
         "catanatron/Catanatron-v0",
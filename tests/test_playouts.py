@@ -0,0 +1,105 @@
+import random
+
+from catanatron.game import Game
+from catanatron.models.enums import (
+    BRICK,
+    SHEEP,
+    WHEAT,
+    WOOD,
+    Action,
+    ActionPrompt,
+    ActionType,
+)
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.player_state import HAS_ROLLED
+from catanatron.players.playouts import decide_fn, fast_playout
+from catanatron.state import State
+from catanatron.state_functions import (
+    build_road,
+    build_settlement,
+    get_actual_victory_points,
+    maintain_longest_road,
+    player_buffer_set,
+    player_deck_replenish,
+    player_offset,
+)
+
+
+def test_fast_playout_plays_to_the_end():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=1, vps_to_win=6)
+    winner, victory_points = fast_playout(game.state, random.Random(0), vps_to_win=6)
+
+    assert winner in game.state.colors
+    assert victory_points[game.state.colors.index(winner)] >= 6
+    assert game.state.num_turns == 0  # state isn't modified
+    assert len(game.state.actions) == 0
+
+    assert fast_playout(game.state, random.Random(0), vps_to_win=6) == (
+        winner,
+        victory_points,
+    )
+
+
+def test_fast_playout_truncates_at_max_turns():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=1)
+    winner, _ = fast_playout(game.state, random.Random(0), max_turns=10)
+    assert winner is None
+
+
+def test_fast_playout_matches_game_play():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=2, vps_to_win=6)
+    for _ in range(50):
+        game.play_tick()
+
+    random.seed(3)
+    result = fast_playout(game.state, random, vps_to_win=6)
+
+    random.seed(3)
+    game_copy = game.copy()
+    game_copy.play(decide_fn=decide_fn)
+    victory_points = tuple(
+        get_actual_victory_points(game_copy.state, color)
+        for color in game.state.colors
+    )
+    assert result == (game_copy.winning_color(), victory_points)
+
+
+def test_fast_playout_sees_longest_road_win_of_a_cut():
+    colors = (Color.RED, Color.BLUE, Color.WHITE)
+    state = State([RandomPlayer(color) for color in colors])
+
+    def build(color, nodes, edges):
+        for node_id in nodes:
+            state.board.build_settlement(color, node_id, initial_build_phase=True)
+            build_settlement(state, color, node_id, True)
+        for edge in edges:
+            result = state.board.build_road(color, edge)
+            build_road(state, color, edge, True)
+            maintain_longest_road(state, *result)
+
+    # RED has the longest road (7), WHITE one of 5 and BLUE can cut RED's
+    chain = [(6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13)]
+    build(Color.RED, [7], chain)
+    build(Color.WHITE, [0, 3], [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)])
+    build(Color.BLUE, [30], [(29, 30), (10, 29)])
+    assert get_actual_victory_points(state, Color.RED) == 3
+
+    blue = state.color_to_index[Color.BLUE]
+    state.is_initial_build_phase = False
+    state.current_prompt = ActionPrompt.PLAY_TURN
+    state.current_player_index = state.current_turn_index = blue
+    player_buffer_set(state, player_offset(state, Color.BLUE) + HAS_ROLLED, True)
+    for resource in (WOOD, BRICK, SHEEP, WHEAT):
+        player_deck_replenish(state, Color.BLUE, resource)
+    state.playable_actions = [Action(Color.BLUE, ActionType.BUILD_SETTLEMENT, 10)]
+
+    # WHITE wins as soon as BLUE's settlement hands it Longest Road (before
+    # it gets to act, which would be past max_turns)
+    winner, victory_points = fast_playout(
+        state, random.Random(0), max_turns=state.num_turns + 1, vps_to_win=4
+    )
+    assert winner == Color.WHITE
+    assert victory_points[state.color_to_index[Color.WHITE]] == 4
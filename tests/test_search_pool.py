@@ -0,0 +1,116 @@
+import contextlib
+import io
+import pickle
+import threading
+
+from catanatron.game import Game
+from catanatron.models.enums import Action, ActionType
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.minimax import AlphaBetaPlayer, DebugStateNode
+from catanatron.players.search_pool import get_search_pool
+from catanatron.players.transposition_table import TranspositionTable
+from catanatron.rules import SimulationRules
+
+INF = float("inf")
+
+
+def test_transposition_table_pickles_empty():
+    table = TranspositionTable(8, "fifo")
+    table.store(1, 2, 0, 1, 0.5)
+    copy = pickle.loads(pickle.dumps(table))
+    assert len(copy) == 0
+    assert (copy.capacity, copy.eviction) == (8, "fifo")
+
+
+def test_parallel_alphabeta():
+    serial = AlphaBetaPlayer(Color.RED, 2, transposition_table_size=0)
+    player = AlphaBetaPlayer(Color.RED, 2, num_workers=2)
+    with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+        game = Game(
+            [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)],
+            seed=2,
+            rules=SimulationRules(domestic_trade=False),
+        )
+        for _ in range(2):  # workers get the second position as new actions
+            while (
+                game.state.num_turns < 10
+                or game.state.current_color() != Color.RED
+                or len(game.state.playable_actions) < 4
+            ):
+                game.play_tick()
+
+            actions = game.state.playable_actions
+            action = player.decide(game, actions)
+            expected = serial.decide(game, actions)
+            assert player.search_stats["depth"] == 2
+            if action != expected:  # then it's as good
+                serial.search_depth = 2
+                node = DebugStateNode("", Color.RED)
+                values = [
+                    serial.expected_value(game.copy(), a, 2, -INF, INF, INF, node, 0)
+                    for a in (action, expected)
+                ]
+                assert values[0] == values[1]
+            game.play_tick()
+
+    for worker in get_search_pool(2).workers:
+        assert game.id in worker.games
+
+
+class StateHashPlayer(RandomPlayer):
+    search_id = "state-hash"
+
+    def run_search_task(self, game, task, alpha):
+        return game.state.zobrist
+
+
+def test_workers_tell_branches_of_a_game_apart():
+    pool = get_search_pool(2)
+    player = StateHashPlayer(Color.RED)
+    game = Game(
+        [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)],
+        seed=4,
+        rules=SimulationRules(domestic_trade=False),
+    )
+    keep_turn = {ActionType.MARITIME_TRADE, ActionType.BUILD_ROAD}
+    while game.state.is_initial_build_phase or (
+        len([a for a in game.state.playable_actions if a.action_type in keep_turn])
+        < 2
+    ):
+        game.play_tick()
+    assert pool.run(player, game, [None, None]) == [game.state.zobrist] * 2
+
+    # Copies (so same id) with different actions, then the same END_TURN
+    actions = [a for a in game.state.playable_actions if a.action_type in keep_turn]
+    branches = []
+    for action in actions[:2]:
+        branch = game.copy()
+        branch.execute(action)
+        branch.execute(Action(action.color, ActionType.END_TURN, None))
+        branches.append(branch)
+    assert branches[0].state.zobrist != branches[1].state.zobrist
+
+    for branch in branches:
+        assert pool.run(player, branch, [None, None]) == [branch.state.zobrist] * 2
+
+
+def test_search_pool_serves_threads_one_run_at_a_time():
+    pool = get_search_pool(2)
+    player = StateHashPlayer(Color.RED)
+    games = [
+        Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=seed)
+        for seed in range(4)
+    ]
+    results = dict()
+
+    def run(game):
+        for _ in range(5):
+            results[game.id] = pool.run(player, game, [None] * 4)
+
+    threads = [threading.Thread(target=run, args=(game,)) for game in games]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for game in games:
+        assert results[game.id] == [game.state.zobrist] * 4
@@ -1,16 +1,32 @@
+import copy
+import random
+
 import pytest
 
-from catanatron.state import State, apply_action
+from catanatron.state import (
+    UNDO_BOARD_FIELDS,
+    UNDO_STATE_FIELDS,
+    State,
+    apply_action,
+    apply_action_with_undo,
+    undo_action,
+)
 from catanatron.state_functions import (
     get_dev_cards_in_hand,
+    get_player_buildings,
     player_clean_turn,
     player_freqdeck_add,
     player_deck_replenish,
     player_num_dev_cards,
+    player_key,
     player_num_resource_cards,
 )
+from catanatron.player_state import PLAYER_INITIAL_STATE
+from catanatron.zobrist import zobrist_hash
+from catanatron.models.actions import generate_playable_actions
 from catanatron.models.enums import (
     RESOURCES,
+    SETTLEMENT,
     ActionPrompt,
     BRICK,
     MONOPOLY,
@@ -207,3 +223,146 @@ def test_sequence():
     assert Action(p0_color, ActionType.BUILD_SETTLEMENT, 50) in state.playable_actions
 
     apply_action(state, state.playable_actions[0])
+
+
+def test_player_state_view_reads_and_writes_buffer():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    red_key = player_key(state, Color.RED)
+
+    player_deck_replenish(state, Color.RED, WHEAT, 3)
+    assert state.player_state[f"{red_key}_WHEAT_IN_HAND"] == 3
+
+    state.player_state[f"{red_key}_ORE_IN_HAND"] = 2
+    assert player_num_resource_cards(state, Color.RED, ORE) == 2
+    assert len(state.player_state) == 2 * len(PLAYER_INITIAL_STATE)
+    with pytest.raises(KeyError):
+        state.player_state["P2_ORE_IN_HAND"] = 1
+
+    # booleans are stored as ints, but read back as bools
+    state.player_state[f"{red_key}_HAS_ROLLED"] = True
+    assert state.player_state[f"{red_key}_HAS_ROLLED"] is True
+    assert state.player_state[f"{red_key}_HAS_ARMY"] is False
+    for key, value in state.player_state.items():
+        field = key.split("_", 1)[1]
+        assert type(value) is type(PLAYER_INITIAL_STATE[field])
+    assert state.zobrist == zobrist_hash(state)  # writes keep it in sync
+
+
+def test_copy_does_not_share_player_state():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    player_deck_replenish(state, Color.RED, WOOD, 2)
+
+    state_copy = state.copy()
+    player_deck_replenish(state_copy, Color.RED, WOOD, 5)
+
+    assert player_num_resource_cards(state, Color.RED, WOOD) == 2
+    assert player_num_resource_cards(state_copy, Color.RED, WOOD) == 7
+    assert dict(state.player_state) != dict(state_copy.player_state)
+
+
+def test_copy_does_not_share_buildings_or_decks():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    for _ in range(4):  # initial settlements and roads
+        apply_action(state, state.playable_actions[0])
+
+    state_copy = state.copy()
+    while state_copy.is_initial_build_phase:
+        apply_action(state_copy, state_copy.playable_actions[0])
+    color = state_copy.current_color()
+    player_deck_replenish(state_copy, color, WHEAT, 1)
+    player_deck_replenish(state_copy, color, SHEEP, 1)
+    player_deck_replenish(state_copy, color, ORE, 1)
+    apply_action(state_copy, Action(color, ActionType.BUY_DEVELOPMENT_CARD, None))
+
+    for color in state.colors:
+        assert len(get_player_buildings(state, color, SETTLEMENT)) == 1
+        assert len(get_player_buildings(state_copy, color, SETTLEMENT)) == 2
+    assert len(state.board.buildings) == 2
+    assert len(state_copy.board.buildings) == 4
+    assert sum(state.resource_freqdeck) == 19 * 5
+    assert sum(state_copy.resource_freqdeck) < 19 * 5
+    assert len(state.development_listdeck) == 25
+    assert len(state_copy.development_listdeck) == 24
+
+
+def test_undo_action_restores_exact_state():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+
+    def snapshot(state):  # deep, to catch in-place mutations too
+        return copy.deepcopy(
+            (
+                state.player_buffer,
+                state.actions,
+                state.playable_actions,
+                [
+                    getattr(state, field)
+                    for field in UNDO_STATE_FIELDS
+                    if not field.startswith("_")  # lazy playable_actions
+                ],
+                [
+                    getattr(state.board, field)
+                    for field in UNDO_BOARD_FIELDS
+                    if not field.endswith("_cache")  # memoized lazily; ok to differ
+                ],
+            )
+        )
+
+    for _ in range(200):
+        before = snapshot(state)
+        for action in state.playable_actions:
+            if action.action_type == ActionType.OFFER_TRADE:
+                continue
+            record = apply_action_with_undo(state, action)
+            assert state.actions[-1] == record.action
+            undo_action(state, record)
+            assert snapshot(state) == before
+
+        apply_action(state, random.choice(state.playable_actions))
+
+
+def test_lazy_playable_actions_match_fresh_generation():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    for _ in range(300):
+        assert state.playable_actions == generate_playable_actions(state)
+        # prefer building and maritime trading (over ending turn) to exercise
+        # within-turn invalidation. avoid offering trades and playing dev cards.
+        actions = [
+            a
+            for a in state.playable_actions
+            if not a.action_type.value.startswith(("PLAY_", "OFFER_", "END_"))
+        ] or [a for a in state.playable_actions if a.action_type == ActionType.END_TURN]
+        if len(state.development_listdeck) == 0:
+            break
+        apply_action(state, random.choice(actions))
+
+
+def test_zobrist_is_maintained_incrementally():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    for _ in range(300):
+        assert state.zobrist == zobrist_hash(state)
+
+        actions = [
+            a
+            for a in state.playable_actions
+            if not a.action_type.value.startswith(("PLAY_", "OFFER_"))
+        ]
+        if len(state.development_listdeck) == 0 or len(actions) == 0:
+            break
+        action = random.choice(actions)
+        before = state.zobrist
+        record = apply_action_with_undo(state, action)
+        assert state.zobrist != before
+        undo_action(state, record)
+        assert state.zobrist == before
+        apply_action(state, action)
+
+    state_copy = state.copy()
+    assert state_copy.zobrist == state.zobrist
+    apply_action(state_copy, state_copy.playable_actions[0])
+    assert state_copy.zobrist != state.zobrist
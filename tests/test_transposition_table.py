@@ -0,0 +1,160 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.enums import ActionType
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.minimax import AlphaBetaPlayer, DebugStateNode
+from catanatron.players.transposition_table import (
+    EXACT,
+    LOWER,
+    UPPER,
+    TranspositionTable,
+)
+from catanatron.rules import SimulationRules
+
+INF = float("inf")
+
+
+def test_transposition_table_bounds():
+    table = TranspositionTable()
+    table.store(1, 2, -INF, INF, 5.0, "a")
+    table.store(2, 2, 10, 20, 25.0, "b")  # failed high
+    table.store(3, 2, 10, 20, 5.0, "c")  # failed low
+
+    assert table.entries[1].bound == EXACT
+    assert table.entries[2].bound == LOWER
+    assert table.entries[3].bound == UPPER
+
+    assert table.lookup(1, 2, -INF, INF)[1] == 5.0
+    assert table.lookup(1, 3, -INF, INF)[1] is None  # not deep enough
+    assert table.lookup(1, 3, -INF, INF)[0].action == "a"  # still useful
+    assert table.lookup(2, 1, 0, 20)[1] == 25.0
+    assert table.lookup(2, 1, 0, 30)[1] is None
+    assert table.lookup(3, 1, 5, 20)[1] == 5.0
+    assert table.lookup(3, 1, 0, 20)[1] is None
+    assert table.lookup(4, 0, -INF, INF) == (None, None)
+
+    stats = table.stats()
+    assert stats["hits"] == 7 and stats["misses"] == 1 and stats["cutoffs"] == 3
+
+
+def test_transposition_table_keeps_deeper_entries():
+    table = TranspositionTable()
+    table.store(1, 3, -INF, INF, 5.0, "deep")
+    table.store(1, 1, -INF, INF, 7.0, "shallow")
+    assert table.entries[1].action == "deep"
+    table.store(1, 3, -INF, INF, 6.0, "deep again")
+    assert table.entries[1].action == "deep again"
+
+
+@pytest.mark.parametrize(
+    "eviction,kept",
+    [("lru", {1, 3}), ("fifo", {2, 3}), ("depth", {1, 3})],
+)
+def test_transposition_table_eviction(eviction, kept):
+    table = TranspositionTable(2, eviction)
+    table.store(1, 2, -INF, INF, 0.0)
+    table.store(2, 1, -INF, INF, 0.0)
+    table.lookup(1, 0, -INF, INF)
+    table.store(3, 2, -INF, INF, 0.0)
+    assert set(table.entries) == kept
+    assert table.stats()["evictions"] == 1
+
+    with pytest.raises(ValueError):
+        TranspositionTable(2, "random")
+
+
+def test_alphabeta_decides_the_same_with_transposition_table():
+    random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+        for seed in range(4):
+            game = Game(
+                [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)],
+                seed=seed,
+                rules=SimulationRules(domestic_trade=False),
+            )
+            while game.state.num_turns < 10 or len(game.state.playable_actions) < 4:
+                game.play_tick()
+
+            color = game.state.current_color()
+            plain = AlphaBetaPlayer(color, 2, transposition_table_size=0)
+            player = AlphaBetaPlayer(color, 2)
+            actions = game.state.playable_actions
+            assert player.decide(game, actions) == plain.decide(game, actions)
+            assert player.transposition_table.stats()["stores"] > 0
+
+    player.reset_state()
+    assert len(player.transposition_table) == 0
+
+
+def test_alphabeta_iterative_deepening_and_move_ordering():
+    with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+        game = Game(
+            [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)],
+            seed=1,
+            rules=SimulationRules(domestic_trade=False),
+        )
+        while game.state.num_turns < 10 or len(game.state.playable_actions) < 4:
+            game.play_tick()
+        color = game.state.current_color()
+        player = AlphaBetaPlayer(color, 2)
+        player.decide(game, game.state.playable_actions)
+
+    assert player.search_stats["depth"] == 2
+    assert player.search_stats["nodes"] > 0
+    assert player.best_actions == {}
+
+    actions = game.state.playable_actions
+    killer, best = actions[-1], actions[-2]
+    player.search_depth, player.killers[0] = 2, [killer]
+    ordered = player.order_actions(actions, 2, best)
+    assert ordered[:2] == [best, killer]
+    assert sorted(ordered, key=repr) == sorted(actions, key=repr)
+
+    player.record_cutoff(killer, 2)
+    assert player.history[killer.action_type] > 0
+    player.reset_state()
+    assert len(player.history) == 0
+
+
+def test_alphabeta_chance_pruning_at_rolls():
+    with contextlib.redirect_stdout(io.StringIO()):  # quiet trade logs
+        game = Game(
+            [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)],
+            seed=3,
+            rules=SimulationRules(domestic_trade=False),
+        )
+        while (
+            game.state.num_turns < 10
+            or game.state.playable_actions[0].action_type != ActionType.ROLL
+        ):
+            game.play_tick()
+    roll = game.state.playable_actions[0]
+    player = AlphaBetaPlayer(game.state.current_color(), 1)
+    plain = AlphaBetaPlayer(game.state.current_color(), 1, chance_pruning=False)
+
+    node = DebugStateNode("", player.color)
+    value = plain.expected_value(game, roll, 1, -INF, INF, INF, node, 0)
+    assert player.expected_value(game, roll, 1, -INF, INF, INF, node, 0) == value
+    assert player.search_stats["chance_cutoffs"] == 0
+
+    # Can't reach alpha: a bound (<= alpha) after searching only some rolls
+    bound = player.expected_value(game, roll, 1, value + 1e6, INF, INF, node, 0)
+    assert value <= bound <= value + 1e6
+    assert player.search_stats["chance_cutoffs"] == 1
+
+    # Deeper, roll outcomes get searched further (so they differ by more than
+    # hands): without a table to probe with, every outcome is searched.
+    player = AlphaBetaPlayer(player.color, 2, transposition_table_size=0)
+    plain = AlphaBetaPlayer(
+        player.color, 2, transposition_table_size=0, chance_pruning=False
+    )
+    alpha = plain.expected_value(game, roll, 2, -INF, INF, INF, node, 0) + 1e6
+    value = plain.expected_value(game, roll, 2, alpha, INF, INF, node, 0)
+    bound = player.expected_value(game, roll, 2, alpha, INF, INF, node, 0)
+    assert bound == pytest.approx(value)
+    assert player.search_stats["chance_cutoffs"] == 0
@@ -4,6 +4,7 @@ from catanatron.models.player import Color
 from catanatron.models.decks import (
     freqdeck_count,
     freqdeck_draw,
+    freqdeck_from_listdeck,
     starting_resource_bank,
 )
 
@@ -92,3 +93,31 @@ def test_empty_payout_if_not_enough_resources():
     assert (
         Color.RED not in payout or freqdeck_count(payout[Color.RED], tile.resource) == 0  # type: ignore
     )
+
+
+def test_robber_blocks_payout():
+    board = Board()
+    resource_freqdeck = starting_resource_bank()
+
+    tile, coordinate = board.map.land_tiles[(0, 0, 0)], (0, 0, 0)
+    if tile.resource is None:  # is desert
+        tile, coordinate = board.map.land_tiles[(-1, 0, 1)], (-1, 0, 1)
+
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board.move_robber(coordinate)
+    payout, _ = yield_resources(board, resource_freqdeck, tile.number)
+    # only node 3's other tiles with the same number (if any) pay
+    others = [
+        t
+        for t in board.map.adjacent_tiles[3]
+        if t is not tile and t.number == tile.number
+    ]
+    paid = freqdeck_from_listdeck([t.resource for t in others])
+    assert payout.get(Color.RED, [0] * len(paid)) == paid
+
+    # city built under the robber pays out once it leaves
+    board.build_city(Color.RED, 3)
+    desert = next(c for c, t in board.map.land_tiles.items() if t.number is None)
+    board.move_robber(desert)
+    payout, _ = yield_resources(board, resource_freqdeck, tile.number)
+    assert freqdeck_count(payout[Color.RED], tile.resource) >= 2  # type: ignore